@@ -94,5 +94,6 @@ def on_setup_logging(
 celery_app.autodiscover_tasks(
     [
         "onyx.background.celery.tasks.pruning",
+        "onyx.background.celery.tasks.deepsearch",
     ]
 )
@@ -0,0 +1,90 @@
+import json
+import time
+from io import BytesIO
+from typing import Any
+
+from celery import shared_task
+from celery import Task
+
+from onyx.background.celery.apps.app_base import task_logger
+from onyx.configs.constants import FileOrigin
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.db.engine import get_session_with_current_tenant
+from onyx.deepsearch_backend.config import DEEPSEARCH_JOB_TIMEOUT
+from onyx.deepsearch_backend.config import DEEPSEARCH_PERSIST_RESULTS
+from onyx.deepsearch_backend.job_state import add_event
+from onyx.deepsearch_backend.job_state import finish_job
+from onyx.deepsearch_backend.job_state import mark_running
+from onyx.deepsearch_backend.storm import run_deepsearch
+from onyx.file_store.file_store import get_default_file_store
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.threadpool_concurrency import run_with_timeout
+
+
+def deepsearch_result_file_name(job_id: str) -> str:
+    return f"deepsearch_{job_id}.json"
+
+
+def _persist_result(job_id: str, query: str, result: dict[str, Any]) -> None:
+    with get_session_with_current_tenant() as db_session:
+        get_default_file_store(db_session).save_file(
+            file_name=deepsearch_result_file_name(job_id),
+            content=BytesIO(json.dumps(result).encode("utf-8")),
+            display_name=query[:255],
+            file_origin=FileOrigin.GENERATED_REPORT,
+            file_type="application/json",
+            file_metadata={"job_id": job_id},
+        )
+
+
+@shared_task(
+    name=OnyxCeleryTask.DEEPSEARCH_JOB_TASK,
+    ignore_result=True,
+    bind=True,
+    trail=False,
+)
+def deepsearch_job_task(self: Task, *, job_id: str, query: str, tenant_id: str) -> None:
+    """
+    Runs one deep search job submitted through /deepsearch/submit.
+
+    The worker uses the thread pool, where Celery does not enforce time limits, so the
+    timeout is enforced here: the job is failed after DEEPSEARCH_JOB_TIMEOUT, and a run
+    still going at that point stops at its next progress event.
+    """
+    r = get_raw_redis_client()
+    if not mark_running(r, job_id):
+        task_logger.info(
+            f"Skipping deep search job {job_id}: unknown or already finished"
+        )
+        return
+
+    task_logger.info(f"Deep search job starting: job_id={job_id}")
+    deadline = time.monotonic() + DEEPSEARCH_JOB_TIMEOUT
+
+    def on_event(stage: str, **data: Any) -> None:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Deep search job {job_id} ran past its deadline")
+        add_event(r, job_id, stage, **data)
+
+    try:
+        result = run_with_timeout(
+            DEEPSEARCH_JOB_TIMEOUT, run_deepsearch, query, on_event=on_event
+        )
+    except TimeoutError:
+        task_logger.warning(f"Deep search job timed out: job_id={job_id}")
+        finish_job(r, job_id, error="Deep search timed out")
+        return
+    except Exception as e:
+        task_logger.exception(f"Deep search job failed: job_id={job_id}")
+        finish_job(r, job_id, error=str(e))
+        return
+
+    finish_job(r, job_id, result=result)
+    if DEEPSEARCH_PERSIST_RESULTS:
+        try:
+            _persist_result(job_id, query, result)
+        except Exception:
+            task_logger.exception(
+                f"Failed to persist deep search result: job_id={job_id}"
+            )
+    task_logger.info(f"Deep search job finished: job_id={job_id}")
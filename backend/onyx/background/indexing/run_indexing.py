@@ -13,6 +13,7 @@ from onyx.background.indexing.checkpointing_utils import get_latest_valid_checkp
 from onyx.background.indexing.checkpointing_utils import save_checkpoint
 from onyx.background.indexing.memory_tracer import MemoryTracer
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
+from onyx.configs.app_configs import INDEXING_PREFETCH_BATCHES
 from onyx.configs.app_configs import INDEXING_SIZE_WARNING_THRESHOLD
 from onyx.configs.app_configs import INDEXING_TRACER_INTERVAL
 from onyx.configs.app_configs import INTEGRATION_TESTS_MODE
@@ -62,6 +63,7 @@ from onyx.utils.middleware import make_randomized_onyx_request_id
 from onyx.utils.telemetry import create_milestone_and_report
 from onyx.utils.telemetry import optional_telemetry
 from onyx.utils.telemetry import RecordType
+from onyx.utils.threadpool_concurrency import prefetch_iterator
 from onyx.utils.variable_functionality import global_version
 from shared_configs.configs import MULTI_TENANT
 
@@ -451,8 +453,12 @@ def _run_indexing(
             logger.info(
                 f"Running '{ctx.source.value}' connector with checkpoint: {checkpoint}"
             )
-            for document_batch, failure, next_checkpoint in connector_runner.run(
-                checkpoint
+            # the connector keeps fetching the next batches while this thread indexes the
+            # current one. Batches and checkpoints are still handled in connector order, and
+            # the checkpoint is only saved once everything before it has been indexed.
+            for document_batch, failure, next_checkpoint in prefetch_iterator(
+                connector_runner.run(checkpoint),
+                max_prefetch=INDEXING_PREFETCH_BATCHES,
             ):
                 # Check if connector is disabled mid run and stop if so unless it's the secondary
                 # index being built. We want to populate it even for paused connectors
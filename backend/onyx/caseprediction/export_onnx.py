@@ -0,0 +1,57 @@
+"""
+Export the case prediction classifier for CASE_PREDICTION_BACKEND=onnx.
+
+    python -m onyx.caseprediction.export_onnx           # writes CASE_PREDICTION_ONNX_PATH
+    python -m onyx.caseprediction.export_onnx --int8    # plus an int8 dynamically quantized copy
+
+Requires onnxruntime (only for --int8) in addition to torch.
+"""
+import inspect
+import sys
+import time
+
+from transformers import AutoConfig, AutoModelForSequenceClassification  # type: ignore
+
+from onyx.caseprediction.inference_config import CASE_PREDICTION_MODEL_PATH, CASE_PREDICTION_ONNX_PATH
+from onyx.caseprediction.predictor import int8_onnx_path, load_tokenizer
+
+
+def export(model_path: str, onnx_path: str, int8: bool = False) -> None:
+    import torch  # type: ignore
+
+    config = AutoConfig.from_pretrained(model_path)
+    config.return_dict = False
+    tokenizer = load_tokenizer(model_path, config)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path, config=config, local_files_only=True)
+    model.eval()
+
+    sample = tokenizer(["sample facts", "a slightly longer sample of facts"], return_tensors="pt", padding=True)
+    # graph inputs follow the order of forward()'s parameters, not the tokenizer's output order
+    input_names = [p for p in inspect.signature(model.forward).parameters if p in sample]
+    torch.onnx.export(
+        model,
+        ({name: sample[name] for name in input_names},),
+        onnx_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes={
+            **{name: {0: "batch", 1: "sequence"} for name in input_names},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+
+        quantize_dynamic(onnx_path, int8_onnx_path(onnx_path), weight_type=QuantType.QInt8)
+
+
+def main(argv):
+    t0 = time.time()
+    export(CASE_PREDICTION_MODEL_PATH, CASE_PREDICTION_ONNX_PATH, int8="--int8" in argv)
+    print(f"[export_onnx] {CASE_PREDICTION_ONNX_PATH} written in {time.time() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
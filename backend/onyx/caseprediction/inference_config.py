@@ -0,0 +1,56 @@
+import os
+
+from dotenv import load_dotenv  # type: ignore
+
+load_dotenv()
+
+# Path inside the container where the caseprediction model files are mounted
+CASE_PREDICTION_MODEL_PATH = os.environ.get("CASE_PREDICTION_MODEL_PATH") or "/app/caseprediction_model"
+
+# ========= Classifier backend =========
+# "torch" -> HF AutoModelForSequenceClassification under torch.inference_mode
+# "onnx"  -> ONNX Runtime session over CASE_PREDICTION_ONNX_PATH
+#            (export with `python -m onyx.caseprediction.export_onnx`; needs onnxruntime)
+CASE_PREDICTION_BACKEND = (os.environ.get("CASE_PREDICTION_BACKEND") or "torch").strip().lower()
+CASE_PREDICTION_ONNX_PATH = os.environ.get("CASE_PREDICTION_ONNX_PATH") or os.path.join(
+    CASE_PREDICTION_MODEL_PATH, "model.onnx"
+)
+# int8 dynamic quantization of the Linear layers (torch backend) / use the *.int8.onnx export (onnx backend)
+CASE_PREDICTION_QUANTIZE = os.environ.get("CASE_PREDICTION_QUANTIZE", "").lower() == "true"
+# Intra-op threads for the forward pass; 0 keeps the library default (all cores)
+CASE_PREDICTION_NUM_THREADS = int(os.environ.get("CASE_PREDICTION_NUM_THREADS") or 0)
+# Fall back to the slow (sentencepiece) tokenizer when the fast one cannot be built
+CASE_PREDICTION_FAST_TOKENIZER = os.environ.get("CASE_PREDICTION_FAST_TOKENIZER", "true").lower() == "true"
+CASE_PREDICTION_MAX_LENGTH = int(os.environ.get("CASE_PREDICTION_MAX_LENGTH") or 512)
+
+# ========= Long inputs (sliding window) =========
+# Tokens shared by consecutive windows
+CASE_PREDICTION_WINDOW_STRIDE = int(os.environ.get("CASE_PREDICTION_WINDOW_STRIDE") or 128)
+# Longer documents are covered by this many evenly spaced windows
+CASE_PREDICTION_MAX_WINDOWS = int(os.environ.get("CASE_PREDICTION_MAX_WINDOWS") or 16)
+# How window logits are combined: "mean" | "max" | "attention"
+CASE_PREDICTION_WINDOW_AGGREGATION = (os.environ.get("CASE_PREDICTION_WINDOW_AGGREGATION") or "mean").strip().lower()
+
+# ========= Prediction + reasoning cache (Redis) =========
+CASE_PREDICTION_CACHE_ENABLED = os.environ.get("CASE_PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+CASE_PREDICTION_CACHE_TTL = int(os.environ.get("CASE_PREDICTION_CACHE_TTL") or 7 * 24 * 3600)
+# Least-recently-used entries beyond this many are evicted
+CASE_PREDICTION_CACHE_MAX_ENTRIES = int(os.environ.get("CASE_PREDICTION_CACHE_MAX_ENTRIES") or 10000)
+# Part of every cache key; defaults to a fingerprint of the model files + backend
+CASE_PREDICTION_MODEL_REVISION = os.environ.get("CASE_PREDICTION_MODEL_REVISION") or ""
+# Near-duplicate lookup: reuse an entry whose facts embed within this cosine similarity
+# (embedded by the model server with CASE_PREDICTION_CACHE_EMBEDDING_MODEL)
+CASE_PREDICTION_CACHE_SEMANTIC = os.environ.get("CASE_PREDICTION_CACHE_SEMANTIC", "").lower() == "true"
+CASE_PREDICTION_CACHE_SIMILARITY = float(os.environ.get("CASE_PREDICTION_CACHE_SIMILARITY") or 0.97)
+CASE_PREDICTION_CACHE_EMBEDDING_MODEL = (
+    os.environ.get("CASE_PREDICTION_CACHE_EMBEDDING_MODEL") or "multi-qa-mpnet-base-cos-v1"
+)
+# Embeddings of this many recently cached facts are kept for the near-duplicate lookup
+CASE_PREDICTION_CACHE_SEMANTIC_MAX = int(os.environ.get("CASE_PREDICTION_CACHE_SEMANTIC_MAX") or 2000)
+
+# ========= Micro-batching =========
+# Requests arriving within this window are run as one padded batch
+CASE_PREDICTION_BATCH_WAIT_MS = float(os.environ.get("CASE_PREDICTION_BATCH_WAIT_MS") or 5)
+CASE_PREDICTION_MAX_BATCH_SIZE = int(os.environ.get("CASE_PREDICTION_MAX_BATCH_SIZE") or 16)
+# Upper bound on queries accepted by /caseprediction/batch
+CASE_PREDICTION_MAX_BATCH_QUERIES = int(os.environ.get("CASE_PREDICTION_MAX_BATCH_QUERIES") or 64)
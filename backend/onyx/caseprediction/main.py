@@ -2,18 +2,33 @@ from fastapi import APIRouter, HTTPException, Depends # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
 from pydantic import BaseModel # type: ignore
 from fastapi.encoders import jsonable_encoder # type: ignore
-from fastapi.responses import JSONResponse # type: ignore
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, AutoConfig  # type: ignore
+from fastapi.responses import JSONResponse, StreamingResponse # type: ignore
 from dotenv import load_dotenv  # type: ignore
-import torch.nn.functional as F  # type: ignore
-import torch  # type: ignore
 from langchain.llms import HuggingFaceHub  # type: ignore
 from google.generativeai.types import GenerationConfig # type: ignore
 from onyx.auth.users import current_user # type: ignore
 import google.generativeai as genai # type: ignore
+from typing import List, Optional
+import json
 import logging
 import os
 
+from onyx.caseprediction.inference_config import CASE_PREDICTION_MAX_BATCH_QUERIES
+from onyx.caseprediction.inference_config import CASE_PREDICTION_MODEL_PATH
+from onyx.caseprediction.inference_config import CASE_PREDICTION_WINDOW_AGGREGATION
+from onyx.caseprediction.prediction_cache import cache_get
+from onyx.caseprediction.prediction_cache import cache_put
+from onyx.caseprediction.prediction_cache import cache_stats
+from onyx.caseprediction.prediction_cache import find_similar
+from onyx.caseprediction.prediction_cache import prediction_digest
+from onyx.caseprediction.prediction_cache import reasoning_digest
+from onyx.caseprediction.prediction_cache import record_lookup
+from onyx.caseprediction.prediction_cache import remember_similar
+from onyx.caseprediction.predictor import AGGREGATIONS
+from onyx.caseprediction.predictor import CasePredictor
+from onyx.caseprediction.predictor import MicroBatcher
+from onyx.utils.lazy_resource import LazyResource
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -34,129 +49,265 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/caseprediction", tags=["CasePrediction"]) # Prefix caseprediction endpoint with /caseprediction
 
-MODEL_PATH = "/app/caseprediction_model"  # Path inside container where caseprediction model files are mounted
-config_file_path = os.path.join(MODEL_PATH, "config.json")
-print(f"Attempting to access config file at: {config_file_path}")
-
-if not os.path.exists(config_file_path):
-    print(f"Files in {MODEL_PATH}: {os.listdir(MODEL_PATH)}")
-    raise FileNotFoundError("config.json is missing in the specified MODEL_PATH!")
-else:
-    print("config.json exists!")
+MODEL_PATH = CASE_PREDICTION_MODEL_PATH  # Path inside container where caseprediction model files are mounted
 
 # Initialize the LLM client
 # Uncomment this once Huggingface Inference Pro is Restored
 # llm_client = HuggingFaceHub(repo_id="NousResearch/Nous-Hermes-2-Mixtral-8x7B-DPO", model_kwargs={"temperature": 0.2, "max_length": 10000})
 
-try:
-    # Load model configuration
-    config = AutoConfig.from_pretrained(MODEL_PATH)
-    
-    # Load the tokenizer
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH, config=config, local_files_only=True, use_fast=False)
-    print("AutoTokenizer loaded successfully!")
+def _load_predictor() -> CasePredictor:
+    try:
+        # Load the tokenizer + classifier backend (torch / ONNX Runtime, see inference_config)
+        return CasePredictor(MODEL_PATH)
+    except Exception as e:
+        raise RuntimeError(f"Error loading model from {MODEL_PATH}: {str(e)}")
+
+# The model is loaded on the first prediction (or warmed at startup, see WARM_FEATURES_ON_STARTUP),
+# not when the API server imports this router
+predictor = LazyResource("caseprediction", _load_predictor)
 
-    # Load the model
-    model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH, config=config, local_files_only=True)
-    print("AutoModelForSequenceClassification loaded successfully!")
+# Concurrent requests are collected for a few ms and classified as one padded batch.
+# Batches run on the batcher's worker thread, so a cold load never blocks the event loop.
+batcher = MicroBatcher(lambda texts: predictor.get().predict_batch(texts))
 
-except Exception as e:
-    raise RuntimeError(f"Error loading model from {MODEL_PATH}: {str(e)}")
+# Gemini client for the reasoning (async calls only, so the event loop is never blocked)
+# Comment this out once Huggingface Inference Pro is Restored
+gemini_model = genai.GenerativeModel(model_name="gemini-2.0-flash")
+REASONING_GENERATION_CONFIG = GenerationConfig(
+    max_output_tokens=3000,
+    temperature=0.2
+)
+
+# Bump whenever build_reasoning_prompt changes so cached reasoning is regenerated
+REASONING_PROMPT_VERSION = "1"
+NO_REASONING = "No reasoning generated."
+
+def build_reasoning_prompt(query: str, label: str) -> str:
+    return (
+        f"You are an advanced legal analysis assistant specializing in the Indian legal system, tasked with assisting legal professionals in evaluating case scenarios. "
+        f"The user will provide a set of facts or a preliminary document outlining a legal matter ({query}). Your role is to analyze the provided information "
+        f"and deliver a comprehensive explanation supporting the models prediction that the case would be '{label}', providing detailed reasoning grounded in the following:\n\n"
+
+        f"Applicable Legal Frameworks: Reference relevant Indian statutes regulations, and recent amendments.\n"
+        f"Case Precedents: Cite authoritative judgments from the Supreme Court of India, High Courts, or other relevant tribunals. Ensure precedents are recent and contextually relevant to the facts provided.\n"
+        f"Application to Facts: Explain how the legal principles and precedents apply to the specific facts or documents submitted, addressing key issues raised in the query.\n"
+        f"Counterarguments: Identify potential counterarguments or defenses that could be raised by opposing parties and evaluate their validity under Indian law, explaining why they may or may not succeed.\n"
+        f"Jurisdictional Context: Where relevant, consider the specific court or jurisdiction (e.g., District Court, High Court, Supreme Court, or specialized tribunals like NCLT) and any state-specific laws that may apply.\n\n"
+
+        f"The response should be structured as follows:\n\n"
+        # f"Outcome: {label.upper()}'.\n"
+        f"Legal Analysis: Provide a reasoned explanation, citing specific statutes, case law (with case names and citations where possible), and their application to the facts.\n"
+        f"Counterarguments: Discuss opposing arguments and their relevance or shortcomings.\n"
+        f"Conclusion: Summarize the basis for the outcome and, if applicable, suggest next steps (e.g., additional evidence needed, potential appeal, or alternative legal remedies).\n"
+        f"If the facts provided are ambiguous or insufficient, highlight the gaps and suggest specific clarifications needed to refine the analysis (e.g., additional details about jurisdiction, parties, or evidence). "
+        f"Avoid speculation and maintain a neutral, formal tone suitable for legal professionals. Format the response clearly with headings or bullet points for readability, ensuring it is concise yet comprehensive."
+        
+        f"Now begin the legal analysis based on the facts provided.\n\n"
+        f"Important: Do not contradict the model prediction. Focus only on legal justification for the given outcome."
+    )
 
 # Define the request body model
 class CaseQuery(BaseModel):
     query: str
+    # Score the whole text in overlapping windows instead of its first 512 tokens
+    long_input: bool = False
+    aggregation: str = CASE_PREDICTION_WINDOW_AGGREGATION  # "mean" | "max" | "attention"
 
 # Define the response model
 class PredictionResult(BaseModel):
     confidence: float
     prediction: int
     reasoning: str
+    window_scores: Optional[List[dict]] = None  # long_input only: per-window prediction/confidence
 
-# Case prediction endpoint
-@router.post("/", response_model=PredictionResult)
-async def case_prediction(query_data: CaseQuery, user=Depends(current_user)):
+class CaseBatchQuery(BaseModel):
+    queries: List[str]
+
+class ClassifierResult(BaseModel):
+    confidence: float
+    prediction: int
+
+class BatchPredictionResult(BaseModel):
+    results: List[ClassifierResult]
+
+def _validate_query(query_data: CaseQuery) -> None:
+    if query_data.aggregation not in AGGREGATIONS:
+        raise HTTPException(status_code=400, detail=f"aggregation must be one of {', '.join(AGGREGATIONS)}")
+
+async def _get_predictor() -> CasePredictor:
     try:
-        # Step 1: Tokenize the query
-        inputs = tokenizer(query_data.query, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        return await predictor.aget()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Case prediction model unavailable: {e}")
 
-        # Step 2: Get prediction and confidence from model
-        with torch.no_grad():
-            outputs = model(**inputs)
-            print(f"Raw logits: {outputs.logits}")
+async def _classify(query_data: CaseQuery):
+    """(prediction, confidence, window_scores); micro-batched on the prediction worker thread."""
+    if query_data.long_input:
+        # all windows of the facts run as one padded batch
+        (prediction, confidence), window_scores = await batcher.run(
+            lambda text, aggregation: predictor.get().predict_long(text, aggregation),
+            query_data.query,
+            query_data.aggregation,
+        )
+        return prediction, confidence, window_scores
+    prediction, confidence = await batcher.submit(query_data.query)
+    return prediction, confidence, None
 
-            # Apply softmax to get probabilities
-            probabilities = F.softmax(outputs.logits, dim=-1)
-            print(f"Softmax probabilities: {probabilities}")
+async def _classify_cached(query_data: CaseQuery):
+    """
+    (prediction digest, {prediction, confidence, window_scores}), served from the prediction
+    cache on an exact (normalized) or near-duplicate match of the facts.
+    """
+    mode = {"long_input": query_data.long_input, "aggregation": query_data.aggregation if query_data.long_input else None}
+    model = await _get_predictor()
+    key = prediction_digest(query_data.query, model.revision, mode)
+    cached = await cache_get("prediction", key)
+    if cached is not None:
+        await record_lookup(hit=True)
+        return key, cached
 
-            # Get the predicted class (0 or 1)
-            predictions = torch.argmax(probabilities, dim=-1)
-            prediction = predictions.numpy()[0]
+    similar_key, vector = await find_similar(query_data.query, mode)
+    if similar_key:
+        cached = await cache_get("prediction", similar_key)
+        if cached is not None:
+            await record_lookup(hit=True)
+            return similar_key, cached
 
-            # Get confidence based on the predicted class
-            confidence = probabilities[0, prediction].item() * 100  # Convert to percentage
+    await record_lookup(hit=False)
+    prediction, confidence, window_scores = await _classify(query_data)
+    classified = {"prediction": int(prediction), "confidence": round(confidence, 2), "window_scores": window_scores}
+    await cache_put("prediction", key, classified)
+    remember_similar(vector, mode, key)
+    return key, classified
 
-            # If the prediction is "rejected" (class 0), adjust confidence
-            # Uncomment this if logic still needs to be applied based on Reject class index
-            # if prediction == 0:
-            #     confidence = 100 - confidence  
+# Case prediction endpoint
+@router.post("/", response_model=PredictionResult)
+async def case_prediction(query_data: CaseQuery, user=Depends(current_user)):
+    _validate_query(query_data)
+    try:
+        # Step 1-2: Get prediction and confidence from the classifier (or the prediction cache)
+        key, classified = await _classify_cached(query_data)
+        prediction, confidence = classified["prediction"], classified["confidence"]
 
         # Step 3: Generate reasoning using Hugging Face LLM
         label = "accepted" if prediction == 1 else "rejected"
         logging.debug(f"Prediction: {label}, Confidence: {confidence:.2f}%")
 
-        reasoning_prompt = (
-            f"You are an advanced legal analysis assistant specializing in the Indian legal system, tasked with assisting legal professionals in evaluating case scenarios. "
-            f"The user will provide a set of facts or a preliminary document outlining a legal matter ({query_data.query}). Your role is to analyze the provided information "
-            f"and deliver a comprehensive explanation supporting the models prediction that the case would be '{label}', providing detailed reasoning grounded in the following:\n\n"
-
-            f"Applicable Legal Frameworks: Reference relevant Indian statutes regulations, and recent amendments.\n"
-            f"Case Precedents: Cite authoritative judgments from the Supreme Court of India, High Courts, or other relevant tribunals. Ensure precedents are recent and contextually relevant to the facts provided.\n"
-            f"Application to Facts: Explain how the legal principles and precedents apply to the specific facts or documents submitted, addressing key issues raised in the query.\n"
-            f"Counterarguments: Identify potential counterarguments or defenses that could be raised by opposing parties and evaluate their validity under Indian law, explaining why they may or may not succeed.\n"
-            f"Jurisdictional Context: Where relevant, consider the specific court or jurisdiction (e.g., District Court, High Court, Supreme Court, or specialized tribunals like NCLT) and any state-specific laws that may apply.\n\n"
-
-            f"The response should be structured as follows:\n\n"
-            # f"Outcome: {label.upper()}'.\n"
-            f"Legal Analysis: Provide a reasoned explanation, citing specific statutes, case law (with case names and citations where possible), and their application to the facts.\n"
-            f"Counterarguments: Discuss opposing arguments and their relevance or shortcomings.\n"
-            f"Conclusion: Summarize the basis for the outcome and, if applicable, suggest next steps (e.g., additional evidence needed, potential appeal, or alternative legal remedies).\n"
-            f"If the facts provided are ambiguous or insufficient, highlight the gaps and suggest specific clarifications needed to refine the analysis (e.g., additional details about jurisdiction, parties, or evidence). "
-            f"Avoid speculation and maintain a neutral, formal tone suitable for legal professionals. Format the response clearly with headings or bullet points for readability, ensuring it is concise yet comprehensive."
-            
-            f"Now begin the legal analysis based on the facts provided.\n\n"
-            f"Important: Do not contradict the model prediction. Focus only on legal justification for the given outcome."
-        )
-
-        # Uncomment this once Huggingface Inference Pro is Restored
-        # reasoning = llm_client.generate(
-        #     prompts=[reasoning_prompt],
-        #     max_new_tokens=1000,
-        #     temperature=0.2
-        # )
-        # reasoning_text = reasoning.generations[0][0].text.strip() if reasoning.generations else "No reasoning generated."
-        
-        # Comment this out once Huggingface Inference Pro is Restored
-        gemini_model = genai.GenerativeModel(model_name="gemini-2.0-flash")
-        response = gemini_model.generate_content(
-            reasoning_prompt,
-            generation_config=GenerationConfig(
-                max_output_tokens=3000,
-                temperature=0.2
-            )
-        )
-        reasoning_text = response.text.strip() if response.text else "No reasoning generated."    
-        logging.debug(f"Reasoning: {reasoning_text}")
+        reasoning_key = reasoning_digest(key, REASONING_PROMPT_VERSION, label)
+        reasoning_text = await cache_get("reasoning", reasoning_key)
+        if reasoning_text is None:
+            reasoning_text = await _generate_reasoning(query_data.query, label)
+            if reasoning_text != NO_REASONING:
+                await cache_put("reasoning", reasoning_key, reasoning_text)
 
         # Step 4: Prepare the response
         response_content = {
-            "confidence": round(confidence, 2),
-            "prediction": int(prediction),
-            "reasoning": reasoning_text
+            "confidence": confidence,
+            "prediction": prediction,
+            "reasoning": reasoning_text,
+            "window_scores": classified["window_scores"],
         }
 
         return jsonable_encoder(response_content)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing case prediction: {str(e)}")
         return JSONResponse(status_code=500, content={"detail": str(e)})
+
+
+async def _generate_reasoning(query: str, label: str) -> str:
+    reasoning_prompt = build_reasoning_prompt(query, label)
+
+    # Uncomment this once Huggingface Inference Pro is Restored
+    # reasoning = llm_client.generate(
+    #     prompts=[reasoning_prompt],
+    #     max_new_tokens=1000,
+    #     temperature=0.2
+    # )
+    # reasoning_text = reasoning.generations[0][0].text.strip() if reasoning.generations else "No reasoning generated."
+    
+    # Comment this out once Huggingface Inference Pro is Restored
+    response = await gemini_model.generate_content_async(
+        reasoning_prompt,
+        generation_config=REASONING_GENERATION_CONFIG,
+    )
+    reasoning_text = response.text.strip() if response.text else NO_REASONING
+    logging.debug(f"Reasoning: {reasoning_text}")
+    return reasoning_text
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+# Streaming case prediction endpoint (SSE)
+@router.post("/stream")
+async def case_prediction_stream(query_data: CaseQuery, user=Depends(current_user)):
+    """
+    Same prediction as `/`, streamed as server-sent events:
+      data: {"prediction": 1, "confidence": 87.5, "window_scores": null}   as soon as the classifier is done
+      data: {"reasoning": "..."}                                           one event per generated chunk
+      data: {"done": true}
+    A failure after the stream started is sent as data: {"error": "..."}.
+    """
+    _validate_query(query_data)
+    # a model that cannot load is a 503, not an error event inside a 200 stream
+    await _get_predictor()
+
+    async def event_stream():
+        try:
+            key, classified = await _classify_cached(query_data)
+            yield _sse(classified)
+
+            label = "accepted" if classified["prediction"] == 1 else "rejected"
+            reasoning_key = reasoning_digest(key, REASONING_PROMPT_VERSION, label)
+            cached_reasoning = await cache_get("reasoning", reasoning_key)
+            if cached_reasoning is not None:
+                yield _sse({"reasoning": cached_reasoning})
+                yield _sse({"done": True})
+                return
+
+            response = await gemini_model.generate_content_async(
+                build_reasoning_prompt(query_data.query, label),
+                generation_config=REASONING_GENERATION_CONFIG,
+                stream=True,
+            )
+            parts = []
+            async for chunk in response:
+                text = getattr(chunk, "text", "")
+                if text:
+                    parts.append(text)
+                    yield _sse({"reasoning": text})
+            # only complete reasoning is cached
+            if parts:
+                await cache_put("reasoning", reasoning_key, "".join(parts).strip())
+            yield _sse({"done": True})
+        except Exception as e:
+            logger.error(f"Error streaming case prediction: {str(e)}")
+            yield _sse({"error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Batch case prediction endpoint (classifier only, no reasoning)
+@router.post("/batch", response_model=BatchPredictionResult)
+async def case_prediction_batch(batch_data: CaseBatchQuery, user=Depends(current_user)):
+    if len(batch_data.queries) > CASE_PREDICTION_MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {CASE_PREDICTION_MAX_BATCH_QUERIES} queries can be predicted at once",
+        )
+    await _get_predictor()
+    outputs = await batcher.submit_many(batch_data.queries)
+    return {"results": [output._asdict() for output in outputs]}
+
+
+# Prediction cache counters
+@router.get("/cache/stats")
+async def case_prediction_cache_stats(user=Depends(current_user)):
+    return await cache_stats()
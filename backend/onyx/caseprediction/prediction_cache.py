@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for case predictions.
+
+Entries live in Redis under `caseprediction:cache:*`:
+  prediction:{digest}   classifier output   digest = hash(normalized facts, model revision, mode)
+  reasoning:{digest}    generated reasoning  digest = hash(prediction digest, prompt version, label)
+with a TTL and an LRU index capped at CASE_PREDICTION_CACHE_MAX_ENTRIES. Every Redis error
+fails open (the prediction is just computed).
+
+With CASE_PREDICTION_CACHE_SEMANTIC, facts that miss the exact key are embedded and matched
+against the recently cached ones (cosine >= CASE_PREDICTION_CACHE_SIMILARITY), so lightly
+edited resubmissions reuse the earlier entry. The facts are embedded by the model server;
+the index is kept per process.
+
+Hits and misses are counted once per prediction request (`record_lookup`), not per lookup.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from onyx.caseprediction.inference_config import (
+    CASE_PREDICTION_CACHE_EMBEDDING_MODEL,
+    CASE_PREDICTION_CACHE_ENABLED,
+    CASE_PREDICTION_CACHE_MAX_ENTRIES,
+    CASE_PREDICTION_CACHE_SEMANTIC,
+    CASE_PREDICTION_CACHE_SEMANTIC_MAX,
+    CASE_PREDICTION_CACHE_SIMILARITY,
+    CASE_PREDICTION_CACHE_TTL,
+)
+from onyx.redis.redis_pool import get_async_redis_connection
+from onyx.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from onyx.natural_language_processing.chroma_embedding import ModelServerEmbeddingFunction
+
+logger = setup_logger()
+
+# Keys are namespaced explicitly: the cached data is shared across tenants/workers
+_PREFIX = "caseprediction:cache"
+_LRU_KEY = f"{_PREFIX}:lru"          # zset: entry key -> last access time
+_HITS_KEY = f"{_PREFIX}:hits"
+_MISSES_KEY = f"{_PREFIX}:misses"
+
+
+def normalize_facts(query: str) -> str:
+    # case/whitespace variants of the same facts share an entry
+    return " ".join((query or "").split()).lower()
+
+
+def digest(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def prediction_digest(query: str, model_revision: str, mode: Any) -> str:
+    return digest("prediction", normalize_facts(query), model_revision, mode)
+
+
+def reasoning_digest(prediction_key: str, prompt_version: str, label: str) -> str:
+    return digest("reasoning", prediction_key, prompt_version, label)
+
+
+def _entry_key(kind: str, key: str) -> str:
+    return f"{_PREFIX}:{kind}:{key}"
+
+
+async def cache_get(kind: str, key: str) -> Optional[Any]:
+    if not CASE_PREDICTION_CACHE_ENABLED:
+        return None
+    entry_key = _entry_key(kind, key)
+    try:
+        r = await get_async_redis_connection()
+        raw = await r.get(entry_key)
+        if raw is not None:
+            await r.zadd(_LRU_KEY, {entry_key: time.time()})
+    except Exception as e:
+        logger.warning(f"case prediction cache unavailable: {e}")
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def record_lookup(hit: bool) -> None:
+    """Counts one prediction request as a cache hit or miss, for cache_stats."""
+    if not CASE_PREDICTION_CACHE_ENABLED:
+        return
+    try:
+        r = await get_async_redis_connection()
+        await r.incr(_HITS_KEY if hit else _MISSES_KEY)
+    except Exception:
+        pass
+
+
+async def cache_put(kind: str, key: str, value: Any) -> None:
+    if not CASE_PREDICTION_CACHE_ENABLED:
+        return
+    entry_key = _entry_key(kind, key)
+    try:
+        r = await get_async_redis_connection()
+        pipe = r.pipeline(transaction=False)
+        pipe.set(entry_key, json.dumps(value), ex=CASE_PREDICTION_CACHE_TTL)
+        pipe.zadd(_LRU_KEY, {entry_key: time.time()})
+        # entries that expired by TTL are dropped from the LRU index too
+        pipe.zremrangebyscore(_LRU_KEY, "-inf", time.time() - CASE_PREDICTION_CACHE_TTL)
+        pipe.zcard(_LRU_KEY)
+        *_, size = await pipe.execute()
+        excess = size - CASE_PREDICTION_CACHE_MAX_ENTRIES
+        if excess > 0:
+            victims = [k for k, _ in await r.zpopmin(_LRU_KEY, excess)]
+            if victims:
+                await r.delete(*victims)
+    except Exception as e:
+        logger.warning(f"case prediction cache write failed: {e}")
+
+
+class _SimilarityIndex:
+    """Normalized embeddings of recently cached facts -> prediction digest (FIFO, bounded)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Tuple[Any, str]] = []   # (mode, prediction digest)
+        self._embedder: Optional["ModelServerEmbeddingFunction"] = None
+
+    def embed(self, text: str) -> np.ndarray:
+        if self._embedder is None:
+            # imports chromadb and the tokenizer, so only once the near-duplicate lookup runs
+            from onyx.natural_language_processing.chroma_embedding import ModelServerEmbeddingFunction
+
+            self._embedder = ModelServerEmbeddingFunction(CASE_PREDICTION_CACHE_EMBEDDING_MODEL)
+        (vector,) = self._embedder.embed_query([normalize_facts(text)])
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def add(self, vector: np.ndarray, mode: Any, key: str) -> None:
+        with self._lock:
+            rows = vector[None, :] if self._vectors is None else np.vstack([self._vectors, vector])
+            self._entries.append((mode, key))
+            self._vectors = rows[-self._max_entries:]
+            self._entries = self._entries[-self._max_entries:]
+
+    def nearest(self, vector: np.ndarray, mode: Any, threshold: float) -> Optional[str]:
+        with self._lock:
+            if self._vectors is None:
+                return None
+            scores = self._vectors @ vector
+            entries = list(self._entries)
+        for i in np.argsort(-scores):
+            if scores[i] < threshold:
+                return None
+            if entries[i][0] == mode:
+                return entries[i][1]
+        return None
+
+
+_similar = _SimilarityIndex(CASE_PREDICTION_CACHE_SEMANTIC_MAX)
+
+
+async def find_similar(query: str, mode: Any) -> Tuple[Optional[str], Optional[np.ndarray]]:
+    """(digest of a near-duplicate cached prediction or None, embedding of `query` to reuse on put)."""
+    if not (CASE_PREDICTION_CACHE_ENABLED and CASE_PREDICTION_CACHE_SEMANTIC):
+        return None, None
+    try:
+        vector = await asyncio.to_thread(_similar.embed, query)
+    except Exception as e:
+        logger.warning(f"case prediction similarity lookup unavailable: {e}")
+        return None, None
+    return _similar.nearest(vector, mode, CASE_PREDICTION_CACHE_SIMILARITY), vector
+
+
+def remember_similar(vector: Optional[np.ndarray], mode: Any, key: str) -> None:
+    if vector is not None:
+        _similar.add(vector, mode, key)
+
+
+async def cache_stats() -> dict:
+    try:
+        r = await get_async_redis_connection()
+        hits, misses = (int(v or 0) for v in await r.mget([_HITS_KEY, _MISSES_KEY]))
+        entries = await r.zcard(_LRU_KEY)
+    except Exception as e:
+        return {"enabled": CASE_PREDICTION_CACHE_ENABLED, "error": str(e)}
+    total = hits + misses
+    return {
+        "enabled": CASE_PREDICTION_CACHE_ENABLED,
+        "semantic": CASE_PREDICTION_CACHE_SEMANTIC,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "entries": entries,
+        "max_entries": CASE_PREDICTION_CACHE_MAX_ENTRIES,
+        "ttl_seconds": CASE_PREDICTION_CACHE_TTL,
+    }
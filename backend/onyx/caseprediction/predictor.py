@@ -0,0 +1,309 @@
+"""
+Accept/reject classifier behind /caseprediction.
+
+`CasePredictor` wraps the tokenizer and a forward-pass backend (torch or ONNX Runtime,
+optionally int8) and scores a list of texts as one padded batch. `MicroBatcher` feeds it from
+the event loop: concurrent requests are collected for a few ms and run together on a single
+dedicated worker thread, so the loop never blocks on a forward pass and CPU throughput grows
+with the number of concurrent users.
+
+Inputs longer than the model's max_length can be scored with `predict_long`: the facts are
+split into overlapping token windows, run as one padded batch, and the window logits are
+aggregated (mean / max / attention-weighted).
+"""
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from onyx.caseprediction.inference_config import (
+    CASE_PREDICTION_BACKEND,
+    CASE_PREDICTION_BATCH_WAIT_MS,
+    CASE_PREDICTION_FAST_TOKENIZER,
+    CASE_PREDICTION_MAX_BATCH_SIZE,
+    CASE_PREDICTION_MAX_LENGTH,
+    CASE_PREDICTION_MAX_WINDOWS,
+    CASE_PREDICTION_MODEL_PATH,
+    CASE_PREDICTION_MODEL_REVISION,
+    CASE_PREDICTION_NUM_THREADS,
+    CASE_PREDICTION_ONNX_PATH,
+    CASE_PREDICTION_QUANTIZE,
+    CASE_PREDICTION_WINDOW_AGGREGATION,
+    CASE_PREDICTION_WINDOW_STRIDE,
+)
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class ClassifierOutput(NamedTuple):
+    prediction: int     # 1 = accepted, 0 = rejected
+    confidence: float   # probability of the predicted class, in percent
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def to_output(probabilities: np.ndarray) -> ClassifierOutput:
+    prediction = int(np.argmax(probabilities))
+    return ClassifierOutput(prediction, round(float(probabilities[prediction]) * 100, 2))
+
+
+AGGREGATIONS = ("mean", "max", "attention")
+
+
+def aggregate_logits(logits: np.ndarray, method: str) -> np.ndarray:
+    """Combine per-window logits [windows, classes] into one row of logits."""
+    if method == "mean":
+        return logits.mean(axis=0)
+    if method == "max":
+        return logits.max(axis=0)
+    if method == "attention":
+        # windows weigh in by how decisive they are (log-probability of their own top class)
+        weights = softmax(np.log(softmax(logits)).max(axis=-1))
+        return (weights[:, None] * logits).sum(axis=0)
+    raise ValueError(f"Unknown aggregation: {method}")
+
+
+def window_spans(n_tokens: int, size: int, stride: int, max_windows: int) -> List[Tuple[int, int]]:
+    """[start, end) token spans of `size` overlapping by `stride`; at most `max_windows`, evenly spaced."""
+    step = max(1, size - stride)
+    spans = []
+    start = 0
+    while True:
+        end = min(start + size, n_tokens)
+        spans.append((start, end))
+        if end >= n_tokens:
+            break
+        start += step
+    if len(spans) > max_windows:
+        keep = sorted(set(np.linspace(0, len(spans) - 1, max_windows).round().astype(int).tolist()))
+        spans = [spans[i] for i in keep]
+    return spans
+
+
+class _TorchBackend:
+    def __init__(self, model_path: str, config: Any, quantize: bool, num_threads: int) -> None:
+        import torch  # type: ignore
+        from transformers import AutoModelForSequenceClassification  # type: ignore
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path, config=config, local_files_only=True)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self._torch = torch
+        self.model = model
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        torch = self._torch
+        with torch.inference_mode():
+            outputs = self.model(**{k: torch.from_numpy(v) for k, v in encoded.items()})
+        return outputs.logits.float().numpy()
+
+
+class _OnnxBackend:
+    def __init__(self, onnx_path: str, quantize: bool, num_threads: int) -> None:
+        try:
+            import onnxruntime as ort  # type: ignore
+        except ImportError:
+            raise RuntimeError("CASE_PREDICTION_BACKEND=onnx requires the onnxruntime package")
+
+        if quantize:
+            onnx_path = int8_onnx_path(onnx_path)
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"{onnx_path} is missing; run `python -m onyx.caseprediction.export_onnx` first"
+            )
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0]
+
+
+def int8_onnx_path(onnx_path: str) -> str:
+    root, ext = os.path.splitext(onnx_path)
+    return f"{root}.int8{ext}"
+
+
+def model_revision(model_path: str, backend: str, quantize: bool) -> str:
+    """CASE_PREDICTION_MODEL_REVISION, or a fingerprint of the model files (name, size, mtime) and backend."""
+    if CASE_PREDICTION_MODEL_REVISION:
+        return CASE_PREDICTION_MODEL_REVISION
+    h = hashlib.sha1(f"{backend}:{quantize}".encode("utf-8"))
+    for name in sorted(os.listdir(model_path)):
+        path = os.path.join(model_path, name)
+        if os.path.isfile(path):
+            st = os.stat(path)
+            h.update(f"{name}:{st.st_size}:{int(st.st_mtime)}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def load_tokenizer(model_path: str, config: Any) -> Any:
+    from transformers import AutoTokenizer  # type: ignore
+
+    if CASE_PREDICTION_FAST_TOKENIZER:
+        try:
+            return AutoTokenizer.from_pretrained(model_path, config=config, local_files_only=True, use_fast=True)
+        except Exception as e:
+            logger.warning(f"Fast tokenizer unavailable for {model_path}, using the slow one: {e}")
+    return AutoTokenizer.from_pretrained(model_path, config=config, local_files_only=True, use_fast=False)
+
+
+class CasePredictor:
+    def __init__(
+        self,
+        model_path: str = CASE_PREDICTION_MODEL_PATH,
+        backend: str = CASE_PREDICTION_BACKEND,
+        quantize: bool = CASE_PREDICTION_QUANTIZE,
+        num_threads: int = CASE_PREDICTION_NUM_THREADS,
+        max_length: int = CASE_PREDICTION_MAX_LENGTH,
+    ) -> None:
+        if not os.path.exists(os.path.join(model_path, "config.json")):
+            raise FileNotFoundError(f"config.json is missing in {model_path}")
+
+        # transformers is imported here, not at module level, so importing the router stays cheap
+        from transformers import AutoConfig  # type: ignore
+
+        config = AutoConfig.from_pretrained(model_path)
+        self.tokenizer = load_tokenizer(model_path, config)
+        if backend == "onnx":
+            self.backend: Any = _OnnxBackend(CASE_PREDICTION_ONNX_PATH, quantize, num_threads)
+        elif backend == "torch":
+            self.backend = _TorchBackend(model_path, config, quantize, num_threads)
+        else:
+            raise ValueError(f"Unknown CASE_PREDICTION_BACKEND: {backend}")
+        self.max_length = max_length
+        self.revision = model_revision(model_path, backend, quantize)
+        logger.info(f"Case prediction model loaded from {model_path} (backend={backend}, int8={quantize})")
+
+    def encode(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        # padded to the longest text of the batch, not to max_length
+        return dict(self.tokenizer(
+            texts, return_tensors="np", padding=True, truncation=True, max_length=self.max_length,
+        ))
+
+    def predict_batch(self, texts: List[str]) -> List[ClassifierOutput]:
+        if not texts:
+            return []
+        probabilities = softmax(self.backend.logits(self.encode(texts)))
+        return [to_output(p) for p in probabilities]
+
+    def predict_long(
+        self,
+        text: str,
+        aggregation: str = CASE_PREDICTION_WINDOW_AGGREGATION,
+        stride: int = CASE_PREDICTION_WINDOW_STRIDE,
+        max_windows: int = CASE_PREDICTION_MAX_WINDOWS,
+    ) -> Tuple[ClassifierOutput, List[Dict[str, Any]]]:
+        """
+        Prediction over the whole text instead of its first max_length tokens, plus the
+        score of every window ({start_token, end_token, prediction, confidence}).
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+        ids = self.tokenizer(text, add_special_tokens=False)["input_ids"]
+        size = self.max_length - self.tokenizer.num_special_tokens_to_add()
+        spans = window_spans(len(ids), size, min(stride, size - 1), max_windows)
+
+        features = [self.tokenizer.prepare_for_model(ids[s:e], add_special_tokens=True) for s, e in spans]
+        logits = self.backend.logits(dict(self.tokenizer.pad(features, return_tensors="np")))
+
+        windows = [
+            {"start_token": s, "end_token": e, **to_output(p)._asdict()}
+            for (s, e), p in zip(spans, softmax(logits))
+        ]
+        return to_output(softmax(aggregate_logits(logits, aggregation))), windows
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a blocking `predict_fn(texts) -> results`.
+
+    The first queued request opens a batch; it is run once `max_batch_size` requests are
+    collected or `max_wait_ms` has passed. Batches run one at a time on a dedicated thread;
+    requests arriving meanwhile form the next batch.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[str]], List[Any]],
+        max_batch_size: int = CASE_PREDICTION_MAX_BATCH_SIZE,
+        max_wait_ms: float = CASE_PREDICTION_BATCH_WAIT_MS,
+    ) -> None:
+        self._predict_fn = predict_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max_wait_ms / 1000
+        self._queue: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="caseprediction")
+
+    def _ensure_worker(self) -> "asyncio.Queue[Tuple[str, asyncio.Future]]":
+        # bound lazily to the running loop
+        if self._queue is None or self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, text: str) -> Any:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((text, future))
+        return await future
+
+    async def submit_many(self, texts: List[str]) -> List[Any]:
+        return list(await asyncio.gather(*(self.submit(t) for t in texts)))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn` on the worker thread, serialized with the micro-batches (e.g. a windowed batch)."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _collect(self, queue: "asyncio.Queue[Tuple[str, asyncio.Future]]") -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await queue.get()]
+        deadline = loop.time() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: "asyncio.Queue[Tuple[str, asyncio.Future]]") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(queue)
+            # requests whose client went away are dropped before the forward pass
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(self._executor, self._predict_fn, [t for t, _ in batch])
+            except Exception as e:
+                logger.exception("Case prediction batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -3,7 +3,7 @@
 # import sys
 
 # # Set up the base URL for the case prediction API
-# api_url = "http://54.79.231.211:8006/caseprediction"
+# api_url = "http://54.79.231.211:8006/caseprediction/stream"
 
 # # Define the query for the case prediction
 # query_data = {
@@ -527,6 +527,17 @@ MINI_CHUNK_SIZE = 150
 # This is the number of regular chunks per large chunk
 LARGE_CHUNK_RATIO = 4
 
+# Tokenize each section once and derive chunk, blurb and mini-chunk boundaries from its
+# tokens instead of running a sentence splitter (and tokenizer pass) for each of them.
+# Boundaries differ slightly from the default splitter, so re-index to apply it everywhere.
+CHUNKER_SINGLE_PASS_TOKENIZATION = (
+    os.environ.get("CHUNKER_SINGLE_PASS_TOKENIZATION", "").lower() == "true"
+)
+
+# Number of worker processes that chunk large indexing batches in parallel (documents are
+# split between them by size). 0 or 1 chunks in the indexing process itself.
+CHUNKER_NUM_PROCESSES = int(os.environ.get("CHUNKER_NUM_PROCESSES") or 0)
+
 # Include the document level metadata in each chunk. If the metadata is too long, then it is thrown out
 # We don't want the metadata to overwhelm the actual contents of the chunk
 SKIP_METADATA_IN_CHUNK = os.environ.get("SKIP_METADATA_IN_CHUNK", "").lower() == "true"
@@ -550,6 +561,22 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 1
 )
 
+# Number of connector batches fetched ahead while the current batch is being chunked,
+# embedded and written, so the connector and the indexing pipeline work at the same time.
+# 0 fetches each batch only once the previous one has been indexed.
+INDEXING_PREFETCH_BATCHES = int(os.environ.get("INDEXING_PREFETCH_BATCHES", "2"))
+
+# Passage embeddings cached in Redis by content hash, so re-indexing documents whose text
+# did not change skips the embedding model. Bounded to this many entries per tenant (least
+# recently used are evicted first, ~3KB each for a 768-dim model, so 10000 is ~30MB of the
+# shared Redis); 0 (the default) disables the cache.
+INDEXING_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("INDEXING_EMBEDDING_CACHE_MAX_ENTRIES") or 0
+)
+INDEXING_EMBEDDING_CACHE_TTL = int(
+    os.environ.get("INDEXING_EMBEDDING_CACHE_TTL") or 7 * 24 * 60 * 60
+)
+
 # During an indexing attempt, specifies the number of batches which are allowed to
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
@@ -746,3 +773,11 @@ IMAGE_ANALYSIS_SYSTEM_PROMPT = os.environ.get(
 DISABLE_AUTO_AUTH_REFRESH = (
     os.environ.get("DISABLE_AUTO_AUTH_REFRESH", "").lower() == "true"
 )
+
+# Heavy optional features (caseprediction, docgen) load their models/clients on first use.
+# List any that should instead be warmed in the background at startup, e.g. "caseprediction,docgen"
+WARM_FEATURES_ON_STARTUP = [
+    feature.strip()
+    for feature in os.environ.get("WARM_FEATURES_ON_STARTUP", "").split(",")
+    if feature.strip()
+]
@@ -316,6 +316,7 @@ class OnyxCeleryQueues:
     CONNECTOR_DOC_PERMISSIONS_SYNC = "connector_doc_permissions_sync"
     CONNECTOR_EXTERNAL_GROUP_SYNC = "connector_external_group_sync"
     CSV_GENERATION = "csv_generation"
+    DEEPSEARCH = "deepsearch"
 
     # Indexing queue
     CONNECTOR_INDEXING = "connector_indexing"
@@ -456,6 +457,8 @@ class OnyxCeleryTask:
     EXPORT_QUERY_HISTORY_TASK = "export_query_history_task"
     EXPORT_QUERY_HISTORY_CLEANUP_TASK = "export_query_history_cleanup_task"
 
+    DEEPSEARCH_JOB_TASK = "deepsearch_job_task"
+
 
 # this needs to correspond to the matching entry in supervisord
 ONYX_CELERY_BEAT_HEARTBEAT_KEY = "onyx:celery:beat:heartbeat"
@@ -0,0 +1,35 @@
+import os
+
+# ========= Job queue =========
+# Deep search jobs run on the `deepsearch` Celery queue (consumed by its own deepsearch worker);
+# job state, progress events and results live in Redis under `deepsearch:*`.
+
+# Hard limit for one STORM run, enforced by the job task itself; a job still active after
+# this is considered dead and no longer counts against the limits below
+DEEPSEARCH_JOB_TIMEOUT = int(os.environ.get("DEEPSEARCH_JOB_TIMEOUT") or 60 * 60)
+
+# How long status, events and the result of a finished job stay fetchable
+DEEPSEARCH_RESULT_TTL = int(os.environ.get("DEEPSEARCH_RESULT_TTL") or 24 * 60 * 60)
+
+# Admission limits, counted over pending + running jobs across all workers.
+# Submissions past either limit are rejected with 429.
+DEEPSEARCH_MAX_ACTIVE_JOBS = int(os.environ.get("DEEPSEARCH_MAX_ACTIVE_JOBS") or 20)
+DEEPSEARCH_MAX_JOBS_PER_USER = int(os.environ.get("DEEPSEARCH_MAX_JOBS_PER_USER") or 3)
+
+# ========= Results =========
+# Also keep every completed result in the file store (FileOrigin.GENERATED_REPORT,
+# "deepsearch_<job_id>.json"), beyond the Redis TTL
+DEEPSEARCH_PERSIST_RESULTS = (
+    os.environ.get("DEEPSEARCH_PERSIST_RESULTS", "").lower() == "true"
+)
+
+# ========= Pipeline =========
+# Threads per job for STORM's parallel stages (perspective conversations during research,
+# section writing); 1 runs them sequentially. Defaults to STORM's own default of 10: the
+# stages already run concurrently there, what shortens a job is the search cache below.
+DEEPSEARCH_MAX_THREADS = int(os.environ.get("DEEPSEARCH_MAX_THREADS") or 10)
+
+# Shared SearXNG result cache (see search_cache.py); 0 disables it
+DEEPSEARCH_SEARCH_CACHE_TTL = int(
+    os.environ.get("DEEPSEARCH_SEARCH_CACHE_TTL") or 6 * 60 * 60
+)
@@ -0,0 +1,193 @@
+"""
+Redis-backed state of deep search jobs, shared by the API servers and the Celery workers.
+
+  deepsearch:job:{id}          hash: status, stage, query, user_id, timestamps, error
+  deepsearch:job:{id}:events   list of JSON progress events, in order
+  deepsearch:job:{id}:result   hash: result part (article, outline, ...) -> JSON
+  deepsearch:active            zset of pending/running job ids (score: submit/start time)
+  deepsearch:active:{user}     same, per user
+
+Job ids are uuid4s, so the keys are not tenant-prefixed (raw client). Finished jobs keep
+their keys for DEEPSEARCH_RESULT_TTL.
+"""
+import json
+import time
+from typing import Any
+
+from redis import asyncio as aioredis
+from redis import Redis
+
+from onyx.deepsearch_backend.config import DEEPSEARCH_JOB_TIMEOUT
+from onyx.deepsearch_backend.config import DEEPSEARCH_MAX_ACTIVE_JOBS
+from onyx.deepsearch_backend.config import DEEPSEARCH_MAX_JOBS_PER_USER
+from onyx.deepsearch_backend.config import DEEPSEARCH_RESULT_TTL
+
+_PREFIX = "deepsearch"
+_ACTIVE_KEY = f"{_PREFIX}:active"
+_ADMIT_LOCK = f"{_PREFIX}:admit_lock"
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+ERROR = "error"
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+def _job_key(job_id: str) -> str:
+    return f"{_PREFIX}:job:{job_id}"
+
+
+def _events_key(job_id: str) -> str:
+    return f"{_PREFIX}:job:{job_id}:events"
+
+
+def _result_key(job_id: str) -> str:
+    return f"{_PREFIX}:job:{job_id}:result"
+
+
+def _user_active_key(user_id: str) -> str:
+    return f"{_PREFIX}:active:{user_id}"
+
+
+def _decode(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _active_count(r: Redis, key: str, now: float) -> int:
+    # jobs active for longer than the job timeout died with their worker
+    r.zremrangebyscore(key, "-inf", now - DEEPSEARCH_JOB_TIMEOUT)
+    return int(r.zcard(key))
+
+
+def create_job(r: Redis, job_id: str, query: str, user_id: str) -> None:
+    """Registers a pending job, or raises JobLimitExceeded if either admission limit is hit."""
+    now = time.time()
+    with r.lock(_ADMIT_LOCK, timeout=10, blocking_timeout=10):
+        if _active_count(r, _ACTIVE_KEY, now) >= DEEPSEARCH_MAX_ACTIVE_JOBS:
+            raise JobLimitExceeded(
+                "Too many deep search jobs are running, please try again later"
+            )
+        if _active_count(r, _user_active_key(user_id), now) >= DEEPSEARCH_MAX_JOBS_PER_USER:
+            raise JobLimitExceeded(
+                f"At most {DEEPSEARCH_MAX_JOBS_PER_USER} deep search jobs can run at once"
+            )
+
+        pipe = r.pipeline(transaction=True)
+        pipe.hset(
+            _job_key(job_id),
+            mapping={
+                "status": PENDING,
+                "stage": "queued",
+                "query": query,
+                "user_id": user_id,
+                "submitted_at": now,
+            },
+        )
+        # a job that never finishes still disappears eventually
+        pipe.expire(_job_key(job_id), DEEPSEARCH_JOB_TIMEOUT + DEEPSEARCH_RESULT_TTL)
+        pipe.zadd(_ACTIVE_KEY, {job_id: now})
+        pipe.zadd(_user_active_key(user_id), {job_id: now})
+        pipe.expire(_user_active_key(user_id), DEEPSEARCH_JOB_TIMEOUT)
+        pipe.execute()
+    add_event(r, job_id, "queued")
+
+
+def mark_running(r: Redis, job_id: str) -> bool:
+    """False if the job is unknown (expired) or already finished."""
+    status = _decode(r.hget(_job_key(job_id), "status"))
+    if status not in (PENDING, RUNNING):
+        return False
+    now = time.time()
+    user_id = _decode(r.hget(_job_key(job_id), "user_id"))
+    pipe = r.pipeline(transaction=True)
+    pipe.hset(_job_key(job_id), mapping={"status": RUNNING, "started_at": now})
+    # the timeout counts from the start, not from the submission
+    pipe.zadd(_ACTIVE_KEY, {job_id: now})
+    pipe.zadd(_user_active_key(user_id), {job_id: now})
+    pipe.execute()
+    add_event(r, job_id, "started")
+    return True
+
+
+def add_event(r: Redis, job_id: str, stage: str, **data: Any) -> None:
+    event = {"stage": stage, "ts": time.time(), **data}
+    pipe = r.pipeline(transaction=True)
+    pipe.rpush(_events_key(job_id), json.dumps(event))
+    pipe.expire(_events_key(job_id), DEEPSEARCH_JOB_TIMEOUT + DEEPSEARCH_RESULT_TTL)
+    pipe.hset(_job_key(job_id), "stage", stage)
+    pipe.execute()
+
+
+def finish_job(
+    r: Redis,
+    job_id: str,
+    result: dict[str, Any] | None = None,
+    error: str | None = None,
+) -> None:
+    user_id = _decode(r.hget(_job_key(job_id), "user_id"))
+    status = ERROR if error is not None else COMPLETED
+    add_event(r, job_id, status, **({"error": error} if error is not None else {}))
+
+    pipe = r.pipeline(transaction=True)
+    fields: dict[str, Any] = {"status": status, "finished_at": time.time()}
+    if error is not None:
+        fields["error"] = error
+    else:
+        # stored per part, so clients can fetch e.g. the article without the conversation log
+        pipe.hset(
+            _result_key(job_id),
+            mapping={part: json.dumps(value) for part, value in (result or {}).items()},
+        )
+        pipe.expire(_result_key(job_id), DEEPSEARCH_RESULT_TTL)
+    pipe.hset(_job_key(job_id), mapping=fields)
+    pipe.expire(_job_key(job_id), DEEPSEARCH_RESULT_TTL)
+    pipe.expire(_events_key(job_id), DEEPSEARCH_RESULT_TTL)
+    pipe.zrem(_ACTIVE_KEY, job_id)
+    if user_id:
+        pipe.zrem(_user_active_key(user_id), job_id)
+    pipe.execute()
+
+
+def get_job(r: Redis, job_id: str) -> dict[str, Any] | None:
+    raw = r.hgetall(_job_key(job_id))
+    if not raw:
+        return None
+    return {_decode(k): _decode(v) for k, v in raw.items()}
+
+
+def get_events(r: Redis, job_id: str, start: int = 0) -> list[dict[str, Any]]:
+    return [json.loads(e) for e in r.lrange(_events_key(job_id), start, -1)]
+
+
+def get_result(r: Redis, job_id: str) -> dict[str, Any] | None:
+    raw = r.hgetall(_result_key(job_id))
+    if not raw:
+        return None
+    return {_decode(part): json.loads(value) for part, value in raw.items()}
+
+
+def get_result_sizes(r: Redis, job_id: str) -> dict[str, int]:
+    """Part name -> size in bytes of its JSON."""
+    return {
+        _decode(part): len(value)
+        for part, value in r.hgetall(_result_key(job_id)).items()
+    }
+
+
+def get_result_part(r: Redis, job_id: str, part: str) -> tuple[bool, Any]:
+    """(found, value) of one part of a completed job's result."""
+    raw = r.hget(_result_key(job_id), part)
+    return (False, None) if raw is None else (True, json.loads(raw))
+
+
+async def aget_events(
+    r: aioredis.Redis, job_id: str, start: int = 0
+) -> list[dict[str, Any]]:
+    return [json.loads(e) for e in await r.lrange(_events_key(job_id), start, -1)]
+
+
+async def aget_status(r: aioredis.Redis, job_id: str) -> str | None:
+    return _decode(await r.hget(_job_key(job_id), "status"))
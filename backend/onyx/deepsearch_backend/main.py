@@ -1,240 +1,171 @@
-from fastapi import APIRouter, Request, Depends, BackgroundTasks # type: ignore
+from fastapi import APIRouter, Depends, Header # type: ignore
 from pydantic import BaseModel # type: ignore
-from typing import Any, Dict
-from fastapi.responses import JSONResponse # type: ignore
-from typing import Optional
+from fastapi.responses import JSONResponse, StreamingResponse # type: ignore
 
-from knowledge_storm import STORMWikiRunnerArguments, STORMWikiRunner, STORMWikiLMConfigs
-from knowledge_storm.lm import LitellmModel
-from knowledge_storm.rm import SearXNG
 from onyx.auth.users import current_user # type: ignore
-import os
+from onyx.background.celery.versioned_apps.client import app as client_app
+from onyx.configs.constants import OnyxCeleryPriority
+from onyx.configs.constants import OnyxCeleryQueues
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.db.engine import get_current_tenant_id
+from onyx.deepsearch_backend.job_state import aget_events
+from onyx.deepsearch_backend.job_state import aget_status
+from onyx.deepsearch_backend.job_state import COMPLETED
+from onyx.deepsearch_backend.job_state import create_job
+from onyx.deepsearch_backend.job_state import ERROR
+from onyx.deepsearch_backend.job_state import finish_job
+from onyx.deepsearch_backend.job_state import get_job
+from onyx.deepsearch_backend.job_state import get_result
+from onyx.deepsearch_backend.job_state import get_result_part
+from onyx.deepsearch_backend.job_state import get_result_sizes
+from onyx.deepsearch_backend.job_state import JobLimitExceeded
+from onyx.redis.redis_pool import get_async_redis_connection
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.logger import setup_logger
+from typing import Optional
+import asyncio
 import json
+import time
 import uuid
-import re
-
-# Load from env or fallback
-job_store: dict[str, dict[str, Any]] = {}
-SEARXNG_URL = os.getenv("SEARXNG_URL", "http://host.docker.internal:8087")
-
-# 1. Set up all language models using correct setter methods
-lm_configs = STORMWikiLMConfigs()
-
-conv_simulator_lm = LitellmModel(
-    model="gemini/gemini-2.0-flash",
-    api_key=os.getenv("LITELLM_API_KEY")
-)
-question_asker_lm = LitellmModel(
-    model="gemini/gemini-2.0-flash",
-    api_key=os.getenv("LITELLM_API_KEY")
-)
-outline_gen_lm = LitellmModel(
-    model="gemini/gemini-2.0-flash",
-    api_key=os.getenv("LITELLM_API_KEY")
-)
-article_gen_lm = LitellmModel(
-    model="gemini/gemini-2.0-flash",
-    api_key=os.getenv("LITELLM_API_KEY")
-)
-article_polish_lm = LitellmModel(
-    model="gemini/gemini-2.0-flash",
-    api_key=os.getenv("LITELLM_API_KEY")
-)
-
-# Set all LMs
-lm_configs.set_conv_simulator_lm(conv_simulator_lm)
-lm_configs.set_question_asker_lm(question_asker_lm)
-lm_configs.set_outline_gen_lm(outline_gen_lm)
-lm_configs.set_article_gen_lm(article_gen_lm)
-lm_configs.set_article_polish_lm(article_polish_lm)
-
-# 2. Runner args
-engine_args = STORMWikiRunnerArguments(
-    output_dir="./results/api_run",
-    max_conv_turn=3,
-    max_perspective=3,
-    search_top_k=3,
-    retrieve_top_k=5,
-)
-
-# 3. Retriever
-rm = SearXNG(
-    searxng_api_url=SEARXNG_URL,
-    k=engine_args.search_top_k,
-)
-
-# 4. Runner
-runner = STORMWikiRunner(engine_args, lm_configs, rm)
-
-def truncate_url(url: str, max_len: int = 100) -> str:
-    if len(url) <= max_len:
-        return url
-    return f"{url[:60]}...{url[-30:]}"
-
-
-def add_inline_citation_links(article_text: str, citations: dict) -> str:
-    """
-    Replace all inline URLs in the article with numbered [n] citations (no anchor tags),
-    and append a numbered Sources section with full URLs.
-    """
-    if not article_text or not citations:
-        return article_text or ""
-
-    # Strip any <a> tags that may have been injected previously
-    article_text = re.sub(r"</?a\b[^>]*>", "", article_text)
-
-    url_to_index = citations.get("url_to_unified_index", {})
-    url_to_info = citations.get("url_to_info", {})
-
-    # Sort URLs by index (as integers)
-    sorted_url_entries = sorted(url_to_index.items(), key=lambda x: int(x[1]))
-
-    # Build replacement map: raw_url -> [n]
-    raw_url_to_marker = {
-        url: f"[{idx}]"
-        for url, idx in sorted_url_entries
-    }
-
-    # Replace all raw URLs in the article with [n]
-    for raw_url, marker in raw_url_to_marker.items():
-        escaped_url = re.escape(raw_url)
-        article_text = re.sub(rf"(?<!href=\")(?<!\">)({escaped_url})", marker, article_text)
-
-    # Also ensure all [n] references are plain (no leftover anchors)
-    article_text = re.sub(r"<a[^>]*>\[(\d+)\]</a>", r"[\1]", article_text)
-
-    # Append plain Sources section
-    if sorted_url_entries:
-        sources = "\n".join(
-            f'{int(idx)}) {url_to_info[url]["url"]}'
-            for url, idx in sorted_url_entries
-            if url in url_to_info and "url" in url_to_info[url]
-        )
-        article_text += f"\n\n---\n\n**Sources:**\n\n{sources}"
-
-    return article_text
-
-# IMPORTANT
-
-# def add_inline_citation_links(article_text: str, citations: dict) -> str:
-#     """
-#     Replace [n] with the actual clickable URL if available,
-#     and wrap any remaining raw URLs in <a> tags.
-#     Removes all numbered references like [1], [2], etc.
-#     """
-#     if not article_text or not citations:
-#         return article_text or ""
-
-#     # Strip any pre-existing <a> tags cleanly
-#     article_text = re.sub(r"</?a\b[^>]*>", "", article_text)
-
-#     # Build index → URL mapping
-#     index_to_url = {
-#         int(idx): url
-#         for url, idx in citations.get("url_to_unified_index", {}).items()
-#     }
-
-#     # Replace [n] with <a href="url">url</a>
-#     def replace_with_link(match: re.Match[str]) -> str:
-#         idx = int(match.group(1))
-#         url = index_to_url.get(idx)
-#         return f'<a href="{url}" target="_blank">{url}</a>' if url else ""
-
-#     article_text = re.sub(r"\[(\d+)\]", replace_with_link, article_text)
-
-#     # Wrap any remaining raw URLs in <a> tags (in case some were in text directly)
-#     article_text = re.sub(
-#         r'(?<!href=")(?<!">)(https?://[^\s<>"\']+)',
-#         r'<a href="\1" target="_blank">\1</a>',
-#         article_text,
-#     )
-
-#     return article_text
-
-# def add_inline_citation_links(article_text: str, citations: dict) -> str:
-#     """
-#     Replaces [1], [2], ... in the article with HTML anchor tags linking to URLs.
-#     """
-#     if not article_text or not citations:
-#         return article_text or ""
-
-#     # Build index-to-url mapping
-#     citation_dict = {}
-#     for url, index in citations.get("url_to_unified_index", {}).items():
-#         citation_dict[index] = citations["url_to_info"][url]["url"]
-
-#     def replace_with_link(match):
-#         idx = int(match.group(1))
-#         url = citation_dict.get(idx, "#")
-#         return f'<a href="{url}" target="_blank">[{idx}]</a> '
-
-#     # Add space after each injected link to prevent clumping
-#     return re.sub(r"\[(\d+)\]", replace_with_link, article_text)
-
-# 5. Endpoint logic
-def run_deepsearch(query: str) -> dict:
-    try:
-        runner.run(topic=query)
-        topic_name = query.replace(" ", "_")
-        topic_dir = os.path.join(engine_args.output_dir, topic_name)
-
-        def safe_read(path, is_json=False):
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f) if is_json else f.read()
-            return None if is_json else ""
-
-        article_path = os.path.join(topic_dir, "storm_gen_article_polished.txt")
-        citations_path = os.path.join(topic_dir, "url_to_info.json")
-        conversation_log_path = os.path.join(topic_dir, "conversation_log.json")
-        outline_path = os.path.join(topic_dir, "storm_gen_outline.txt")
-
-        article_text = safe_read(article_path)
-        citations = safe_read(citations_path, is_json=True)
-        article_with_links = add_inline_citation_links(article_text, citations)
-
-        return {
-            "article": article_with_links,
-            "outline": safe_read(outline_path),
-            "citations": citations,
-            "conversation_log": safe_read(conversation_log_path, is_json=True),
-        }
-
-    except Exception as e:
-        return {"error": str(e)}
-    
-def background_deepsearch(query: str, job_id: str):
-    try:
-        result = run_deepsearch(query)
-        job_store[job_id] = {"status": "completed", "result": result}
-    except Exception as e:
-        job_store[job_id] = {"status": "error", "error": str(e)}
-    
+
+logger = setup_logger()
+
+# /events polls the job's event list at this interval, and sends a keep-alive comment
+# when nothing happened for EVENTS_KEEPALIVE_SECONDS
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_KEEPALIVE_SECONDS = 15
+
+# Jobs run on the `deepsearch` Celery queue (onyx/background/celery/tasks/deepsearch), so they
+# survive API restarts and any API worker can report on any job; state lives in Redis
+# (onyx/deepsearch_backend/job_state.py).
+
 class DeepSearchRequest(BaseModel):
     query: str
 
 router = APIRouter(prefix="/deepsearch", tags=["DeepSearch"])
 
-# @router.post("/")
-# async def deepsearch_handler(request: DeepSearchRequest, user=Depends(current_user)):
-#     return run_deepsearch(request.query)
+
+def _user_id(user) -> str:
+    return str(user.id) if user else "anonymous"
+
 
 @router.post("/submit")
-async def submit_deepsearch_job(request: DeepSearchRequest, background_tasks: BackgroundTasks, user=Depends(current_user)):
+def submit_deepsearch_job(
+    request: DeepSearchRequest,
+    user=Depends(current_user),
+    tenant_id: str = Depends(get_current_tenant_id),
+):
     job_id = str(uuid.uuid4())
-    job_store[job_id] = {"status": "pending"}
-    background_tasks.add_task(background_deepsearch, request.query, job_id)
+    r = get_raw_redis_client()
+    try:
+        create_job(r, job_id, request.query, _user_id(user))
+    except JobLimitExceeded as e:
+        return JSONResponse(status_code=429, content={"error": str(e)})
+
+    try:
+        client_app.send_task(
+            OnyxCeleryTask.DEEPSEARCH_JOB_TASK,
+            kwargs={"job_id": job_id, "query": request.query, "tenant_id": tenant_id},
+            queue=OnyxCeleryQueues.DEEPSEARCH,
+            priority=OnyxCeleryPriority.MEDIUM,
+            task_id=job_id,
+        )
+    except Exception:
+        logger.exception(f"Failed to queue deep search job {job_id}")
+        # frees the job's admission slots right away
+        finish_job(r, job_id, error="Failed to queue the job")
+        return JSONResponse(
+            status_code=503, content={"error": "Deep search is unavailable, try again later"}
+        )
     return {"job_id": job_id}
 
+def _owned_job(r, job_id: str, user):
+    job = get_job(r, job_id)
+    if not job or job.get("user_id") != _user_id(user):
+        return None
+    return job
+
+def _job_not_found() -> JSONResponse:
+    return JSONResponse(status_code=404, content={"error": "Job not found"})
+
 @router.get("/status/{job_id}")
-async def get_deepsearch_job_status(job_id: str, user=Depends(current_user)):
-    job = job_store.get(job_id)
+def get_deepsearch_job_status(job_id: str, user=Depends(current_user)):
+    r = get_raw_redis_client()
+    job = _owned_job(r, job_id, user)
     if not job:
-        return JSONResponse(status_code=404, content={"error": "Job not found"})
+        return _job_not_found()
 
-    if job["status"] == "completed":
-        return {"status": "completed", "result": job["result"]}
-    elif job["status"] == "error":
-        return {"status": "error", "error": job["error"]}
+    if job["status"] == COMPLETED:
+        return {"status": COMPLETED, "result": get_result(r, job_id)}
+    elif job["status"] == ERROR:
+        return {"status": ERROR, "error": job.get("error")}
     else:
-        return {"status": "pending"}
+        # pending | running
+        return {"status": job["status"], "stage": job.get("stage")}
+
+
+@router.get("/events/{job_id}")
+def stream_deepsearch_job_events(
+    job_id: str,
+    user=Depends(current_user),
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """
+    Server-sent events of the job's progress (stages listed in deepsearch_backend/progress.py):
+      id: <n>
+      data: {"stage": "section", "ts": ..., "title": "...", "content": "..."}
+    The stream ends after the `completed` or `error` event; the result is then available from
+    /result/{job_id}. Reconnecting clients resume after their Last-Event-ID.
+    """
+    if not _owned_job(get_raw_redis_client(), job_id, user):
+        return _job_not_found()
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        r = await get_async_redis_connection()
+        next_id = start
+        last_sent = time.monotonic()
+        while True:
+            events = await aget_events(r, job_id, next_id)
+            for event in events:
+                yield f"id: {next_id}\ndata: {json.dumps(event)}\n\n"
+                next_id += 1
+                if event["stage"] in (COMPLETED, ERROR):
+                    return
+            if events:
+                last_sent = time.monotonic()
+            elif await aget_status(r, job_id) is None:
+                # expired while we were listening
+                yield f"data: {json.dumps({'stage': ERROR, 'error': 'Job not found'})}\n\n"
+                return
+            elif time.monotonic() - last_sent > EVENTS_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/result/{job_id}")
+def get_deepsearch_result_parts(job_id: str, user=Depends(current_user)):
+    """Which parts of a completed job's result can be fetched, with their sizes in bytes."""
+    r = get_raw_redis_client()
+    job = _owned_job(r, job_id, user)
+    if not job or job["status"] != COMPLETED:
+        return _job_not_found()
+    return {"status": COMPLETED, "parts": get_result_sizes(r, job_id)}
+
+@router.get("/result/{job_id}/{part}")
+def get_deepsearch_result_part(job_id: str, part: str, user=Depends(current_user)):
+    """One part of a completed job's result: article | outline | citations | conversation_log."""
+    r = get_raw_redis_client()
+    job = _owned_job(r, job_id, user)
+    if not job or job["status"] != COMPLETED:
+        return _job_not_found()
+    found, value = get_result_part(r, job_id, part)
+    if not found:
+        return JSONResponse(status_code=404, content={"error": f"Unknown result part: {part}"})
+    return {"part": part, "content": value}
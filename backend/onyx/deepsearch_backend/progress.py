@@ -0,0 +1,67 @@
+"""
+Progress events of a deep search job, reported from inside the STORM pipeline.
+
+Stages, in order (see job_state for how they are stored and /deepsearch/events for the stream):
+  queued, started                       job lifecycle
+  perspectives                          {perspectives: [...]}
+  dialogue_turn                         {question, answer, search_queries}, one per turn
+  research_done
+  outline                               {outline}
+  section                               {title, content}, as each section is written
+  polished
+  completed | error                     {error} on failure
+"""
+from collections.abc import Callable
+from typing import Any
+
+EventCallback = Callable[..., None]  # (stage: str, **data)
+
+
+class JobProgressHandler:
+    """
+    STORM callback handler (the hooks of knowledge_storm's BaseCallbackHandler) turning pipeline
+    callbacks into job events. Hooks that are not handled here are no-ops.
+    """
+
+    def __init__(self, on_event: EventCallback) -> None:
+        self._on_event = on_event
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("on_"):
+            return lambda *args, **kwargs: None
+        raise AttributeError(name)
+
+    def on_identify_perspective_end(self, perspectives: list[str], **kwargs: Any) -> None:
+        self._on_event("perspectives", perspectives=list(perspectives))
+
+    def on_dialogue_turn_end(self, dlg_turn: Any, **kwargs: Any) -> None:
+        self._on_event(
+            "dialogue_turn",
+            question=getattr(dlg_turn, "user_utterance", ""),
+            answer=getattr(dlg_turn, "agent_utterance", ""),
+            search_queries=list(getattr(dlg_turn, "search_queries", None) or []),
+        )
+
+    def on_information_gathering_end(self, **kwargs: Any) -> None:
+        self._on_event("research_done")
+
+    def on_outline_refinement_end(self, outline: str, **kwargs: Any) -> None:
+        self._on_event("outline", outline=outline)
+
+
+def report_sections(article_generation_module: Any, on_event: EventCallback) -> None:
+    """Emits a `section` event as each section of the article is written (STORM has no hook for it)."""
+    generate_section = article_generation_module.generate_section
+
+    def generate_section_and_report(*args: Any, **kwargs: Any) -> Any:
+        section = generate_section(*args, **kwargs)
+        if isinstance(section, dict):
+            on_event(
+                "section",
+                title=section.get("section_name"),
+                content=section.get("section_content"),
+            )
+        return section
+
+    # generate_article calls self.generate_section, so the instance attribute takes over
+    article_generation_module.generate_section = generate_section_and_report
@@ -0,0 +1,96 @@
+"""
+Shared cache in front of the deep search retriever (SearXNG).
+
+Results are cached per (query, k) in Redis under `deepsearch:search:*` for
+DEEPSEARCH_SEARCH_CACHE_TTL, so identical sub-queries from concurrent perspectives, other
+jobs and other workers hit SearXNG once. Cached results are stored before `exclude_urls`
+filtering, which is applied per call. Every Redis error fails open (the search just runs).
+"""
+import hashlib
+import json
+from typing import Any
+
+from onyx.deepsearch_backend.config import DEEPSEARCH_SEARCH_CACHE_TTL
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+
+logger = setup_logger()
+
+_PREFIX = "deepsearch:search"
+
+
+def _cache_key(query: str, k: int) -> str:
+    normalized = " ".join(query.split()).lower()
+    digest = hashlib.sha256(f"{k}:{normalized}".encode("utf-8")).hexdigest()
+    return f"{_PREFIX}:{digest}"
+
+
+class CachedRetriever:
+    """
+    Wraps a knowledge_storm retriever (`rm(query_or_queries=..., exclude_urls=...)` returning
+    a list of {url, title, description, snippets} dicts). Misses of a multi-query call are
+    searched in parallel. Anything else is delegated to the wrapped retriever.
+    """
+
+    def __init__(self, rm: Any, redis_client: Any = None) -> None:
+        self._rm = rm
+        self._redis = redis_client
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "_rm":
+            raise AttributeError(name)
+        return getattr(self._rm, name)
+
+    def _r(self) -> Any:
+        if self._redis is None:
+            self._redis = get_raw_redis_client()
+        return self._redis
+
+    def _cached(self, key: str) -> list[dict[str, Any]] | None:
+        try:
+            raw = self._r().get(key)
+        except Exception as e:
+            logger.warning(f"deep search cache unavailable: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def _search(self, query: str, key: str) -> list[dict[str, Any]]:
+        results = self._rm.forward(query, exclude_urls=[])
+        # an empty list is usually a SearXNG error swallowed by the retriever, don't keep it
+        if results:
+            try:
+                self._r().set(key, json.dumps(results), ex=DEEPSEARCH_SEARCH_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"deep search cache write failed: {e}")
+        return results
+
+    def forward(
+        self, query_or_queries: str | list[str], exclude_urls: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        queries = (
+            [query_or_queries]
+            if isinstance(query_or_queries, str)
+            else list(query_or_queries)
+        )
+        k = getattr(self._rm, "k", 0)
+        keys = [_cache_key(query, k) for query in queries]
+        per_query = [self._cached(key) for key in keys]
+
+        misses = [i for i, results in enumerate(per_query) if results is None]
+        if misses:
+            searched = run_functions_tuples_in_parallel(
+                [(self._search, (queries[i], keys[i])) for i in misses]
+            )
+            for i, results in zip(misses, searched):
+                per_query[i] = results
+
+        excluded = set(exclude_urls or [])
+        return [
+            result
+            for results in per_query
+            for result in results or []
+            if result.get("url") not in excluded
+        ]
+
+    __call__ = forward
@@ -0,0 +1,253 @@
+"""
+STORM pipeline behind /deepsearch. Runs inside the Celery worker that consumes the
+`deepsearch` queue (see onyx/background/celery/tasks/deepsearch), never in the API server.
+
+Every job builds its own runner and drives the STORM modules directly, so the article,
+outline, citations and conversation log come back as in-memory objects: concurrent jobs
+(even on the same topic) share no state and nothing is written to or re-read from disk.
+"""
+import os
+import re
+from typing import Any
+
+from onyx.deepsearch_backend.config import DEEPSEARCH_MAX_THREADS
+from onyx.deepsearch_backend.config import DEEPSEARCH_SEARCH_CACHE_TTL
+from onyx.deepsearch_backend.progress import EventCallback
+from onyx.deepsearch_backend.progress import JobProgressHandler
+from onyx.deepsearch_backend.progress import report_sections
+from onyx.deepsearch_backend.search_cache import CachedRetriever
+
+# Load from env or fallback
+SEARXNG_URL = os.getenv("SEARXNG_URL", "http://host.docker.internal:8087")
+# Required by STORMWikiRunnerArguments; nothing is written there since the modules are
+# called directly instead of through STORMWikiRunner.run
+OUTPUT_DIR = "./results/api_run"
+
+def build_runner():
+    # knowledge_storm (dspy, litellm, ...) is only imported once deepsearch is first used
+    from knowledge_storm import STORMWikiRunnerArguments, STORMWikiRunner, STORMWikiLMConfigs
+    from knowledge_storm.lm import LitellmModel
+    from knowledge_storm.rm import SearXNG
+
+    # 1. Set up all language models using correct setter methods
+    lm_configs = STORMWikiLMConfigs()
+
+    conv_simulator_lm = LitellmModel(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.getenv("LITELLM_API_KEY")
+    )
+    question_asker_lm = LitellmModel(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.getenv("LITELLM_API_KEY")
+    )
+    outline_gen_lm = LitellmModel(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.getenv("LITELLM_API_KEY")
+    )
+    article_gen_lm = LitellmModel(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.getenv("LITELLM_API_KEY")
+    )
+    article_polish_lm = LitellmModel(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.getenv("LITELLM_API_KEY")
+    )
+
+    # Set all LMs
+    lm_configs.set_conv_simulator_lm(conv_simulator_lm)
+    lm_configs.set_question_asker_lm(question_asker_lm)
+    lm_configs.set_outline_gen_lm(outline_gen_lm)
+    lm_configs.set_article_gen_lm(article_gen_lm)
+    lm_configs.set_article_polish_lm(article_polish_lm)
+
+    # 2. Runner args
+    engine_args = STORMWikiRunnerArguments(
+        output_dir=OUTPUT_DIR,
+        max_conv_turn=3,
+        max_perspective=3,
+        search_top_k=3,
+        retrieve_top_k=5,
+        # perspective conversations (and later the sections) run concurrently
+        max_thread_num=DEEPSEARCH_MAX_THREADS,
+    )
+
+    # 3. Retriever, behind the shared search result cache
+    rm = SearXNG(
+        searxng_api_url=SEARXNG_URL,
+        k=engine_args.search_top_k,
+    )
+    if DEEPSEARCH_SEARCH_CACHE_TTL > 0:
+        rm = CachedRetriever(rm)
+
+    # 4. Runner
+    return STORMWikiRunner(engine_args, lm_configs, rm)
+
+
+def truncate_url(url: str, max_len: int = 100) -> str:
+    if len(url) <= max_len:
+        return url
+    return f"{url[:60]}...{url[-30:]}"
+
+
+def add_inline_citation_links(article_text: str, citations: dict) -> str:
+    """
+    Replace all inline URLs in the article with numbered [n] citations (no anchor tags),
+    and append a numbered Sources section with full URLs.
+    """
+    if not article_text or not citations:
+        return article_text or ""
+
+    # Strip any <a> tags that may have been injected previously
+    article_text = re.sub(r"</?a\b[^>]*>", "", article_text)
+
+    url_to_index = citations.get("url_to_unified_index", {})
+    url_to_info = citations.get("url_to_info", {})
+
+    # Sort URLs by index (as integers)
+    sorted_url_entries = sorted(url_to_index.items(), key=lambda x: int(x[1]))
+
+    # Build replacement map: raw_url -> [n]
+    raw_url_to_marker = {
+        url: f"[{idx}]"
+        for url, idx in sorted_url_entries
+    }
+
+    # Replace all raw URLs in the article with [n]
+    for raw_url, marker in raw_url_to_marker.items():
+        escaped_url = re.escape(raw_url)
+        article_text = re.sub(rf"(?<!href=\")(?<!\">)({escaped_url})", marker, article_text)
+
+    # Also ensure all [n] references are plain (no leftover anchors)
+    article_text = re.sub(r"<a[^>]*>\[(\d+)\]</a>", r"[\1]", article_text)
+
+    # Append plain Sources section
+    if sorted_url_entries:
+        sources = "\n".join(
+            f'{int(idx)}) {url_to_info[url]["url"]}'
+            for url, idx in sorted_url_entries
+            if url in url_to_info and "url" in url_to_info[url]
+        )
+        article_text += f"\n\n---\n\n**Sources:**\n\n{sources}"
+
+    return article_text
+
+# IMPORTANT
+
+# def add_inline_citation_links(article_text: str, citations: dict) -> str:
+#     """
+#     Replace [n] with the actual clickable URL if available,
+#     and wrap any remaining raw URLs in <a> tags.
+#     Removes all numbered references like [1], [2], etc.
+#     """
+#     if not article_text or not citations:
+#         return article_text or ""
+
+#     # Strip any pre-existing <a> tags cleanly
+#     article_text = re.sub(r"</?a\b[^>]*>", "", article_text)
+
+#     # Build index → URL mapping
+#     index_to_url = {
+#         int(idx): url
+#         for url, idx in citations.get("url_to_unified_index", {}).items()
+#     }
+
+#     # Replace [n] with <a href="url">url</a>
+#     def replace_with_link(match: re.Match[str]) -> str:
+#         idx = int(match.group(1))
+#         url = index_to_url.get(idx)
+#         return f'<a href="{url}" target="_blank">{url}</a>' if url else ""
+
+#     article_text = re.sub(r"\[(\d+)\]", replace_with_link, article_text)
+
+#     # Wrap any remaining raw URLs in <a> tags (in case some were in text directly)
+#     article_text = re.sub(
+#         r'(?<!href=")(?<!">)(https?://[^\s<>"\']+)',
+#         r'<a href="\1" target="_blank">\1</a>',
+#         article_text,
+#     )
+
+#     return article_text
+
+# def add_inline_citation_links(article_text: str, citations: dict) -> str:
+#     """
+#     Replaces [1], [2], ... in the article with HTML anchor tags linking to URLs.
+#     """
+#     if not article_text or not citations:
+#         return article_text or ""
+
+#     # Build index-to-url mapping
+#     citation_dict = {}
+#     for url, index in citations.get("url_to_unified_index", {}).items():
+#         citation_dict[index] = citations["url_to_info"][url]["url"]
+
+#     def replace_with_link(match):
+#         idx = int(match.group(1))
+#         url = citation_dict.get(idx, "#")
+#         return f'<a href="{url}" target="_blank">[{idx}]</a> '
+
+#     # Add space after each injected link to prevent clumping
+#     return re.sub(r"\[(\d+)\]", replace_with_link, article_text)
+
+# 5. Job logic
+def run_deepsearch(query: str, on_event: EventCallback | None = None) -> dict:
+    """
+    Runs the STORM stages (research, outline, article, polish) on a fresh runner and returns
+    {article, outline, citations, conversation_log}; raises on failure. `on_event(stage, **data)`
+    receives the progress events listed in progress.py.
+    """
+    runner = build_runner()
+    callback_handler: Any
+    if on_event is None:
+        from knowledge_storm.storm_wiki.modules.callback import BaseCallbackHandler
+
+        callback_handler = BaseCallbackHandler()
+    else:
+        callback_handler = JobProgressHandler(on_event)
+        report_sections(runner.storm_article_generation, on_event)
+
+    # Same stages as STORMWikiRunner.run, minus its per-stage dumps to output_dir
+    information_table, conversation_log = runner.storm_knowledge_curation_module.research(
+        topic=query,
+        ground_truth_url="",
+        callback_handler=callback_handler,
+        max_perspective=runner.args.max_perspective,
+        disable_perspective=False,
+        return_conversation_log=True,
+    )
+    outline = runner.storm_outline_generation_module.generate_outline(
+        topic=query,
+        information_table=information_table,
+        callback_handler=callback_handler,
+    )
+    draft_article = runner.storm_article_generation.generate_article(
+        topic=query,
+        information_table=information_table,
+        article_with_outline=outline,
+        callback_handler=callback_handler,
+    )
+    polished_article = runner.storm_article_polishing_module.polish_article(
+        topic=query,
+        draft_article=draft_article,
+        remove_duplicate=False,
+    )
+    if on_event is not None:
+        on_event("polished")
+
+    citations = _references(draft_article)
+    return {
+        "article": add_inline_citation_links(polished_article.to_string(), citations),
+        "outline": "\n".join(outline.get_outline_as_list(add_hashtags=True, include_root=False)),
+        "citations": citations,
+        "conversation_log": conversation_log,
+    }
+
+
+def _references(article: Any) -> dict:
+    # what StormArticle.dump_reference_to_file used to write to url_to_info.json
+    reference = article.reference
+    return {
+        "url_to_unified_index": dict(reference["url_to_unified_index"]),
+        "url_to_info": {
+            url: info.to_dict() for url, info in reference["url_to_info"].items()
+        },
+    }
@@ -4,8 +4,12 @@ from google.generativeai.types import GenerationConfig  # type: ignore
 import google.generativeai as genai  # type: ignore
 import os
 
+from onyx.utils.logger import setup_logger
+
 load_dotenv()
 
+logger = setup_logger()
+
 # Configure Gemini
 # Comment this out once Huggingface Inference Pro is Restored
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -24,20 +28,10 @@ gemini_model = genai.GenerativeModel(model_name="gemini-2.5-flash-lite-preview-0
 #     return model
 
 
-# def run_inference(prompt: str):
-#     """
-#     Run inference using the HuggingFace model.
-#     """
-#     client = get_model()
-#     print(f"Running inference with prompt: {prompt}")  # Debugging input
-#     output = client.text_generation(prompt=prompt, max_new_tokens=2048, temperature=0.1)
-#     print(f"Model output: {output}")  # Debugging output
-#     return output
-
-# Comment this out once Huggingface Inference Pro is Restored
-def run_inference(prompt: str):
-    print(f"Running inference with prompt: {prompt}")  # Debugging input
-    response = gemini_model.generate_content(
+async def arun_inference(prompt: str):
+    """Runs the prompt on Gemini's async client, so concurrent sections don't block the event loop."""
+    logger.debug(f"Running inference with prompt: {prompt}")
+    response = await gemini_model.generate_content_async(
         prompt,
         generation_config=GenerationConfig(
             max_output_tokens=2048,
@@ -45,5 +39,5 @@ def run_inference(prompt: str):
         )
     )
     output = response.text.strip() if response.text else "No output generated."
-    print(f"Model output: {output}")  # Debugging output
+    logger.debug(f"Model output: {output}")
     return output
@@ -1,15 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends  # type: ignore
-from pydantic import BaseModel  # type: ignore
-from onyx.docgen_hitl_backend.inference import run_inference
-from chromadb.utils import embedding_functions  # type: ignore
-import chromadb  # type: ignore
-from chromadb.config import Settings # type: ignore
+from fastapi import APIRouter, HTTPException, Depends, Query  # type: ignore
+from pydantic import BaseModel, Field  # type: ignore
+from onyx.docgen_hitl_backend.inference import arun_inference
+from onyx.docgen_hitl_backend.section_scheduler import schedule_sections
+from onyx.docgen_hitl_backend.session_state import DocgenSession
 from onyx.docgen_hitl_backend.utils import clean_output, get_titles, get_summary
 from fastapi.responses import StreamingResponse # type: ignore
 from dotenv import load_dotenv # type: ignore
 import google.generativeai as genai  # type: ignore
 from onyx.auth.users import current_user # type: ignore
-from typing import Dict
+from onyx.redis.redis_pool import get_async_redis_connection
+from onyx.utils.lazy_resource import LazyResource
+from typing import Any, NamedTuple
 import asyncio
 import json
 import os
@@ -18,81 +19,146 @@ import os
 load_dotenv()
 
 print("[DEBUG] GEMINI_API_KEY:", os.getenv("GEMINI_API_KEY"))
-print("[DEBUG] DOCGEN_HITL_FINAL_OUTPUT_PATH:", os.getenv("DOCGEN_HITL_FINAL_OUTPUT_PATH"))
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
-# Fetch paths from env
+# Prompt templates. Everything a generation produces (titles, progress, sections) is kept
+# per session in Redis, see session_state.py.
 INIT_PROMPT_PATH = os.getenv("DOCGEN_HITL_PROMPT_PATH")
 STEP_PATH = os.getenv("DOCGEN_HITL_STEP_PATH")
-FINAL_OUTPUT_PATH = os.getenv("DOCGEN_HITL_FINAL_OUTPUT_PATH")
-PROMPTS_PATH = os.getenv("DOCGEN_HITL_PROMPTS_PATH")
-QUERIED_SUMMARIES_PATH = os.getenv("DOCGEN_HITL_QUERIED_SUMMARIES_PATH")
-INIT_RESULT_PATH = os.getenv("DOCGEN_HITL_INIT_RESULT_PATH")
-TITLES_PATH = os.getenv("DOCGEN_HITL_TITLES_PATH")
-PROGRESS_PATH = os.getenv("DOCGEN_HITL_PROGRESS_PATH")
 
 # Validate all required paths
 required_paths = {
     "DOCGEN_HITL_PROMPT_PATH": INIT_PROMPT_PATH,
     "DOCGEN_HITL_STEP_PATH": STEP_PATH,
-    "DOCGEN_HITL_FINAL_OUTPUT_PATH": FINAL_OUTPUT_PATH,
-    "DOCGEN_HITL_PROMPTS_PATH": PROMPTS_PATH,
-    "DOCGEN_HITL_QUERIED_SUMMARIES_PATH": QUERIED_SUMMARIES_PATH,
-    "DOCGEN_HITL_INIT_RESULT_PATH": INIT_RESULT_PATH,
-    "DOCGEN_HITL_TITLES_PATH": TITLES_PATH,
-    "DOCGEN_HITL_PROGRESS_PATH": PROGRESS_PATH,
 }
 
-for key, path in required_paths.items():
-    if not path:
-        raise FileNotFoundError(f"{key} is not set in the .env file")
-    if not os.path.exists(path):
-        # Create empty files for dynamic ones, not templates
-        if "PROMPT" not in key and "STEP" not in key:
-            open(path, 'a').close()
-        else:
+def _read_templates():
+    templates = {}
+    for key, path in required_paths.items():
+        if not path:
+            raise FileNotFoundError(f"{key} is not set in the .env file")
+        if not os.path.exists(path):
             raise FileNotFoundError(f"Template file not found: {path}")
+        with open(path, "r") as f:
+            templates[key] = f.read()
+    return templates
+
+# Sections generated at the same time, and how similar (cosine) a section's title must be to an
+# earlier one's for it to wait for that section and build on its summary
+DOCGEN_HITL_MAX_CONCURRENT_SECTIONS = int(os.getenv("DOCGEN_HITL_MAX_CONCURRENT_SECTIONS") or 4)
+DOCGEN_HITL_DEPENDENCY_THRESHOLD = float(os.getenv("DOCGEN_HITL_DEPENDENCY_THRESHOLD") or 0.5)
+
+# Embedded on the model server, see _load_resources
+DOCGEN_HITL_EMBEDDING_MODEL = os.getenv("DOCGEN_HITL_EMBEDDING_MODEL") or "multi-qa-mpnet-base-cos-v1"
 
 router = APIRouter(prefix="/docgen_hitl", tags=["DocGen_HITL"]) # Prefix docgen_hitl endpoint with /docgen_hitl
 
+class DocgenResources(NamedTuple):
+    chroma_client: Any
+    embedder: Any
+    init_prompt: str
+    step_prompt: str
+
 # Initialize ChromaDB and embedding function
-chroma_client = chromadb.PersistentClient(path="/app/.chromadb")
-embedder = embedding_functions.SentenceTransformerEmbeddingFunction("multi-qa-mpnet-base-cos-v1")
-collection = chroma_client.get_or_create_collection("summaries", embedding_function=embedder)
+def _load_resources() -> DocgenResources:
+    templates = _read_templates()
+    import chromadb  # type: ignore
+    from onyx.natural_language_processing.chroma_embedding import ModelServerEmbeddingFunction
+
+    return DocgenResources(
+        chroma_client=chromadb.PersistentClient(path="/app/.chromadb"),
+        # Embeds through the model server's batched endpoint rather than a model in this process
+        embedder=ModelServerEmbeddingFunction(DOCGEN_HITL_EMBEDDING_MODEL),
+        init_prompt=templates["DOCGEN_HITL_PROMPT_PATH"],
+        step_prompt=templates["DOCGEN_HITL_STEP_PATH"],
+    )
+
+# Templates are read and the Chroma client is created on first use (or warmed at startup, see
+# WARM_FEATURES_ON_STARTUP), so deployments that never use docgen do not pay for it
+docgen = LazyResource("docgen", _load_resources)
+
+async def _get_resources() -> DocgenResources:
+    try:
+        return await docgen.aget()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Document generation unavailable: {e}")
+
+async def _get_session(user, document_id: str) -> DocgenSession:
+    user_id = str(user.id) if user else "anonymous"
+    return DocgenSession(await get_async_redis_connection(), user_id, document_id)
+
+def _fresh_collection(resources: DocgenResources, name: str):
+    # a previous run of this session that died before cleaning up
+    _drop_collection(resources, name)
+    return resources.chroma_client.create_collection(
+        name, embedding_function=resources.embedder, metadata={"hnsw:space": "cosine"}
+    )
+
+def _drop_collection(resources: DocgenResources, name: str) -> None:
+    try:
+        resources.chroma_client.delete_collection(name)
+    except Exception:
+        pass
+
+def _section_dependencies(resources: DocgenResources, collection, titles: list) -> list[list[int]]:
+    """
+    For each section, the earlier sections whose titles are similar enough to its own
+    (DOCGEN_HITL_DEPENDENCY_THRESHOLD); sections without any start right away, with no
+    earlier summaries (see schedule_sections).
+    """
+    # titles come back on every regeneration of a document, so they go through the query cache
+    embeddings = resources.embedder.embed_query(titles)
+    collection.add(
+        ids=[f"title{i}" for i in range(len(titles))],
+        embeddings=embeddings,
+        documents=titles,
+        metadatas=[{"index": i} for i in range(len(titles))],
+    )
+    dependencies: list[list[int]] = [[] for _ in titles]
+    for i in range(1, len(titles)):
+        earlier = collection.query(
+            query_embeddings=[embeddings[i]],
+            n_results=i,
+            where={"index": {"$lt": i}},
+            include=["metadatas", "distances"],
+        )
+        dependencies[i] = sorted(
+            metadata["index"]
+            for metadata, distance in zip(earlier["metadatas"][0], earlier["distances"][0])
+            if 1 - distance >= DOCGEN_HITL_DEPENDENCY_THRESHOLD
+        )
+    return dependencies
 
 # Pydantic models
 class DocumentRequest(BaseModel):
     document_title: str
     document_info: str
+    # Identifies the generation within the user's sessions; one per open document. Required,
+    # so clients can never share a session by leaving it out
+    document_id: str = Field(min_length=1)
 
 class TitlesUpdateRequest(BaseModel):
     titles: list
-
-# Utility functions
-def read_file(file):
-    with open(file, "r") as f:
-        return f.read()
-
-def write_file(file, data):
-    with open(file, "w") as f:
-        f.write(data)
+    document_id: str = Field(min_length=1)
 
 # Step 1: Fetch Initial Titles
 @router.post("/fetch_titles")
 async def fetch_titles(request: DocumentRequest, user=Depends(current_user)):
+    resources = await _get_resources()
+    session = await _get_session(user, request.document_id)
+
     async def title_stream():
         try:
             # Prepare the initial prompt
-            init_prompt = read_file(INIT_PROMPT_PATH).format(
+            init_prompt = resources.init_prompt.format(
                 document_title=request.document_title,
                 document_info=request.document_info
             )
 
             # Run the inference to get titles
-            output = run_inference(init_prompt)
-            write_file(INIT_RESULT_PATH, output)
+            output = await arun_inference(init_prompt)
             print(f"Raw Model Output:\n{output}")
 
             # Extract titles incrementally
@@ -100,12 +166,11 @@ async def fetch_titles(request: DocumentRequest, user=Depends(current_user)):
             if not titles:
                 raise ValueError("No valid titles extracted. Check the model output or input description.")
 
-            write_file(TITLES_PATH, "\n".join(titles))  # Save titles for later use
-            write_file(QUERIED_SUMMARIES_PATH, "")
-            write_file(PROMPTS_PATH, "")
+            # Save titles for later use
+            await session.set(init_result=output, titles=titles, progress="")
+            await session.reset_sections()
 
             for title in titles:
-                await asyncio.sleep(0.1)  # Simulate delay (optional, for smoother streaming)
                 yield json.dumps({"title": title}) + "\n"  # Stream each title as JSON
         except Exception as e:
             print(f"Error in fetch_titles: {str(e)}")  # Debugging log
@@ -117,109 +182,103 @@ async def fetch_titles(request: DocumentRequest, user=Depends(current_user)):
 # Step 2: Save Modified Titles
 @router.post("/save_titles")
 async def save_titles(request: TitlesUpdateRequest, user=Depends(current_user)):
+    await _get_resources()
+    session = await _get_session(user, request.document_id)
     try:
-        write_file(TITLES_PATH, "\n".join(request.titles))
+        await session.set(titles=request.titles)
         return {"message": "Titles updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
 # Step 3: Generate Document Sections & Content
 @router.post("/docgen_hitl")
 async def generate_document(request: DocumentRequest, user=Depends(current_user)):
+    resources = await _get_resources()
+    session = await _get_session(user, request.document_id)
+
     async def document_stream():
+        collection = None
         try:
             # Read titles dynamically
-            titles = read_file(TITLES_PATH).splitlines()
-            existing_ids = collection.get()["ids"]
-            if existing_ids:  # Only delete if there's something to delete
-                collection.delete(ids=existing_ids)
+            titles = await session.get("titles", [])
             if not titles:
                 raise ValueError("No titles found. Please ensure valid titles are saved.")
 
+            # Section titles of this session only, to find which sections build on which
+            collection = await asyncio.to_thread(_fresh_collection, resources, session.collection_name)
+            dependencies = await asyncio.to_thread(_section_dependencies, resources, collection, titles)
+
             # Prepare variables for streaming
-            step_prompt = read_file(STEP_PATH)
-            write_file(PROGRESS_PATH, "Initializing document generation...\n")
-            write_file(QUERIED_SUMMARIES_PATH, "")
-            write_file(PROMPTS_PATH, "")
-            write_file(FINAL_OUTPUT_PATH, "")  # Clear at the start
+            await session.reset_sections()
+            await session.set(progress="Initializing document generation...")
 
-            for counter, title in enumerate(titles):
+            async def generate_section(counter: int, dependencies: list[dict]) -> dict:
+                title = titles[counter]
                 # Update progress
                 progress_message = f"Generating section {counter + 1} of {len(titles)}: '{title}'. Please review the progress as it unfolds."
-                write_file(PROGRESS_PATH, progress_message)
+                await session.set(progress=progress_message)
 
-                # Query ChromaDB for summary
-                summary = collection.query(query_texts=title, n_results=1)
-                try:
-                    queried_summary = summary["documents"][0][0]
-                except (IndexError, KeyError):
-                    queried_summary = "No additional information found"
-
-                # Write queried summary to file
-                with open(QUERIED_SUMMARIES_PATH, "a") as f:
-                    f.write(queried_summary)
-                    f.write("\n\n")
+                # Summaries of the earlier sections this one builds on
+                queried_summary = "\n\n".join(
+                    dependency["parsed_summary"] for dependency in dependencies
+                ) or "No additional information found"
 
                 # Generate the next prompt
-                prompt = step_prompt.format(
+                prompt = resources.step_prompt.format(
                     document_title=request.document_title,
                     document_info=request.document_info,
                     iterating_section=title,
                     additional_information=queried_summary,
                 )
 
-                # Write prompt to file
-                with open(PROMPTS_PATH, "a") as f:
-                    f.write(prompt)
-                    f.write("\n\n")
-                    
                 # Run inference and process the result
-                result = run_inference(prompt)
+                result = await arun_inference(prompt)
 
                 # Parse and summarize the result
                 parsed_summary = get_summary(result)  # Parse result
-
-                # Add parsed summary to ChromaDB collection
                 if isinstance(parsed_summary, list):
                     parsed_summary = " ".join(parsed_summary)
-                collection.add(f"id{counter}", documents=[parsed_summary])
-
-                # Clean the result
-                clean_result = clean_output(result)
 
-                # Write clean result to final_output.txt
-                with open(FINAL_OUTPUT_PATH, "a") as f:
-                    f.write("\n\n")
-                    f.write(clean_result)
-                    f.write("\n\n")
+                return {
+                    "title": title,
+                    "content": clean_output(result),
+                    "parsed_summary": parsed_summary,
+                    "queried_summary": queried_summary,
+                    "prompt": prompt,
+                }
+
+            # Independent sections are generated concurrently; they are streamed in order
+            async for counter, section in schedule_sections(
+                dependencies, generate_section, DOCGEN_HITL_MAX_CONCURRENT_SECTIONS
+            ):
+                await session.add_section(section)
 
                 # Stream the result immediately
                 yield json.dumps({
-                    "title": title,
-                    "content": clean_result,
-                    "parsed_summary": parsed_summary,  # Include parsed_summary
+                    "title": section["title"],
+                    "content": section["content"],
+                    "parsed_summary": section["parsed_summary"],  # Include parsed_summary
                     "progress": f"Completed section {counter + 1} of {len(titles)}"
                 }) + "\n"
 
-                # Small delay to simulate processing time
-                await asyncio.sleep(0.1)
-
             # Finalize progress
-            write_file(PROGRESS_PATH, "Document generation completed.")
+            await session.set(progress="Document generation completed.")
             yield json.dumps({"status": "Document generation completed"}) + "\n"
 
         except Exception as e:
             # Handle errors during streaming
             yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            if collection is not None:
+                await asyncio.to_thread(_drop_collection, resources, session.collection_name)
 
     # Return a streaming response
     return StreamingResponse(document_stream(), media_type="application/json")
-    
+
 @router.get("/get_progress")
-async def get_progress(user=Depends(current_user)):
-    try:
-        progress = read_file(PROGRESS_PATH)
-        return {"status": progress.strip()}
-    except FileNotFoundError:
+async def get_progress(document_id: str = Query(min_length=1), user=Depends(current_user)):
+    session = await _get_session(user, document_id)
+    progress = await session.get("progress")
+    if not progress:
         return {"status": "No progress yet."}
-
+    return {"status": progress.strip()}
@@ -0,0 +1,60 @@
+"""
+Generates a document's sections concurrently while respecting their dependencies.
+
+Section i may depend on earlier sections (`dependencies[i]`, empty when independent): it
+starts once those are done and receives their results, in section order. Independent
+sections run side by side, at most `max_concurrency` generations at a time, and receive no
+results, so a section always gets the same context whatever order the generations finish
+in. Results are yielded in section order as soon as each one and all before it have
+completed, so the client still sees the document top to bottom.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+
+
+async def schedule_sections(
+    dependencies: list[list[int]],
+    generate: Callable[[int, list[Any]], Awaitable[Any]],
+    max_concurrency: int,
+) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Runs `generate(i, dependency_results)` for every section and yields `(i, result)` in
+    order. If a generation fails the remaining ones are cancelled and the error is raised.
+    """
+    for i, deps in enumerate(dependencies):
+        for dep in deps:
+            if not 0 <= dep < i:
+                raise ValueError(
+                    f"Section {i} can only depend on earlier sections, got {dep}"
+                )
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks: list[asyncio.Task] = []
+
+    async def run(i: int) -> Any:
+        # wait outside the semaphore so blocked sections don't hold a slot
+        dep_results = [await tasks[dep] for dep in sorted(dependencies[i])]
+        async with semaphore:
+            return await generate(i, dep_results)
+
+    for i in range(len(dependencies)):
+        tasks.append(asyncio.create_task(run(i)))
+
+    try:
+        for i, task in enumerate(tasks):
+            while not task.done():
+                pending = [t for t in tasks[i:] if not t.done()]
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # fail fast, even if the failed section comes after the one we are waiting for
+                for t in tasks[i:]:
+                    if t.done() and not t.cancelled() and t.exception() is not None:
+                        raise t.exception()  # type: ignore[misc]
+            yield i, task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
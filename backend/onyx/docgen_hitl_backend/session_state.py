@@ -0,0 +1,59 @@
+"""
+Per-session state of a document generation, keyed by user + document id, so concurrent
+generations (other users, or the same user in another tab) never share titles, progress,
+output or vector collection.
+
+  docgen:session:{user}:{document}            hash: titles, init_result, progress (JSON each)
+  docgen:session:{user}:{document}:sections    list of generated sections (JSON), in order
+
+Both expire DOCGEN_HITL_SESSION_TTL after the last write. The section summaries a run
+retrieves from live in a Chroma collection of their own (`collection_name`), dropped when
+the run ends.
+"""
+import hashlib
+import json
+import os
+from typing import Any
+
+from redis import asyncio as aioredis
+
+DOCGEN_HITL_SESSION_TTL = int(os.getenv("DOCGEN_HITL_SESSION_TTL") or 24 * 60 * 60)
+
+_PREFIX = "docgen:session"
+
+
+class DocgenSession:
+    def __init__(self, r: aioredis.Redis, user_id: str, document_id: str) -> None:
+        self._r = r
+        self.user_id = user_id
+        self.document_id = document_id
+        self.key = f"{_PREFIX}:{user_id}:{document_id}"
+        self._sections_key = f"{self.key}:sections"
+
+    @property
+    def collection_name(self) -> str:
+        # Chroma names: 3-63 chars of [a-zA-Z0-9._-]
+        digest = hashlib.sha256(self.key.encode("utf-8")).hexdigest()[:32]
+        return f"docgen_{digest}"
+
+    async def get(self, field: str, default: Any = None) -> Any:
+        raw = await self._r.hget(self.key, field)
+        return json.loads(raw) if raw is not None else default
+
+    async def set(self, **fields: Any) -> None:
+        pipe = self._r.pipeline(transaction=True)
+        pipe.hset(self.key, mapping={k: json.dumps(v) for k, v in fields.items()})
+        pipe.expire(self.key, DOCGEN_HITL_SESSION_TTL)
+        await pipe.execute()
+
+    async def reset_sections(self) -> None:
+        await self._r.delete(self._sections_key)
+
+    async def add_section(self, section: dict[str, Any]) -> None:
+        pipe = self._r.pipeline(transaction=True)
+        pipe.rpush(self._sections_key, json.dumps(section))
+        pipe.expire(self._sections_key, DOCGEN_HITL_SESSION_TTL)
+        await pipe.execute()
+
+    async def sections(self) -> list[dict[str, Any]]:
+        return [json.loads(s) for s in await self._r.lrange(self._sections_key, 0, -1)]
@@ -1,5 +1,9 @@
+from typing import Any
+from typing import TYPE_CHECKING
+
 from onyx.configs.app_configs import AVERAGE_SUMMARY_EMBEDDINGS
 from onyx.configs.app_configs import BLURB_SIZE
+from onyx.configs.app_configs import CHUNKER_SINGLE_PASS_TOKENIZATION
 from onyx.configs.app_configs import LARGE_CHUNK_RATIO
 from onyx.configs.app_configs import MINI_CHUNK_SIZE
 from onyx.configs.app_configs import SKIP_METADATA_IN_CHUNK
@@ -16,6 +20,7 @@ from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import Section
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.token_splitter import TokenizedText
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
 from onyx.natural_language_processing.utils import BaseTokenizer
 from onyx.utils.logger import setup_logger
@@ -23,6 +28,11 @@ from onyx.utils.text_processing import clean_text
 from onyx.utils.text_processing import shared_precompare_cleanup
 from shared_configs.configs import STRICT_CHUNK_TOKEN_LIMIT
 
+if TYPE_CHECKING:
+    from llama_index.core.node_parser import SentenceSplitter
+
+    from onyx.indexing.chunking_pool import ChunkingProcessPool
+
 # Not supporting overlaps, we need a clean combination of chunks and it is unclear if overlaps
 # actually help quality at all
 CHUNK_OVERLAP = 0
@@ -134,12 +144,12 @@ class Chunker:
         chunk_overlap: int = CHUNK_OVERLAP,
         mini_chunk_size: int = MINI_CHUNK_SIZE,
         callback: IndexingHeartbeatInterface | None = None,
+        single_pass_tokenization: bool = CHUNKER_SINGLE_PASS_TOKENIZATION,
+        process_pool: "ChunkingProcessPool | None" = None,
     ) -> None:
-        # importing llama_index uses a lot of RAM, so we only import it when needed.
-        from llama_index.core.node_parser import SentenceSplitter
-
         self.include_metadata = include_metadata
         self.chunk_token_limit = chunk_token_limit
+        self.chunk_overlap = chunk_overlap
         self.enable_multipass = enable_multipass
         self.enable_large_chunks = enable_large_chunks
         self.enable_contextual_rag = enable_contextual_rag
@@ -152,10 +162,28 @@ class Chunker:
         )
         self.tokenizer = tokenizer
         self.callback = callback
+        # large batches are chunked by the pool's workers, see chunking_pool.py
+        self.process_pool = process_pool
 
         self.max_context = 0
         self.prompt_tokens = 0
 
+        self.single_pass_tokenization = single_pass_tokenization
+        self.blurb_size = blurb_size
+        self.mini_chunk_size = mini_chunk_size
+        self.blurb_splitter: "SentenceSplitter | None" = None
+        self.chunk_splitter: "SentenceSplitter | None" = None
+        self.mini_chunk_splitter: "SentenceSplitter | None" = None
+        if single_pass_tokenization:
+            # boundaries come from the sections' tokens, see token_splitter.py
+            self.section_separator = TokenizedText.from_text(
+                SECTION_SEPARATOR, tokenizer
+            )
+            return
+
+        # importing llama_index uses a lot of RAM, so we only import it when needed.
+        from llama_index.core.node_parser import SentenceSplitter
+
         self.blurb_splitter = SentenceSplitter(
             tokenizer=tokenizer.tokenize,
             chunk_size=blurb_size,
@@ -199,15 +227,23 @@ class Chunker:
         """
         Extract a short blurb from the text (first chunk of size `blurb_size`).
         """
+        if self.blurb_splitter is None:
+            return TokenizedText.from_text(text, self.tokenizer).first(self.blurb_size)
         texts = self.blurb_splitter.split_text(text)
         if not texts:
             return ""
         return texts[0]
 
-    def _get_mini_chunk_texts(self, chunk_text: str) -> list[str] | None:
+    def _get_mini_chunk_texts(
+        self, chunk_text: str, tokenized: TokenizedText | None = None
+    ) -> list[str] | None:
         """
         For "multipass" mode: additional sub-chunks (mini-chunks) for use in certain embeddings.
         """
+        if tokenized is not None:
+            if self.enable_multipass and chunk_text.strip():
+                return tokenized.split(self.mini_chunk_size)
+            return None
         if self.mini_chunk_splitter and chunk_text.strip():
             return self.mini_chunk_splitter.split_text(chunk_text)
         return None
@@ -224,14 +260,20 @@ class Chunker:
         metadata_suffix_semantic: str = "",
         metadata_suffix_keyword: str = "",
         image_file_name: str | None = None,
+        tokenized: TokenizedText | None = None,
     ) -> None:
         """
         Helper to create a new DocAwareChunk, append it to chunks_list.
+        `tokenized` is the chunk's text with its tokens, in single pass mode.
         """
         new_chunk = DocAwareChunk(
             source_document=document,
             chunk_id=len(chunks_list),
-            blurb=self._extract_blurb(text),
+            blurb=(
+                tokenized.first(self.blurb_size)
+                if tokenized is not None
+                else self._extract_blurb(text)
+            ),
             content=text,
             source_links=links or {0: ""},
             image_file_name=image_file_name,
@@ -239,7 +281,7 @@ class Chunker:
             title_prefix=title_prefix,
             metadata_suffix_semantic=metadata_suffix_semantic,
             metadata_suffix_keyword=metadata_suffix_keyword,
-            mini_chunk_texts=self._get_mini_chunk_texts(text),
+            mini_chunk_texts=self._get_mini_chunk_texts(text, tokenized),
             large_chunk_id=None,
             doc_summary="",
             chunk_context="",
@@ -329,6 +371,7 @@ class Chunker:
                     chunk_text = ""
                     link_offsets = {}
 
+                assert self.chunk_splitter is not None
                 split_texts = self.chunk_splitter.split_text(section_text)
                 for i, split_text in enumerate(split_texts):
                     # If even the split_text is bigger than strict limit, further split
@@ -405,6 +448,125 @@ class Chunker:
             )
         return chunks
 
+    def _chunk_tokenized_sections(
+        self,
+        document: IndexingDocument,
+        sections: list[Section],
+        tokenized_sections: list[TokenizedText],
+        title_prefix: str,
+        metadata_suffix_semantic: str,
+        metadata_suffix_keyword: str,
+        content_token_limit: int,
+    ) -> list[DocAwareChunk]:
+        """
+        Single pass version of _chunk_document_with_sections: the same chunks layout, with
+        every token count and boundary taken from the sections' tokens (see token_splitter.py).
+        Oversized sections are cut by token count, so they always respect the limit.
+        """
+        chunks: list[DocAwareChunk] = []
+        link_offsets: dict[int, str] = {}
+        chunk_parts: list[TokenizedText] = []
+        chunk_text = ""
+        chunk_token_count = 0
+
+        def finalize_chunk(links: dict[int, str]) -> None:
+            tokenized_chunk = TokenizedText.join(self.section_separator, chunk_parts)
+            self._create_chunk(
+                document,
+                chunks,
+                chunk_text,
+                links,
+                False,
+                title_prefix,
+                metadata_suffix_semantic,
+                metadata_suffix_keyword,
+                tokenized=tokenized_chunk,
+            )
+
+        for section_idx, (section, tokenized_section) in enumerate(
+            zip(sections, tokenized_sections)
+        ):
+            section_text = tokenized_section.text
+            section_link_text = section.link or ""
+            image_url = section.image_file_name
+
+            # If there is no useful content, skip
+            if not section_text and (not document.title or section_idx > 0):
+                logger.warning(
+                    f"Skipping empty or irrelevant section in doc "
+                    f"{document.semantic_identifier}, link={section_link_text}"
+                )
+                continue
+
+            # CASE 1: If this section has an image, force a separate chunk
+            if image_url:
+                if chunk_text.strip():
+                    finalize_chunk(link_offsets)
+                    chunk_parts, chunk_text, chunk_token_count = [], "", 0
+                    link_offsets = {}
+
+                self._create_chunk(
+                    document,
+                    chunks,
+                    section_text,
+                    links={0: section_link_text} if section_link_text else {},
+                    image_file_name=image_url,
+                    title_prefix=title_prefix,
+                    metadata_suffix_semantic=metadata_suffix_semantic,
+                    metadata_suffix_keyword=metadata_suffix_keyword,
+                    tokenized=tokenized_section,
+                )
+                continue
+
+            # CASE 2: Normal text section, if it is large on its own, split it separately
+            if len(tokenized_section) > content_token_limit:
+                if chunk_text.strip():
+                    finalize_chunk(link_offsets)
+                    chunk_parts, chunk_text, chunk_token_count = [], "", 0
+                    link_offsets = {}
+
+                for i, (start, end) in enumerate(
+                    tokenized_section.split_ranges(content_token_limit)
+                ):
+                    piece = tokenized_section.slice(start, end)
+                    self._create_chunk(
+                        document,
+                        chunks,
+                        piece.text.strip(),
+                        {0: section_link_text},
+                        is_continuation=(i != 0),
+                        title_prefix=title_prefix,
+                        metadata_suffix_semantic=metadata_suffix_semantic,
+                        metadata_suffix_keyword=metadata_suffix_keyword,
+                        tokenized=piece,
+                    )
+                continue
+
+            # If we can still fit this section into the current chunk, do so
+            next_section_tokens = len(self.section_separator) + len(tokenized_section)
+            if next_section_tokens + chunk_token_count <= content_token_limit:
+                current_offset = len(shared_precompare_cleanup(chunk_text))
+                if chunk_text:
+                    chunk_text += SECTION_SEPARATOR
+                    chunk_token_count += len(self.section_separator)
+                if section_text:
+                    chunk_parts.append(tokenized_section)
+                chunk_text += section_text
+                chunk_token_count += len(tokenized_section)
+                link_offsets[current_offset] = section_link_text
+            else:
+                finalize_chunk(link_offsets)
+                # start a new chunk
+                link_offsets = {0: section_link_text}
+                chunk_parts = [tokenized_section] if section_text else []
+                chunk_text = section_text
+                chunk_token_count = len(tokenized_section)
+
+        # finalize any leftover text chunk
+        if chunk_text.strip() or not chunks:
+            finalize_chunk(link_offsets or {0: ""})
+        return chunks
+
     def _handle_single_document(
         self, document: IndexingDocument
     ) -> list[DocAwareChunk]:
@@ -435,12 +597,30 @@ class Chunker:
             metadata_suffix_semantic = ""
             metadata_tokens = 0
 
+        # Use processed_sections if available (IndexingDocument), otherwise use original sections
+        sections_to_chunk = document.processed_sections
+
+        # single pass mode: the only time the sections' text is tokenized
+        tokenized_sections = (
+            [
+                TokenizedText.from_text(
+                    clean_text(str(section.text or "")), self.tokenizer
+                )
+                for section in sections_to_chunk
+            ]
+            if self.single_pass_tokenization
+            else None
+        )
+
         single_chunk_fits = True
         doc_token_count = 0
         if self.enable_contextual_rag:
-            doc_content = document.get_text_content()
-            tokenized_doc = self.tokenizer.tokenize(doc_content)
-            doc_token_count = len(tokenized_doc)
+            if tokenized_sections is not None:
+                doc_token_count = sum(len(section) for section in tokenized_sections)
+            else:
+                doc_content = document.get_text_content()
+                tokenized_doc = self.tokenizer.tokenize(doc_content)
+                doc_token_count = len(tokenized_doc)
 
             # check if doc + title + metadata fits in a single chunk. If so, no need for contextual RAG
             single_chunk_fits = (
@@ -478,17 +658,25 @@ class Chunker:
             title_prefix = ""
             metadata_suffix_semantic = ""
 
-        # Use processed_sections if available (IndexingDocument), otherwise use original sections
-        sections_to_chunk = document.processed_sections
-
-        normal_chunks = self._chunk_document_with_sections(
-            document,
-            sections_to_chunk,
-            title_prefix,
-            metadata_suffix_semantic,
-            metadata_suffix_keyword,
-            content_token_limit,
-        )
+        if tokenized_sections is not None:
+            normal_chunks = self._chunk_tokenized_sections(
+                document,
+                sections_to_chunk,
+                tokenized_sections,
+                title_prefix,
+                metadata_suffix_semantic,
+                metadata_suffix_keyword,
+                content_token_limit,
+            )
+        else:
+            normal_chunks = self._chunk_document_with_sections(
+                document,
+                sections_to_chunk,
+                title_prefix,
+                metadata_suffix_semantic,
+                metadata_suffix_keyword,
+                content_token_limit,
+            )
 
         # Optional "multipass" large chunk creation
         if self.enable_multipass and self.enable_large_chunks:
@@ -500,6 +688,20 @@ class Chunker:
 
         return normal_chunks
 
+    def _worker_settings(self) -> dict[str, Any]:
+        """Arguments for the process pool's workers to build a Chunker equivalent to this one"""
+        return {
+            "enable_multipass": self.enable_multipass,
+            "enable_large_chunks": self.enable_large_chunks,
+            "enable_contextual_rag": self.enable_contextual_rag,
+            "blurb_size": self.blurb_size,
+            "include_metadata": self.include_metadata,
+            "chunk_token_limit": self.chunk_token_limit,
+            "chunk_overlap": self.chunk_overlap,
+            "mini_chunk_size": self.mini_chunk_size,
+            "single_pass_tokenization": self.single_pass_tokenization,
+        }
+
     def chunk(self, documents: list[IndexingDocument]) -> list[DocAwareChunk]:
         """
         Takes in a list of documents and chunks them into smaller chunks for indexing
@@ -507,6 +709,13 @@ class Chunker:
 
         Works with both standard Document objects and IndexingDocument objects with processed_sections.
         """
+        if self.process_pool and self.process_pool.should_shard(documents):
+            pool_chunks = self.process_pool.chunk(
+                documents, self._worker_settings(), self.callback
+            )
+            if pool_chunks is not None:
+                return pool_chunks
+
         final_chunks: list[DocAwareChunk] = []
         for document in documents:
             if self.callback and self.callback.should_stop():
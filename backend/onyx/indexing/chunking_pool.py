@@ -0,0 +1,269 @@
+"""
+Shards Chunker.chunk across worker processes (see Chunker.process_pool), since chunking is
+CPU bound Python and otherwise runs on a single core of the indexing process.
+
+Documents are partitioned into one shard per process by size, every shard is chunked by a
+Chunker living in a worker and the chunks are put back in document order. Chunk ids are
+assigned per document, so they are the same as when chunking serially. Each worker loads
+the tokenizer once, when it starts, and keeps its Chunker for the following batches.
+
+Indexing jobs run in daemonic processes, which multiprocessing does not let start children
+because it could not clean them up when the job is terminated. The pool lifts that check
+only while it starts its workers (see _allow_children), and every worker exits as soon as
+the process that started it is gone, so a killed or cancelled job never leaves chunking
+workers behind.
+"""
+
+import contextlib
+import heapq
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import wait as wait_for_sentinels
+from multiprocessing.util import Finalize
+from typing import Any
+
+from onyx.configs.app_configs import CHUNKER_NUM_PROCESSES
+from onyx.connectors.models import IndexingDocument
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
+from onyx.indexing.models import DocAwareChunk
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+from onyx.utils.logger import setup_logger
+from shared_configs.enums import EmbeddingProvider
+
+logger = setup_logger()
+
+# Below this many characters in a batch, sending the documents to the workers and the
+# chunks back costs more than chunking them in the indexing process.
+MIN_BATCH_CHARS = 200_000
+# how often the stop signal is checked while waiting for the workers
+_STOP_CHECK_INTERVAL = 1.0
+
+# worker process state
+_worker_tokenizer: BaseTokenizer | None = None
+_worker_chunkers: dict[tuple[tuple[str, Any], ...], Chunker] = {}
+
+_pools: dict[tuple[str | None, EmbeddingProvider | None], "ChunkingProcessPool"] = {}
+
+# serializes the pools' worker starts, see _allow_children
+_allow_children_lock = threading.Lock()
+
+
+def _exit_with_parent() -> None:
+    parent = multiprocessing.parent_process()
+    if parent is None:
+        return
+    # the sentinel becomes ready when the parent exits, however it was stopped
+    wait_for_sentinels([parent.sentinel])
+    os._exit(1)
+
+
+def _init_worker(
+    model_name: str | None, provider_type: EmbeddingProvider | None
+) -> None:
+    global _worker_tokenizer
+    threading.Thread(target=_exit_with_parent, daemon=True).start()
+    _worker_tokenizer = get_tokenizer(
+        model_name=model_name, provider_type=provider_type
+    )
+
+
+def _start_worker() -> None:
+    pass
+
+
+@contextlib.contextmanager
+def _allow_children() -> Iterator[None]:
+    """
+    Lets a daemonic process start the pool's workers. multiprocessing checks the daemon
+    flag in the current process' config, a CPython internal that new processes also take
+    their default daemon flag from, so the workers started here are not daemonic either.
+
+    The flag is lifted for the whole process: a process started by another thread in
+    the meantime would not be daemonic. This relies on the window only covering worker
+    starts, which the lock serializes across pools, and on the other threads of an
+    indexing job (document prefetch, heartbeat) not starting processes.
+    """
+    with _allow_children_lock:
+        config = multiprocessing.current_process()._config  # type: ignore[attr-defined]
+        daemon = config.pop("daemon", None)
+        try:
+            yield
+        finally:
+            if daemon is not None:
+                config["daemon"] = daemon
+
+
+def _chunk_shard(
+    settings: dict[str, Any], documents: list[IndexingDocument]
+) -> list[list[DocAwareChunk]]:
+    assert _worker_tokenizer is not None, "Chunking worker was not initialized"
+
+    key = tuple(sorted(settings.items()))
+    chunker = _worker_chunkers.get(key)
+    if chunker is None:
+        chunker = Chunker(tokenizer=_worker_tokenizer, **settings)
+        _worker_chunkers[key] = chunker
+
+    return [chunker.chunk([document]) for document in documents]
+
+
+def partition_by_size(sizes: list[int], num_shards: int) -> list[list[int]]:
+    """
+    Splits item indices into at most `num_shards` shards of about equal total size: largest
+    item first, each into the currently smallest shard. Indices stay sorted within a shard.
+    """
+    num_shards = max(1, min(num_shards, len(sizes)))
+    shards: list[list[int]] = [[] for _ in range(num_shards)]
+    heap = [(0, shard_index) for shard_index in range(num_shards)]
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i], reverse=True):
+        total, shard_index = heapq.heappop(heap)
+        shards[shard_index].append(index)
+        heapq.heappush(heap, (total + sizes[index], shard_index))
+
+    return [sorted(shard) for shard in shards if shard]
+
+
+class ChunkingProcessPool:
+    """
+    A pool of `num_processes` chunking workers for one tokenizer, started on first use.
+    Batches smaller than MIN_BATCH_CHARS are chunked by the Chunker itself.
+    """
+
+    def __init__(
+        self,
+        model_name: str | None,
+        provider_type: EmbeddingProvider | None,
+        num_processes: int,
+    ) -> None:
+        self.model_name = model_name
+        self.provider_type = provider_type
+        self.num_processes = num_processes
+        self._executor: ProcessPoolExecutor | None = None
+        self._stop_executor: Finalize | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=self.num_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.provider_type),
+            )
+            # The executor starts a worker per submitted task until it has all of them,
+            # so starting them all here keeps the batches' submits out of the window.
+            with _allow_children():
+                for _ in range(self.num_processes):
+                    executor.submit(_start_worker)
+            # A job process joins its workers when it exits, before the executor's own
+            # exit handler tells them to stop, so stop them ahead of multiprocessing's
+            # queue finalizers (exitpriority 10) or the job never exits.
+            self._stop_executor = Finalize(
+                None,
+                executor.shutdown,
+                kwargs={"wait": True, "cancel_futures": True},
+                exitpriority=20,
+            )
+            self._executor = executor
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._stop_executor is not None:
+            self._stop_executor()
+            self._stop_executor = None
+            self._executor = None
+
+    def should_shard(self, documents: list[IndexingDocument]) -> bool:
+        if self.num_processes <= 1 or len(documents) <= 1:
+            return False
+
+        total_chars = sum(document.get_total_char_length() for document in documents)
+        return total_chars >= MIN_BATCH_CHARS
+
+    def chunk(
+        self,
+        documents: list[IndexingDocument],
+        settings: dict[str, Any],
+        callback: IndexingHeartbeatInterface | None = None,
+    ) -> list[DocAwareChunk] | None:
+        """
+        Chunks for `documents` in the same order as Chunker.chunk, or None if the pool broke
+        (eg. a worker was killed) and the batch has to be chunked in this process.
+        """
+        shards = partition_by_size(
+            [document.get_total_char_length() for document in documents],
+            self.num_processes,
+        )
+
+        start = time.monotonic()
+        executor = self._get_executor()
+        futures: dict[Future, list[int]] = {
+            executor.submit(
+                _chunk_shard, settings, [documents[i] for i in shard]
+            ): shard
+            for shard in shards
+        }
+
+        chunks_per_document: list[list[DocAwareChunk]] = [[] for _ in documents]
+        pending = set(futures)
+        try:
+            while pending:
+                if callback and callback.should_stop():
+                    raise RuntimeError("Chunker.chunk: Stop signal detected")
+
+                done, pending = wait(
+                    pending, timeout=_STOP_CHECK_INTERVAL, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    shard = futures[future]
+                    for document_index, chunks in zip(shard, future.result()):
+                        # the workers chunked copies, point back to the batch's documents
+                        for chunk in chunks:
+                            chunk.source_document = documents[document_index]
+                        chunks_per_document[document_index] = chunks
+
+                    if callback:
+                        callback.progress(
+                            "Chunker.chunk",
+                            sum(len(chunks_per_document[i]) for i in shard),
+                        )
+        except BrokenProcessPool:
+            logger.exception("Chunking worker died, chunking the batch in this process")
+            self.shutdown()
+            return None
+        finally:
+            for future in pending:
+                future.cancel()
+
+        logger.debug(
+            f"Chunked {len(documents)} documents in {len(shards)} shards: "
+            f"elapsed={time.monotonic() - start:.2f}s"
+        )
+        return [chunk for chunks in chunks_per_document for chunk in chunks]
+
+
+def get_chunking_process_pool(
+    model_name: str | None, provider_type: EmbeddingProvider | None
+) -> ChunkingProcessPool | None:
+    """The configured pool for this tokenizer, shared by the process' pipelines, or None
+    if parallel chunking is disabled."""
+    if CHUNKER_NUM_PROCESSES <= 1:
+        return None
+
+    key = (model_name, provider_type)
+    if key not in _pools:
+        _pools[key] = ChunkingProcessPool(
+            model_name=model_name,
+            provider_type=provider_type,
+            num_processes=CHUNKER_NUM_PROCESSES,
+        )
+    return _pools[key]
@@ -2,10 +2,12 @@ import time
 from abc import ABC
 from abc import abstractmethod
 from collections import defaultdict
+from collections.abc import Callable
 
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import DocumentFailure
 from onyx.db.models import SearchSettings
+from onyx.indexing.embedding_cache import EmbeddingCache
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
@@ -40,6 +42,7 @@ class IndexingEmbedder(ABC):
         deployment_name: str | None,
         reduced_dimension: int | None,
         callback: IndexingHeartbeatInterface | None,
+        embedding_cache: EmbeddingCache | None = None,
     ):
         self.model_name = model_name
         self.normalize = normalize
@@ -50,6 +53,7 @@ class IndexingEmbedder(ABC):
         self.api_url = api_url
         self.api_version = api_version
         self.deployment_name = deployment_name
+        self.embedding_cache = embedding_cache
 
         self.embedding_model = EmbeddingModel(
             model_name=model_name,
@@ -93,6 +97,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
         callback: IndexingHeartbeatInterface | None = None,
+        embedding_cache: EmbeddingCache | None = None,
     ):
         super().__init__(
             model_name,
@@ -106,6 +111,19 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name,
             reduced_dimension,
             callback,
+            embedding_cache,
+        )
+
+    def _encode(
+        self,
+        texts: list[str],
+        encode: Callable[[list[str]], list[Embedding]],
+        large_chunks_present: bool = False,
+    ) -> list[Embedding]:
+        if self.embedding_cache is None:
+            return encode(texts)
+        return self.embedding_cache.get_or_embed(
+            texts, encode, large_chunks_present=large_chunks_present
         )
 
     @log_function_time()
@@ -143,12 +161,16 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
 
-        embeddings = self.embedding_model.encode(
-            texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
+        embeddings = self._encode(
+            flat_chunk_texts,
+            lambda texts: self.embedding_model.encode(
+                texts=texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            ),
             large_chunks_present=large_chunks_present,
-            tenant_id=tenant_id,
-            request_id=request_id,
         )
 
         chunk_titles = {
@@ -163,11 +185,14 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # Cache the Title embeddings to only have to do it once
         title_embed_dict: dict[str, Embedding] = {}
         if chunk_titles_list:
-            title_embeddings = self.embedding_model.encode(
+            title_embeddings = self._encode(
                 chunk_titles_list,
-                text_type=EmbedTextType.PASSAGE,
-                tenant_id=tenant_id,
-                request_id=request_id,
+                lambda texts: self.embedding_model.encode(
+                    texts,
+                    text_type=EmbedTextType.PASSAGE,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                ),
             )
             title_embed_dict.update(
                 {
@@ -237,6 +262,12 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name=search_settings.deployment_name,
             reduced_dimension=search_settings.reduced_dimension,
             callback=callback,
+            embedding_cache=EmbeddingCache.for_model(
+                model_name=search_settings.model_name,
+                normalize=search_settings.normalize,
+                passage_prefix=search_settings.passage_prefix,
+                reduced_dimension=search_settings.reduced_dimension,
+            ),
         )
 
 
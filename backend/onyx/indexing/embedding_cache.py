@@ -0,0 +1,162 @@
+import hashlib
+import time
+from array import array
+from collections.abc import Callable
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from onyx.configs.app_configs import INDEXING_EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import INDEXING_EMBEDDING_CACHE_TTL
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_KEY_PREFIX = "embedding_cache"
+
+
+def _serialize(embedding: Embedding) -> bytes:
+    return array("f", embedding).tobytes()
+
+
+def _deserialize(raw: bytes) -> Embedding:
+    values = array("f")
+    values.frombytes(raw)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """
+    Passage embeddings in Redis, keyed by a hash of everything that determines the vector:
+    model name, normalization, passage prefix, reduced dimension, the trim length
+    (large chunks) and the text itself. Re-indexing a document whose text did not change
+    then costs a hash lookup instead of a model server call.
+
+    The cache holds at most `max_entries` embeddings per tenant; the least recently used
+    ones are evicted first, and unused ones also expire after `ttl` seconds. Redis errors
+    are logged and treated as misses, so indexing never fails because of the cache.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        model_key: str,
+        max_entries: int,
+        ttl: int,
+        key_prefix: str = _KEY_PREFIX,
+    ) -> None:
+        self.redis_client = redis_client
+        self.model_key = model_key
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        # member = entry key, score = last time the entry was written or read
+        self.lru_key = f"{key_prefix}:lru"
+
+    @classmethod
+    def for_model(
+        cls,
+        model_name: str,
+        normalize: bool,
+        passage_prefix: str | None,
+        reduced_dimension: int | None,
+    ) -> "EmbeddingCache | None":
+        """The configured cache for this model, or None if caching is disabled."""
+        if INDEXING_EMBEDDING_CACHE_MAX_ENTRIES <= 0:
+            return None
+
+        model_key = "|".join(
+            [model_name, str(normalize), passage_prefix or "", str(reduced_dimension)]
+        )
+        # The tenant client only prefixes single-key commands (not mget, zadd or pipelines),
+        # so the tenant prefix is spelled out in every key; it leaves prefixed keys alone.
+        return cls(
+            redis_client=get_redis_client(),
+            model_key=model_key,
+            max_entries=INDEXING_EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl=INDEXING_EMBEDDING_CACHE_TTL,
+            key_prefix=f"{get_current_tenant_id()}:{_KEY_PREFIX}",
+        )
+
+    def _key(self, text: str, large_chunks_present: bool) -> str:
+        digest = hashlib.sha256(
+            f"{self.model_key}|{int(large_chunks_present)}|{text}".encode("utf-8")
+        ).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+
+    def get_many(
+        self, texts: list[str], large_chunks_present: bool = False
+    ) -> list[Embedding | None]:
+        keys = [self._key(text, large_chunks_present) for text in texts]
+        try:
+            values = self.redis_client.mget(keys)
+            hit_keys = [key for key, value in zip(keys, values) if value is not None]
+            if hit_keys:
+                # a hit counts as a use for both the LRU order and the TTL
+                now = time.time()
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.zadd(self.lru_key, {key: now for key in hit_keys})
+                for key in hit_keys:
+                    pipe.expire(key, self.ttl)
+                pipe.execute()
+        except RedisError:
+            logger.warning("Embedding cache lookup failed, embedding everything")
+            return [None] * len(texts)
+
+        return [_deserialize(value) if value is not None else None for value in values]
+
+    def put_many(
+        self,
+        texts: list[str],
+        embeddings: list[Embedding],
+        large_chunks_present: bool = False,
+    ) -> None:
+        now = time.time()
+        keys = [self._key(text, large_chunks_present) for text in texts]
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, embedding in zip(keys, embeddings):
+                pipe.set(key, _serialize(embedding), ex=self.ttl)
+            pipe.zadd(self.lru_key, {key: now for key in keys})
+            # entries that expired on their own
+            pipe.zremrangebyscore(self.lru_key, "-inf", now - self.ttl)
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+
+            if size > self.max_entries:
+                evicted = self.redis_client.zpopmin(
+                    self.lru_key, size - self.max_entries
+                )
+                if evicted:
+                    self.redis_client.delete(*[key for key, _ in evicted])
+        except RedisError:
+            logger.warning("Failed to write to the embedding cache")
+
+    def get_or_embed(
+        self,
+        texts: list[str],
+        embed: Callable[[list[str]], list[Embedding]],
+        large_chunks_present: bool = False,
+    ) -> list[Embedding]:
+        """Embeddings for `texts` in order; only the uncached ones (once each) go to `embed`."""
+        cached = self.get_many(texts, large_chunks_present)
+
+        missing = list(
+            dict.fromkeys(
+                text for text, embedding in zip(texts, cached) if embedding is None
+            )
+        )
+        embedded: dict[str, Embedding] = {}
+        if missing:
+            embedded = dict(zip(missing, embed(missing)))
+            self.put_many(missing, list(embedded.values()), large_chunks_present)
+
+        num_hits = sum(embedding is not None for embedding in cached)
+        logger.debug(f"Embedding cache: {num_hits} hits, {len(missing)} embedded")
+        return [
+            embedding if embedding is not None else embedded[text]
+            for text, embedding in zip(texts, cached)
+        ]
@@ -61,6 +61,7 @@ from onyx.document_index.interfaces import IndexBatchParams
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
 from onyx.file_store.utils import store_user_file_plaintext
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunking_pool import get_chunking_process_pool
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
@@ -1086,6 +1087,10 @@ def build_indexing_pipeline(
         enable_contextual_rag=enable_contextual_rag,
         # after every doc, update status in case there are a bunch of really long docs
         callback=callback,
+        process_pool=get_chunking_process_pool(
+            model_name=embedder.embedding_model.model_name,
+            provider_type=embedder.embedding_model.provider_type,
+        ),
     )
 
     return partial(
@@ -0,0 +1,89 @@
+"""
+Token-based splitting for the chunker's single-pass mode (see Chunker.single_pass_tokenization).
+
+A section is tokenized once into a TokenizedText, which keeps the character span of every
+token. Chunk, blurb and mini-chunk boundaries and all token counts are then derived from
+those spans, instead of running a separate sentence splitter (and tokenizer pass) for each.
+"""
+from onyx.natural_language_processing.utils import BaseTokenizer
+
+_SENTENCE_END_CHARS = frozenset(".!?\n")
+
+
+class TokenizedText:
+    def __init__(self, text: str, spans: list[tuple[int, int]]) -> None:
+        self.text = text
+        self.spans = spans
+
+    @classmethod
+    def from_text(cls, text: str, tokenizer: BaseTokenizer) -> "TokenizedText":
+        return cls(text, tokenizer.token_spans(text))
+
+    @classmethod
+    def join(
+        cls, separator: "TokenizedText", parts: list["TokenizedText"]
+    ) -> "TokenizedText":
+        """Same as tokenizing separator.text.join(part texts), without tokenizing again."""
+        text_parts: list[str] = []
+        spans: list[tuple[int, int]] = []
+        offset = 0
+        for i, part in enumerate(parts):
+            pieces = [part] if i == 0 else [separator, part]
+            for piece in pieces:
+                text_parts.append(piece.text)
+                spans.extend((start + offset, end + offset) for start, end in piece.spans)
+                offset += len(piece.text)
+        return cls("".join(text_parts), spans)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def _is_sentence_end(self, i: int) -> bool:
+        """Whether token i - 1 ends a sentence"""
+        end = self.spans[i - 1][1]
+        return end > 0 and self.text[end - 1] in _SENTENCE_END_CHARS
+
+    def _is_word_start(self, i: int) -> bool:
+        """Whether token i starts a new word, ie. the text can be cut before it"""
+        start = self.spans[i][0]
+        return start > self.spans[i - 1][1] or self.text[start : start + 1].isspace()
+
+    def split_ranges(self, token_limit: int) -> list[tuple[int, int]]:
+        """
+        Token index ranges [start, end) of at most `token_limit` tokens covering the text.
+        Like the sentence splitter, a range ends at the last sentence end that keeps it at
+        least half full, else at the last word boundary, else mid-word.
+        """
+        ranges: list[tuple[int, int]] = []
+        start = 0
+        while start < len(self.spans):
+            end = min(start + token_limit, len(self.spans))
+            if end < len(self.spans):
+                candidates = range(end, start + max(1, token_limit // 2), -1)
+                end = next(
+                    (i for i in candidates if self._is_sentence_end(i)),
+                    next((i for i in candidates if self._is_word_start(i)), end),
+                )
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def slice_text(self, start: int, end: int) -> str:
+        return self.text[self.spans[start][0] : self.spans[end - 1][1]].strip()
+
+    def slice(self, start: int, end: int) -> "TokenizedText":
+        text_start = self.spans[start][0]
+        return TokenizedText(
+            self.text[text_start : self.spans[end - 1][1]],
+            [(s - text_start, e - text_start) for s, e in self.spans[start:end]],
+        )
+
+    def split(self, token_limit: int) -> list[str]:
+        texts = [self.slice_text(start, end) for start, end in self.split_ranges(token_limit)]
+        return [text for text in texts if text]
+
+    def first(self, token_limit: int) -> str:
+        """The first piece `split` would return, without splitting the rest"""
+        head = TokenizedText(self.text, self.spans[: token_limit * 2])
+        pieces = head.split(token_limit)
+        return pieces[0] if pieces else ""
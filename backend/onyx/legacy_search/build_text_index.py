@@ -0,0 +1,34 @@
+"""
+Build the index behind LEGACY_SEARCH_TEXT_ENGINE:
+  - local: the on-disk BM25 index
+  - mongo: the $text index (the build blocks until done, so it is not part of API startup)
+
+    python -m onyx.legacy_search.build_text_index            # sc_cases + hc_cases
+    python -m onyx.legacy_search.build_text_index hc_cases   # a single collection
+
+Safe to re-run while the API is serving: each local index is built to a temp file and swapped in.
+"""
+import sys
+import time
+
+from onyx.legacy_search.config import LEGACY_SEARCH_INDEX_DIR
+from onyx.legacy_search.mongo_utils import DB, HC, SC
+from onyx.legacy_search.text_engines import build_local_index, ensure_text_indexes, get_text_engine
+
+
+def main(argv):
+    collections = argv or [SC, HC]
+    if get_text_engine().name == "mongo":
+        t0 = time.time()
+        ensure_text_indexes(DB, collections)
+        print(f"[build_text_index] $text index on {', '.join(collections)} ready in {time.time() - t0:.1f}s")
+        return
+
+    for coll in collections:
+        t0 = time.time()
+        n = build_local_index(DB, coll, LEGACY_SEARCH_INDEX_DIR)
+        print(f"[build_text_index] {coll}: indexed {n} docs in {time.time() - t0:.1f}s -> {LEGACY_SEARCH_INDEX_DIR}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+import os
+
+from dotenv import load_dotenv  # type: ignore
+
+load_dotenv()
+
+# ========= Full-text engine =========
+# "regex"  -> legacy unanchored $regex scan over the text/title fields (no index needed)
+# "mongo"  -> MongoDB $text index (created by `python -m onyx.legacy_search.build_text_index`)
+# "local"  -> on-disk BM25 inverted index built by `python -m onyx.legacy_search.build_text_index`
+LEGACY_SEARCH_TEXT_ENGINE = (os.environ.get("LEGACY_SEARCH_TEXT_ENGINE") or "regex").strip().lower()
+
+# Where the "local" engine keeps one sqlite index file per collection
+LEGACY_SEARCH_INDEX_DIR = os.environ.get("LEGACY_SEARCH_INDEX_DIR") or "/app/.legacy_search_index"
+
+# Upper bound on ranked hits the "local" engine hands to Mongo as an `_id: {$in: ...}` filter;
+# queries with more matches report `total_is_estimate` (the total is then a lower bound)
+LEGACY_SEARCH_LOCAL_MAX_HITS = int(os.environ.get("LEGACY_SEARCH_LOCAL_MAX_HITS") or 5000)
+
+# BM25 parameters for the "local" engine
+LEGACY_SEARCH_BM25_K1 = float(os.environ.get("LEGACY_SEARCH_BM25_K1") or 1.2)
+LEGACY_SEARCH_BM25_B = float(os.environ.get("LEGACY_SEARCH_BM25_B") or 0.75)
+
+# ========= Materialized judgement fields =========
+# When enabled, judgement search sorts/filters on the typed `sort_date`, `court_label` and `judge_tokens`
+# fields (populated by `python -m onyx.legacy_search.derived_fields` and the ingest write path)
+# instead of parsing date strings / regex-matching inside every aggregation.
+# Only turn this on once the backfill has completed.
+LEGACY_SEARCH_MATERIALIZED_FIELDS = (
+    os.environ.get("LEGACY_SEARCH_MATERIALIZED_FIELDS", "").lower() == "true"
+)
+
+# ========= Result counts =========
+# Exact totals are cached in Redis per (collection, normalized filter) for this many seconds
+LEGACY_SEARCH_COUNT_CACHE_TTL = int(os.environ.get("LEGACY_SEARCH_COUNT_CACHE_TTL") or 300)
+# With `estimate_total`, counting stops at this many matches and the total is reported as an estimate
+LEGACY_SEARCH_COUNT_ESTIMATE_THRESHOLD = int(os.environ.get("LEGACY_SEARCH_COUNT_ESTIMATE_THRESHOLD") or 10000)
+
+# ========= Query-result cache (Redis) =========
+LEGACY_SEARCH_RESULT_CACHE_ENABLED = (
+    os.environ.get("LEGACY_SEARCH_RESULT_CACHE_ENABLED", "true").lower() == "true"
+)
+LEGACY_SEARCH_RESULT_CACHE_TTL = int(os.environ.get("LEGACY_SEARCH_RESULT_CACHE_TTL") or 600)
+# Least-recently-used entries beyond this many are evicted
+LEGACY_SEARCH_RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("LEGACY_SEARCH_RESULT_CACHE_MAX_ENTRIES") or 5000)
+
+# ========= "both" mode execution =========
+# How judgement (SC + HC) and statute (central + state) searches spanning two collections are paged:
+# "fanout" -> each collection returns the _id and sort keys of its own index-sorted top (start + page_size),
+#             queried concurrently; the page is cut from a bounded merge in Python and fetched by _id
+# "union"  -> single $unionWith pipeline that sorts the whole union server-side
+LEGACY_SEARCH_BOTH_MODE_STRATEGY = (
+    os.environ.get("LEGACY_SEARCH_BOTH_MODE_STRATEGY") or "fanout"
+).strip().lower()
+
+# ========= Facets =========
+# Court/state lists and per-court/state/year counts are recomputed in the background this often
+LEGACY_SEARCH_FACET_REFRESH_SECONDS = int(os.environ.get("LEGACY_SEARCH_FACET_REFRESH_SECONDS") or 900)
+
+# ========= Refine =========
+# Max results a single refine-by-ids request may highlight (one results page is typically 20)
+LEGACY_SEARCH_REFINE_MAX_IDS = int(os.environ.get("LEGACY_SEARCH_REFINE_MAX_IDS") or 100)
+
+# ========= Mongo client =========
+LEGACY_SEARCH_MONGO_MAX_POOL_SIZE = int(os.environ.get("LEGACY_SEARCH_MONGO_MAX_POOL_SIZE") or 100)
+LEGACY_SEARCH_MONGO_MIN_POOL_SIZE = int(os.environ.get("LEGACY_SEARCH_MONGO_MIN_POOL_SIZE") or 0)
+LEGACY_SEARCH_MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+    os.environ.get("LEGACY_SEARCH_MONGO_SERVER_SELECTION_TIMEOUT_MS") or 5000
+)
+LEGACY_SEARCH_MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("LEGACY_SEARCH_MONGO_CONNECT_TIMEOUT_MS") or 5000)
+LEGACY_SEARCH_MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("LEGACY_SEARCH_MONGO_SOCKET_TIMEOUT_MS") or 30000)
+# Server-side budget for each search count / page query; exceeding it fails the request (504)
+LEGACY_SEARCH_MONGO_MAX_TIME_MS = int(os.environ.get("LEGACY_SEARCH_MONGO_MAX_TIME_MS") or 15000)
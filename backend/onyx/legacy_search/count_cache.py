@@ -0,0 +1,70 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from bson import json_util  # type: ignore
+
+from onyx.legacy_search.config import LEGACY_SEARCH_COUNT_CACHE_TTL
+from onyx.redis.redis_pool import get_async_redis_connection
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Counts live in Redis next to the result cache, so every API worker shares them and an
+# ingest in another process (see result_cache.invalidate_search_caches) reaches them all.
+_PREFIX = "legacy_search"
+
+
+def generation_key(collection: str) -> str:
+    """Redis counter bumped on ingest; every cached count and result embeds its value."""
+    return f"{_PREFIX}:gen:{collection}"
+
+
+def normalized_filter_key(
+    collection: str, match: Dict[str, Any], limit: Optional[int] = None, generation: Any = 0
+) -> str:
+    """
+    Stable key for a Mongo filter: canonical Extended JSON (sorted keys) hashed together
+    with the collection, its ingest generation and the count limit.
+    """
+    if isinstance(generation, bytes):
+        generation = generation.decode()
+    canon = json_util.dumps(match or {}, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha1(canon.encode("utf-8")).hexdigest()
+    return f"{_PREFIX}:count:{collection}:{generation or 0}:{limit or 0}:{digest}"
+
+
+async def cached_count_async(
+    collection: str,
+    match: Dict[str, Any],
+    count_fn: Callable[..., Awaitable[int]],
+    limit: Optional[int] = None,
+    **count_kwargs: Any,
+) -> Tuple[int, bool]:
+    """
+    Returns (count, is_estimate). `count_fn(match, **kwargs)` is the underlying async
+    `count_documents`; with `limit` counting stops early and a count that reaches the
+    limit is flagged as an estimate (a lower bound). Fails open: any Redis error falls
+    back to counting.
+    """
+    if limit:
+        count_kwargs["limit"] = limit
+
+    try:
+        r = await get_async_redis_connection()
+        key = normalized_filter_key(collection, match, limit, await r.get(generation_key(collection)))
+        hit = await r.get(key)
+    except Exception as e:
+        logger.warning(f"legacy search count cache unavailable: {e}")
+        count = await count_fn(match, **count_kwargs)
+        return count, bool(limit) and count >= limit
+
+    if hit is not None:
+        count = int(hit)
+    else:
+        count = await count_fn(match, **count_kwargs)
+        try:
+            # entries of older generations are never read again and expire on their own
+            await r.set(key, count, ex=LEGACY_SEARCH_COUNT_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"legacy search count cache write failed: {e}")
+    return count, bool(limit) and count >= limit
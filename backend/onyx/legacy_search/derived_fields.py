@@ -0,0 +1,121 @@
+"""
+Materialized search fields for judgements.
+
+Each sc_cases / hc_cases document gets:
+  - sort_date:    BSON date parsed from the heterogeneous judgment/decision date strings
+  - court_label:  canonical lower-cased HC label (HC only), e.g. 'delhi high court'
+  - judge_tokens: normalized name tokens of every judge on the bench
+
+Backfill (resumable; only touches docs missing the fields unless --all is given):
+
+    python -m onyx.legacy_search.derived_fields [--all] [sc_cases|hc_cases ...]
+
+Ingest code should write documents through `upsert_judgement` (or merge
+`derived_fields(collection, doc)` into its own $set) so new documents are searchable
+as soon as LEGACY_SEARCH_MATERIALIZED_FIELDS is enabled.
+"""
+import datetime as dt
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from pymongo import UpdateOne  # type: ignore
+
+from onyx.legacy_search.mongo_utils import (
+    DB,
+    HC,
+    SC,
+    _canonical_court_label,
+    _judge_tokens,
+    _parse_date_safe,
+    ensure_judgement_indexes,
+)
+from onyx.legacy_search.result_cache import invalidate_search_caches
+
+# Raw fields needed to derive the materialized ones
+_SOURCE_FIELDS = {
+    SC: ["judgment_dates", "date_of_judgment", "doc_date", "judgement_by", "bench"],
+    HC: ["decision date", "Decision Date", "Court Name", "Court name", "judge", "Judge"],
+}
+
+
+def _as_datetime(d: Optional[dt.date]) -> Optional[dt.datetime]:
+    return dt.datetime(d.year, d.month, d.day) if d else None
+
+
+def _first(v: Any) -> Any:
+    return v[0] if isinstance(v, list) and v else v
+
+
+def derived_fields(collection: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the materialized fields for one raw document (same precedence as the normalizers).
+    """
+    if collection == SC:
+        sort_date = None
+        for f in ("judgment_dates", "date_of_judgment", "doc_date"):
+            sort_date = _parse_date_safe(_first(doc.get(f)))
+            if sort_date:
+                break
+        return {
+            "sort_date": _as_datetime(sort_date),
+            "judge_tokens": _judge_tokens(doc.get("judgement_by"), doc.get("bench")),
+        }
+
+    if collection == HC:
+        decision_date = doc.get("decision date") or doc.get("Decision Date")
+        court = doc.get("Court Name") or doc.get("Court name") or ""
+        return {
+            "sort_date": _as_datetime(_parse_date_safe(_first(decision_date))),
+            "court_label": _canonical_court_label(court) or None,
+            "judge_tokens": _judge_tokens(doc.get("judge"), doc.get("Judge")),
+        }
+
+    raise ValueError(f"No derived fields for collection '{collection}'")
+
+
+def upsert_judgement(collection: str, doc: Dict[str, Any]) -> Any:
+    """
+    Write path for ingest: store the raw document together with its materialized fields.
+    """
+    full = {**doc, **derived_fields(collection, doc)}
+    if "_id" in full:
+        res = DB[collection].replace_one({"_id": full["_id"]}, full, upsert=True)
+    else:
+        res = DB[collection].insert_one(full)
+    invalidate_search_caches(collection)
+    return res
+
+
+def backfill_derived_fields(collection: str, only_missing: bool = True, batch_size: int = 1000) -> int:
+    """
+    Populate the materialized fields on existing documents with batched bulk writes.
+    Returns the number of updated documents.
+    """
+    flt = {"sort_date": {"$exists": False}} if only_missing else {}
+    proj = {f: 1 for f in _SOURCE_FIELDS[collection]}
+    ops = []
+    updated = 0
+    for doc in DB[collection].find(flt, proj, no_cursor_timeout=True).batch_size(batch_size):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": derived_fields(collection, doc)}))
+        if len(ops) >= batch_size:
+            updated += DB[collection].bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += DB[collection].bulk_write(ops, ordered=False).modified_count
+    invalidate_search_caches(collection)
+    return updated
+
+
+def main(argv):
+    only_missing = "--all" not in argv
+    collections = [a for a in argv if not a.startswith("--")] or [SC, HC]
+    ensure_judgement_indexes()
+    for coll in collections:
+        t0 = time.time()
+        n = backfill_derived_fields(coll, only_missing=only_missing)
+        print(f"[derived_fields] {coll}: updated {n} docs in {time.time() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,159 @@
+"""
+Process-wide cache of the legacy search filter facets: the court and state lists with
+document counts per court / state and, for judgements, per decision year.
+
+Facets are computed with one $group aggregation per collection and refreshed by a daemon
+thread every LEGACY_SEARCH_FACET_REFRESH_SECONDS; readers always get the last snapshot
+(value lists without counts until the first one exists), so `/judgements/courts`,
+`/statutes/states` and `/facets` never scan a collection.
+"""
+import datetime as dt
+import threading
+from typing import Any, Dict, List, Optional
+
+from onyx.legacy_search.config import LEGACY_SEARCH_FACET_REFRESH_SECONDS
+from onyx.legacy_search.config import LEGACY_SEARCH_MATERIALIZED_FIELDS
+from onyx.legacy_search.mongo_utils import (
+    DB,
+    SC, HC, CA, SA,
+    _hc_sort_date_expr,
+    _normalize_state_label,
+    _sc_sort_date_expr,
+    get_supported_hc_courts,
+    get_supported_states,
+)
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+SUPREME_COURT = "Supreme Court"
+
+_snapshot: Optional[Dict[str, Any]] = None
+# served until the first snapshot exists
+_cold_snapshot: Optional[Dict[str, Any]] = None
+_refresh_lock = threading.Lock()
+_refresher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _aggregate(collection: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return list(DB[collection].aggregate(pipeline, allowDiskUse=True))
+
+
+def _year_group(date_expr: Any, **keys: Any) -> List[Dict[str, Any]]:
+    return [{"$group": {"_id": {**keys, "year": {"$year": date_expr}}, "n": {"$sum": 1}}}]
+
+
+def _facet(value: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # rows: [{"year": int | None, "n": int}]; undated docs count towards the total only
+    years: Dict[str, int] = {}
+    for r in rows:
+        if r["year"] is not None:
+            years[str(r["year"])] = years.get(str(r["year"]), 0) + r["n"]
+    return {
+        "value": value,
+        "count": sum(r["n"] for r in rows),
+        "years": dict(sorted(years.items())),
+    }
+
+
+def compute_facets() -> Dict[str, Any]:
+    if LEGACY_SEARCH_MATERIALIZED_FIELDS:
+        sc_date: Any = "$sort_date"
+        hc_date: Any = "$sort_date"
+    else:
+        sc_date, hc_date = _sc_sort_date_expr(), _hc_sort_date_expr()
+
+    sc_rows = [
+        {"year": r["_id"]["year"], "n": r["n"]}
+        for r in _aggregate(SC, _year_group(sc_date))
+    ]
+
+    hc_by_court: Dict[str, List[Dict[str, Any]]] = {}
+    hc_pipeline = _year_group(hc_date, court={"$ifNull": ["$Court Name", "$Court name"]})
+    for r in _aggregate(HC, hc_pipeline):
+        court = r["_id"].get("court")
+        if isinstance(court, str) and court.strip():
+            hc_by_court.setdefault(court.strip(), []).append({"year": r["_id"]["year"], "n": r["n"]})
+
+    state_counts: Dict[str, int] = {}
+    for r in _aggregate(SA, [{"$group": {"_id": "$State Name", "n": {"$sum": 1}}}]):
+        if isinstance(r["_id"], str) and r["_id"].strip():
+            state = _normalize_state_label(r["_id"])
+            state_counts[state] = state_counts.get(state, 0) + r["n"]
+
+    return {
+        "courts": [_facet(SUPREME_COURT, sc_rows)] + [
+            _facet(court, hc_by_court[court]) for court in sorted(hc_by_court, key=str.lower)
+        ],
+        "states": [
+            {"value": state, "count": state_counts[state]}
+            for state in sorted(state_counts, key=str.lower)
+        ],
+        "central_count": DB[CA].estimated_document_count(),
+        "refreshed_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+    }
+
+
+def _fallback_facets() -> Dict[str, Any]:
+    # value lists only (counts unknown) so the filter UI still renders
+    return {
+        "courts": [{"value": c, "count": None, "years": {}} for c in [SUPREME_COURT] + get_supported_hc_courts()],
+        "states": [{"value": s, "count": None} for s in get_supported_states()],
+        "central_count": None,
+        "refreshed_at": None,
+    }
+
+
+def refresh_facets() -> Dict[str, Any]:
+    """Recompute the snapshot; on failure the previous snapshot is kept."""
+    global _snapshot
+    with _refresh_lock:
+        try:
+            _snapshot = compute_facets()
+        except Exception as e:
+            logger.warning(f"Legacy search facet refresh failed: {e}")
+            if _snapshot is None:
+                _snapshot = _fallback_facets()
+        return _snapshot
+
+
+def get_facets() -> Dict[str, Any]:
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+    # first readers before the refresher finished get the value lists (two distincts, done
+    # once) instead of waiting for the full aggregation, which is left to the refresher
+    start_facet_refresher()
+    global _cold_snapshot
+    if _cold_snapshot is None:
+        _cold_snapshot = _fallback_facets()
+    return _snapshot or _cold_snapshot
+
+
+def hc_court_values() -> List[str]:
+    return [f["value"] for f in get_facets()["courts"] if f["value"] != SUPREME_COURT]
+
+
+def state_values() -> List[str]:
+    return [f["value"] for f in get_facets()["states"]]
+
+
+def _refresh_loop() -> None:
+    refresh_facets()
+    while not _stop.wait(LEGACY_SEARCH_FACET_REFRESH_SECONDS):
+        refresh_facets()
+
+
+def start_facet_refresher() -> None:
+    """Start the background refresher for this process (idempotent)."""
+    global _refresher
+    if _refresher is not None and _refresher.is_alive():
+        return
+    _stop.clear()
+    _refresher = threading.Thread(target=_refresh_loop, name="legacy-search-facets", daemon=True)
+    _refresher.start()
+
+
+def stop_facet_refresher() -> None:
+    _stop.set()
@@ -0,0 +1,100 @@
+"""
+Keyword highlighting for the refine endpoints.
+
+All keywords are matched in a single pass over the text (an Aho-Corasick automaton when
+`pyahocorasick` is installed, otherwise one combined regex alternation); the resulting spans
+give the match count, the snippet windows and the <mark> positions without re-scanning.
+"""
+import html
+import re
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # optional dependency
+    ahocorasick = None
+
+Span = Tuple[int, int]
+
+# windows closer than this many chars are merged into one snippet
+_SNIPPET_MERGE_GAP = 10
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive, non-overlapping, leftmost-longest matcher for a fixed set of keywords.
+    """
+
+    def __init__(self, keywords: Sequence[str]) -> None:
+        # longest first so the regex alternation also prefers the longest keyword at a position
+        self.keywords = sorted(
+            {kw.strip().lower() for kw in keywords if kw and kw.strip()}, key=len, reverse=True
+        )
+        self._automaton = None
+        self._regex = None
+        if not self.keywords:
+            return
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                automaton.add_word(kw, len(kw))
+            automaton.make_automaton()
+            self._automaton = automaton
+        self._regex = re.compile("|".join(re.escape(kw) for kw in self.keywords), re.IGNORECASE)
+
+    def spans(self, text: str) -> List[Span]:
+        if not self.keywords or not text:
+            return []
+        if self._automaton is not None:
+            lowered = text.lower()
+            # offsets only line up when lower-casing kept the length (true for almost all text)
+            if len(lowered) == len(text):
+                return [(end - n + 1, end + 1) for end, n in self._automaton.iter_long(lowered)]
+        return [m.span() for m in self._regex.finditer(text)]
+
+
+@lru_cache(maxsize=256)
+def get_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def mark_spans(text: str, spans: Sequence[Span], start: int = 0, end: int | None = None) -> str:
+    """HTML-escaped text[start:end] with every span (sorted, within the range) wrapped in <mark>."""
+    end = len(text) if end is None else end
+    out = []
+    pos = start
+    for s, e in spans:
+        out.append(html.escape(text[pos:s]))
+        out.append(f"<mark>{html.escape(text[s:e])}</mark>")
+        pos = e
+    out.append(html.escape(text[pos:end]))
+    return "".join(out)
+
+
+def snippet_windows(spans: Sequence[Span], length: int, window: int) -> List[Tuple[int, int, List[Span]]]:
+    """Context windows around the (sorted) spans, merged when they touch, with the spans inside each."""
+    windows: List[Tuple[int, int, List[Span]]] = []
+    for s, e in spans:
+        ws, we = max(0, s - window), min(length, e + window)
+        if windows and ws <= windows[-1][1] + _SNIPPET_MERGE_GAP:
+            prev_s, prev_e, inside = windows[-1]
+            inside.append((s, e))
+            windows[-1] = (prev_s, max(prev_e, we), inside)
+        else:
+            windows.append((ws, we, [(s, e)]))
+    return windows
+
+
+def highlight_snippets(
+    text: str, keywords: Sequence[str], max_snippets: int = 3, window: int = 120
+) -> Tuple[int, List[str]]:
+    """(match_count, snippets) for `text`; snippets are HTML with <mark>…</mark>."""
+    if not text:
+        return 0, []
+    spans = get_matcher(tuple(keywords or ())).spans(text)
+    snippets = [
+        mark_spans(text, inside, ws, we)
+        for ws, we, inside in snippet_windows(spans, len(text), window)[:max_snippets]
+    ]
+    return len(spans), snippets
@@ -1,19 +1,48 @@
-from fastapi import APIRouter, Depends
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pymongo.errors import ExecutionTimeout  # type: ignore
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 import datetime as dt
 
 from onyx.auth.users import current_user
 from onyx.legacy_search.mongo_utils import (
-    judgements_search,
-    get_supported_hc_courts,
+    judgements_search_async,
     build_highlight_snippets,
-    get_supported_states,
-    statutes_search,
+    refine_by_ids,
+    statutes_search_async,
+    SC, HC, CA, SA,
 )
+from onyx.legacy_search.facets import get_facets, hc_court_values, state_values
+from onyx.legacy_search.result_cache import cached_search_async, cache_stats
+from onyx.legacy_search.text_engines import TextIndexUnavailable
 
 router = APIRouter(prefix="/legacysearch", tags=["Legacy Search"])
 
+# Hot queries are served from the Redis result cache (keyed on the canonicalized request).
+# Searches run on the async Mongo client so a slow query never holds a threadpool worker;
+# each Mongo query is bounded by LEGACY_SEARCH_MONGO_MAX_TIME_MS.
+async def _cached_judgements_search(**params):
+    try:
+        return await cached_search_async("judgements", [SC, HC], params, judgements_search_async)
+    except ExecutionTimeout:
+        raise HTTPException(status_code=504, detail="Search timed out; please narrow the query or add filters.")
+    except TextIndexUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        # bad paging parameters, eg. a cursor issued for other filters
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _cached_statutes_search(**params):
+    try:
+        return await cached_search_async("statutes", [CA, SA], params, statutes_search_async)
+    except ExecutionTimeout:
+        raise HTTPException(status_code=504, detail="Search timed out; please narrow the query or add filters.")
+    except TextIndexUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        # bad paging parameters, eg. a cursor issued for other filters
+        raise HTTPException(status_code=400, detail=str(e))
+
 # ========= Models =========
 
 class JudgementsSearchRequest(BaseModel):
@@ -25,6 +54,12 @@ class JudgementsSearchRequest(BaseModel):
     end_date: Optional[dt.date] = None
     page: int = 1
     page_size: int = 20
+    sort_by: Literal["date", "relevance"] = "date"  # "relevance" needs the mongo/local text engine
+    # Keyset paging: set use_cursor on the first request, then pass back `next_cursor` (page is ignored)
+    use_cursor: bool = False
+    cursor: Optional[str] = None
+    # Stop counting at a threshold; the response then sets total_is_estimate
+    estimate_total: bool = False
 
 class JudgementsSearchResponse(BaseModel):
     results: List[dict]
@@ -34,6 +69,8 @@ class JudgementsSearchResponse(BaseModel):
     has_more: bool
     sc_total: Optional[int] = None
     hc_total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
     
 # ========= New Models (Refine & Advanced) =========
 
@@ -43,9 +80,20 @@ class RefineRequest(BaseModel):
     max_snippets_per_doc: int = 3
     snippet_window: int = 120           # chars around each match
 
+class RefineRef(BaseModel):
+    id: str                             # `id` of a search result
+    collection: str                     # `collection` of the same result
+
+class RefineByIdsRequest(BaseModel):
+    refs: List[RefineRef]               # the current page, by reference (text is fetched server-side)
+    keywords: List[str]
+    max_snippets_per_doc: int = 3
+    snippet_window: int = 120
+
 class RefineResponseDoc(BaseModel):
     source: Optional[str] = None
     collection: Optional[str] = None
+    id: Optional[str] = None
     file_name: Optional[str] = None
     title: Optional[str] = None
     match_count: int
@@ -64,6 +112,10 @@ class AdvancedSearchRequest(BaseModel):
     end_date: Optional[dt.date] = None
     page: int = 1
     page_size: int = 20
+    sort_by: Literal["date", "relevance"] = "date"
+    use_cursor: bool = False
+    cursor: Optional[str] = None
+    estimate_total: bool = False
     
 # ========= Statutes Models (NEW) =========
 
@@ -74,6 +126,10 @@ class StatutesSearchRequest(BaseModel):
     statutes: List[str]
     page: int = 1
     page_size: int = 20
+    # Keyset paging on _id (see JudgementsSearchRequest)
+    use_cursor: bool = False
+    cursor: Optional[str] = None
+    estimate_total: bool = False
 
 class StatutesAdvancedSearchRequest(StatutesSearchRequest):
     # "Search within Section Title" only (when provided)
@@ -87,6 +143,8 @@ class StatutesSearchResponse(BaseModel):
     has_more: bool
     central_total: Optional[int] = None
     state_total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 # ========= Endpoints (Judgements) =========
 
@@ -99,11 +157,11 @@ def courts(user=Depends(current_user)):
     """
     return {
         "supreme": "Supreme Court",
-        "high_courts": get_supported_hc_courts(),
+        "high_courts": hc_court_values(),
     }
 
 @router.post("/judgements/search", response_model=JudgementsSearchResponse)
-def judgements(request: JudgementsSearchRequest, user=Depends(current_user)):
+async def judgements(request: JudgementsSearchRequest, user=Depends(current_user)):
     """
     Behavior:
       - If only 'Supreme Court' is selected: returns SC raw fields
@@ -111,7 +169,7 @@ def judgements(request: JudgementsSearchRequest, user=Depends(current_user)):
       - If both are selected: returns unified shape for mixing/pagination
       - If nothing is selected: defaults to Supreme Court (SC raw fields)
     """
-    data = judgements_search(
+    data = await _cached_judgements_search(
         query=request.query,
         courts=request.courts,
         judge_name=request.judge_name,
@@ -120,6 +178,10 @@ def judgements(request: JudgementsSearchRequest, user=Depends(current_user)):
         end_date=request.end_date,
         page=request.page,
         page_size=request.page_size,
+        sort_by=request.sort_by,
+        cursor=request.cursor,
+        use_cursor=request.use_cursor,
+        estimate_total=request.estimate_total,
     )
     return data
 
@@ -141,13 +203,28 @@ def refine(req: RefineRequest, user=Depends(current_user)):
         )
     return {"docs": refined_docs}
 
+@router.post("/judgements/refine/ids", response_model=RefineResponse)
+def refine_ids(req: RefineByIdsRequest, user=Depends(current_user)):
+    """
+    Refine by reference: send the `id` + `collection` of each result on the page instead of
+    the results themselves; only the snippet text is read from the DB.
+    """
+    docs = refine_by_ids(
+        refs=[(r.collection, r.id) for r in req.refs],
+        keywords=req.keywords,
+        collections=[SC, HC],
+        max_snippets=req.max_snippets_per_doc,
+        window=req.snippet_window,
+    )
+    return {"docs": docs}
+
 
 @router.post("/judgements/advanced", response_model=JudgementsSearchResponse)
-def advanced(request: AdvancedSearchRequest, user=Depends(current_user)):
+async def advanced(request: AdvancedSearchRequest, user=Depends(current_user)):
     """
     Advanced search = same engine as /judgements/search, separate route for the UI's Advanced panel.
     """
-    data = judgements_search(
+    data = await _cached_judgements_search(
         query=request.query,
         courts=request.courts,
         judge_name=request.judge_name,
@@ -156,6 +233,10 @@ def advanced(request: AdvancedSearchRequest, user=Depends(current_user)):
         end_date=request.end_date,
         page=request.page,
         page_size=request.page_size,
+        sort_by=request.sort_by,
+        cursor=request.cursor,
+        use_cursor=request.use_cursor,
+        estimate_total=request.estimate_total,
     )
     return data
 
@@ -170,36 +251,42 @@ def statutes_states(user=Depends(current_user)):
     """
     return {
         "central": "Central Acts",
-        "states": get_supported_states(),
+        "states": state_values(),
     }
 
 @router.post("/statutes/search", response_model=StatutesSearchResponse)
-def statutes_basic(request: StatutesSearchRequest, user=Depends(current_user)):
+async def statutes_basic(request: StatutesSearchRequest, user=Depends(current_user)):
     """
     Basic Statutes search across selected sources (Central, State(s), or both).
     If 'statutes' is empty, defaults to Central Acts (same UX as Judgements default to SC).
     """
-    data = statutes_search(
+    data = await _cached_statutes_search(
         query=request.query,
         statutes=request.statutes,
         section_title=None,           # not restricting to Section Title here
         page=request.page,
         page_size=request.page_size,
+        cursor=request.cursor,
+        use_cursor=request.use_cursor,
+        estimate_total=request.estimate_total,
     )
     return data
 
 @router.post("/statutes/advanced", response_model=StatutesSearchResponse)
-def statutes_advanced(request: StatutesAdvancedSearchRequest, user=Depends(current_user)):
+async def statutes_advanced(request: StatutesAdvancedSearchRequest, user=Depends(current_user)):
     """
     Advanced Statutes search: only 'section_title' is considered as an extra filter.
     (No dates, judge, or case title here.)
     """
-    data = statutes_search(
+    data = await _cached_statutes_search(
         query=request.query,
         statutes=request.statutes,
         section_title=request.section_title,   # restrict to Section Title if provided
         page=request.page,
         page_size=request.page_size,
+        cursor=request.cursor,
+        use_cursor=request.use_cursor,
+        estimate_total=request.estimate_total,
     )
     return data
 
@@ -220,3 +307,38 @@ def statutes_refine(req: RefineRequest, user=Depends(current_user)):
             )
         )
     return {"docs": refined_docs}
+
+@router.post("/statutes/refine/ids", response_model=RefineResponse)
+def statutes_refine_ids(req: RefineByIdsRequest, user=Depends(current_user)):
+    """
+    Refine Statutes results by reference (see /judgements/refine/ids).
+    """
+    docs = refine_by_ids(
+        refs=[(r.collection, r.id) for r in req.refs],
+        keywords=req.keywords,
+        collections=[CA, SA],
+        max_snippets=req.max_snippets_per_doc,
+        window=req.snippet_window,
+    )
+    return {"docs": docs}
+
+# ========= Endpoints (Facets) =========
+
+@router.get("/facets")
+def facets(user=Depends(current_user)):
+    """
+    Filter facets for the UI, served from the in-process cache (refreshed in the background):
+      - courts: Supreme Court + High Courts, each with a document count and counts per decision year
+      - states: state names with section counts
+      - central_count: number of Central Acts sections
+    """
+    return get_facets()
+
+# ========= Endpoints (Cache) =========
+
+@router.get("/cache/stats")
+def legacy_search_cache_stats(user=Depends(current_user)):
+    """
+    Hit/miss counters and size of the query-result cache.
+    """
+    return cache_stats()
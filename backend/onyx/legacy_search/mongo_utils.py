@@ -1,22 +1,70 @@
 import os
 import re
-import html
+import heapq
+import base64
+import hashlib
+import asyncio
+import itertools
 import datetime as dt
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util  # type: ignore
 
 import pymongo  # type: ignore
 from dotenv import load_dotenv  # type: ignore
 
+from onyx.legacy_search.config import (
+    LEGACY_SEARCH_BOTH_MODE_STRATEGY,
+    LEGACY_SEARCH_COUNT_ESTIMATE_THRESHOLD,
+    LEGACY_SEARCH_MATERIALIZED_FIELDS,
+    LEGACY_SEARCH_MONGO_CONNECT_TIMEOUT_MS,
+    LEGACY_SEARCH_MONGO_MAX_POOL_SIZE,
+    LEGACY_SEARCH_MONGO_MAX_TIME_MS,
+    LEGACY_SEARCH_MONGO_MIN_POOL_SIZE,
+    LEGACY_SEARCH_MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    LEGACY_SEARCH_MONGO_SOCKET_TIMEOUT_MS,
+    LEGACY_SEARCH_REFINE_MAX_IDS,
+)
+from onyx.legacy_search.count_cache import cached_count_async
+from onyx.legacy_search.highlight import highlight_snippets
+from onyx.legacy_search.text_engines import get_text_engine
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+
 load_dotenv()
 
 # ========= Mongo connection (nyayamind DB) =========
-def _mongo():
+def _client_options() -> Dict[str, Any]:
+    return {
+        "maxPoolSize": LEGACY_SEARCH_MONGO_MAX_POOL_SIZE,
+        "minPoolSize": LEGACY_SEARCH_MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": LEGACY_SEARCH_MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": LEGACY_SEARCH_MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": LEGACY_SEARCH_MONGO_SOCKET_TIMEOUT_MS,
+    }
+
+def _connection_url() -> str:
     url = os.environ.get("CONNECTION_URL")
     if not url:
         raise RuntimeError("CONNECTION_URL env var is missing")
-    client = pymongo.MongoClient(url)
+    return url
+
+def _mongo():
+    client = pymongo.MongoClient(_connection_url(), **_client_options())
     return client["nyayamind"]
 
+_ADB = None
+
+def _async_db():
+    """
+    Async handle on the same DB (pymongo's native async client).
+    Created lazily so it binds to the running event loop.
+    """
+    global _ADB
+    if _ADB is None:
+        client = pymongo.AsyncMongoClient(_connection_url(), **_client_options())
+        _ADB = client["nyayamind"]
+    return _ADB
+
 DB = _mongo()
 SC = "sc_cases"
 HC = "hc_cases"
@@ -123,36 +171,30 @@ def get_supported_states() -> List[str]:
     ]
 
 # ========= Text search condition =========
-def _text_condition(query: str) -> Dict[str, Any]:
+def _text_condition(query: str, collection: str = SC) -> Dict[str, Any]:
     """
     Case/variant-tolerant text condition that works for both SC and HC docs.
+    Delegates to the configured full-text engine (regex scan / Mongo $text / local BM25 index).
     """
-    q = (query or "").strip()
-    if not q:
-        return {}
-    rx = {"$regex": re.escape(q), "$options": "i"}
+    return get_text_engine().condition(collection, query)
 
-    # cover common variants across SC/HC
-    return {
-        "$or": [
-            {"all_text": rx},
-            {"content": rx},
+def _text_score_expr(query: str, collection: str) -> Optional[Dict[str, Any]]:
+    """Relevance expression for `sort_by="relevance"`; None when the engine cannot rank."""
+    return get_text_engine().score_expr(collection, query)
 
-            # text fields (hc often has "Text")
-            {"text": rx},
-            {"Text": rx},
-
-            # title fields (hc often has "Title"/"case title")
-            {"title": rx},
-            {"Title": rx},
-            {"case title": rx},
+def ensure_judgement_indexes() -> None:
+    """
+    Compound indexes so `$sort: {sort_date: -1, _id: -1}` is an index walk and
+    court / judge / date-range filters are index range scans.
+    Created by the derived_fields backfill CLI (builds block until done).
+    """
+    ordered = [("sort_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+    DB[SC].create_index(ordered, name="sort_date_id")
+    DB[SC].create_index([("judge_tokens", pymongo.ASCENDING)] + ordered, name="judge_tokens_sort_date_id")
+    DB[HC].create_index(ordered, name="sort_date_id")
+    DB[HC].create_index([("court_label", pymongo.ASCENDING)] + ordered, name="court_label_sort_date_id")
+    DB[HC].create_index([("judge_tokens", pymongo.ASCENDING)] + ordered, name="judge_tokens_sort_date_id")
 
-            # file name variants
-            {"file_name": rx},
-            {"file name": rx},
-        ]
-    }
-    
 # ========= Statutes: text search condition (name/title/text) =========
 def _text_condition_statutes(query: str) -> Dict[str, Any]:
     q = (query or "").strip()
@@ -201,6 +243,10 @@ def _title_regex_from_user(title: str) -> Optional[Dict[str, Any]]:
     return {"$regex": pattern, "$options": "i"}
 
 # ========= Normalizers =========
+def _doc_id(doc: Dict[str, Any]) -> Optional[str]:
+    # string form of _id; pass it back (with `collection`) to the refine-by-ids endpoints
+    return str(doc["_id"]) if doc.get("_id") is not None else None
+
 # Raw outputs (exact field names you asked for)
 def _norm_sc_raw(doc: Dict[str, Any]) -> Dict[str, Any]:
     file_name = doc.get("file_name") or doc.get("title") or ""
@@ -230,6 +276,7 @@ def _norm_sc_raw(doc: Dict[str, Any]) -> Dict[str, Any]:
 
         "source": "SC",
         "collection": SC,
+        "id": _doc_id(doc),
         "_sort_date": sort_date.isoformat() if sort_date else None,
     }
 
@@ -256,6 +303,7 @@ def _norm_hc_raw(doc: Dict[str, Any]) -> Dict[str, Any]:
         "text": text,
         "source": "HC",
         "collection": HC,
+        "id": _doc_id(doc),
         "_sort_date": sort_date.isoformat() if sort_date else None,
     }
 
@@ -296,6 +344,7 @@ def _norm_sc_merged(doc: Dict[str, Any]) -> Dict[str, Any]:
 
         "source": "SC",
         "collection": SC,
+        "id": _doc_id(doc),
         "_sort_date": sort_date.isoformat() if sort_date else None,
     }
 
@@ -335,6 +384,7 @@ def _norm_hc_merged(doc: Dict[str, Any]) -> Dict[str, Any]:
         # context
         "source": "HC",
         "collection": HC,
+        "id": _doc_id(doc),
 
         # internal (not returned after pagination step)
         "_sort_date": sort_date.isoformat() if sort_date else None,
@@ -350,6 +400,7 @@ def _norm_central_raw(doc: Dict[str, Any]) -> Dict[str, Any]:
         "section text":   doc.get("Section Text") or "",
         "source": "CENTRAL",
         "collection": CA,
+        "id": _doc_id(doc),
     }
 
 def _norm_state_raw(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -361,6 +412,7 @@ def _norm_state_raw(doc: Dict[str, Any]) -> Dict[str, Any]:
         "section text":    doc.get("Section Text") or "",
         "source": "STATE",
         "collection": SA,
+        "id": _doc_id(doc),
     }
 
 def _norm_central_merged(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -372,6 +424,7 @@ def _norm_central_merged(doc: Dict[str, Any]) -> Dict[str, Any]:
         "section text":    doc.get("Section Text") or "",
         "source": "CENTRAL",
         "collection": CA,
+        "id": _doc_id(doc),
     }
 
 def _norm_state_merged(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -383,6 +436,7 @@ def _norm_state_merged(doc: Dict[str, Any]) -> Dict[str, Any]:
         "section text":    doc.get("Section Text") or "",
         "source": "STATE",
         "collection": SA,
+        "id": _doc_id(doc),
     }
 
 def _between_dates_expr(field_path: str, fmt: str, start: dt.date, end: dt.date, array_first: bool = False):
@@ -434,6 +488,17 @@ def _hc_label_variants(label: str) -> List[str]:
         out.add(f"High Court of {m2.group(1)}")
     return list(out)
 
+def _canonical_court_label(label: str) -> str:
+    """
+    Single canonical form for all variants of an HC label (stored as `court_label`):
+      'High Court of Delhi' / 'DELHI HIGH COURT' -> 'delhi high court'
+    """
+    s = re.sub(r"\s+", " ", (label or "").strip())
+    m = re.match(r"^High Court (?:of|for the State of)\s+(.+)$", s, flags=re.I)
+    if m:
+        s = f"{m.group(1)} High Court"
+    return s.lower()
+
 _HONORIFICS_RX = re.compile(
     r"\b(hon'?ble|honou?rable|the|chief|justice|judge|cj|jjs?|mr|mrs|ms|dr|shri|smt|sir|lady|lord)\b",
     re.IGNORECASE,
@@ -503,6 +568,45 @@ def _hc_judge_filter_from_input(judge_input: str) -> Optional[Dict[str, Any]]:
         return None
     return {"$or": or_clauses}
 
+def _judge_tokens(*names: Optional[str]) -> List[str]:
+    """
+    Materialized `judge_tokens`: deduped name tokens of every judge on the bench
+    (input may be comma-separated lists and/or lists of names).
+    """
+    out: Dict[str, None] = {}
+    for n in names:
+        for part in (n if isinstance(n, list) else [n]):
+            if not isinstance(part, str):
+                continue
+            for name in part.split(","):
+                for t in _hc_tokenize_name(name):
+                    out[t] = None
+    return list(out)
+
+def _judge_tokens_filter(judge_input: str, prefix: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Materialized counterpart of the judge filters (any listed judge, all of their tokens).
+    HC matched whole name tokens; SC matched any substring of the bench, so with `prefix`
+    each token only has to start a bench token ('chandra' still finds 'D.Y. Chandrachud')
+    while staying an anchored, index-backed match.
+    """
+    ors = []
+    for name in (judge_input or "").split(","):
+        toks = _hc_tokenize_name(name)
+        if toks:
+            terms = [re.compile("^" + re.escape(t)) for t in toks] if prefix else toks
+            ors.append({"judge_tokens": {"$all": terms}})
+    if not ors:
+        return None
+    return ors[0] if len(ors) == 1 else {"$or": ors}
+
+def _sort_date_range(start: dt.date, end: dt.date) -> Dict[str, Any]:
+    """Range filter on the materialized (BSON date) `sort_date` field."""
+    return {"sort_date": {
+        "$gte": dt.datetime(start.year, start.month, start.day),
+        "$lte": dt.datetime(end.year, end.month, end.day),
+    }}
+
 # ======== Server-side sort helpers (dates parsed inside Mongo) ========
 
 def _first_string_expr(field_path: str):
@@ -553,16 +657,22 @@ def _build_sc_match(
     end_date: Optional[dt.date],
 ) -> Dict[str, Any]:
     cond: Dict[str, Any] = {}
-    tc = _text_condition(query)
+    tc = _text_condition(query, SC)
     if tc:
         cond.update(tc)
-    if judge_name:
+    if judge_name and LEGACY_SEARCH_MATERIALIZED_FIELDS:
+        jf = _judge_tokens_filter(judge_name, prefix=True)
+        if jf:
+            cond.setdefault("$and", []).append(jf)
+    elif judge_name:
         rx = {"$regex": re.escape(judge_name), "$options": "i"}
         cond.setdefault("$and", []).append({"$or": [{"judgement_by": rx}, {"bench": rx}]})
     if case_title:
         rx = _title_regex_from_user(case_title) or {"$regex": re.escape(case_title), "$options": "i"}
         cond.setdefault("$and", []).append({"$or": [{"file_name": rx}, {"title": rx}]})
-    if start_date and end_date:
+    if start_date and end_date and LEGACY_SEARCH_MATERIALIZED_FIELDS:
+        cond.setdefault("$and", []).append(_sort_date_range(start_date, end_date))
+    elif start_date and end_date:
         cond.setdefault("$and", []).append({
             "$or": [
                 {"$expr": _between_dates_expr("judgment_dates",   "%d-%m-%Y", start_date, end_date)},
@@ -584,10 +694,13 @@ def _build_hc_match(
     end_date: Optional[dt.date],
 ) -> Dict[str, Any]:
     cond: Dict[str, Any] = {}
-    tc = _text_condition(query)
+    tc = _text_condition(query, HC)
     if tc:
         cond.update(tc)
-    if selected_hc:
+    if selected_hc and LEGACY_SEARCH_MATERIALIZED_FIELDS:
+        labels = sorted({_canonical_court_label(lbl) for lbl in selected_hc})
+        cond.setdefault("$and", []).append({"court_label": {"$in": labels}})
+    elif selected_hc:
         field_ors = []
         for lbl in selected_hc:
             variants = _hc_label_variants(lbl)
@@ -597,7 +710,7 @@ def _build_hc_match(
                 field_ors.append({"Court name": r})
         cond.setdefault("$and", []).append({"$or": field_ors})
     if judge_name:
-        jf = _hc_judge_filter_from_input(judge_name)
+        jf = _judge_tokens_filter(judge_name) if LEGACY_SEARCH_MATERIALIZED_FIELDS else _hc_judge_filter_from_input(judge_name)
         if jf:
             cond.setdefault("$and", []).append(jf)
     if case_title:
@@ -605,7 +718,9 @@ def _build_hc_match(
         cond.setdefault("$and", []).append({
             "$or": [{"title": rx}, {"Title": rx}, {"case title": rx}, {"file_name": rx}, {"file name": rx}]
         })
-    if start_date and end_date:
+    if start_date and end_date and LEGACY_SEARCH_MATERIALIZED_FIELDS:
+        cond.setdefault("$and", []).append(_sort_date_range(start_date, end_date))
+    elif start_date and end_date:
         cond.setdefault("$and", []).append({
             "$or": [
                 {"$expr": _between_dates_expr("decision date", "%d-%m-%Y", start_date, end_date)},
@@ -712,7 +827,7 @@ def _search_hc(
     end_date: Optional[dt.date],
 ) -> List[Dict[str, Any]]:
     cond: Dict[str, Any] = {}
-    tc = _text_condition(query)
+    tc = _text_condition(query, HC)
     if tc:
         cond.update(tc)
 
@@ -783,8 +898,179 @@ def _search_hc(
     docs = list(DB[HC].find(cond, proj).limit(1000))
     return docs
 
-# ========= Unified Judgements search =========
-def judgements_search(
+# ========= Totals =========
+async def _count_async(collection: str, match: Optional[Dict[str, Any]], estimate: bool) -> Tuple[int, bool]:
+    """
+    Cached total for a filter -> (count, is_estimate).
+    With `estimate` counting stops at LEGACY_SEARCH_COUNT_ESTIMATE_THRESHOLD.
+    """
+    if match is None:
+        return 0, False
+    limit = LEGACY_SEARCH_COUNT_ESTIMATE_THRESHOLD if estimate else None
+    return await cached_count_async(
+        collection, match, _async_db()[collection].count_documents, limit=limit,
+        maxTimeMS=LEGACY_SEARCH_MONGO_MAX_TIME_MS,
+    )
+
+# ========= Keyset (cursor) paging =========
+# Fields fetched per page (raw docs are normalized in Python)
+_SC_PAGE_FIELDS = {
+    "file_name": 1, "title": 1, "case_no": 1, "citation": 1,
+    "bench": 1, "judgement_by": 1,
+    "content": 1, "all_text": 1,
+    "judgment_dates": 1, "date_of_judgment": 1, "doc_date": 1,
+    "_sort_date": 1, "sort_date": 1,
+}
+_HC_PAGE_FIELDS = {
+    "Court Name": 1, "Court name": 1,
+    "title": 1, "Title": 1, "case title": 1,
+    "case number": 1, "Case Number": 1,
+    "CNR": 1, "cnr": 1,
+    "decision date": 1, "Decision Date": 1,
+    "disposal nature": 1, "Disposal Nature": 1,
+    "judge": 1, "Judge": 1,
+    "text": 1, "Text": 1, "all_text": 1,
+    "_sort_date": 1, "sort_date": 1,
+}
+_STATUTE_PAGE_FIELDS = {
+    "State Name": 1,
+    "Name of statute": 1, "Name of Statute": 1,
+    "Section Number": 1, "Section Title": 1, "Section Text": 1,
+}
+_PAGE_FIELDS = {SC: _SC_PAGE_FIELDS, HC: _HC_PAGE_FIELDS, CA: _STATUTE_PAGE_FIELDS, SA: _STATUTE_PAGE_FIELDS}
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    """Opaque, URL-safe cursor (Extended JSON keeps ObjectIds and dates typed)."""
+    raw = json_util.dumps(state, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+        state = json_util.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict) or not isinstance(state.get("pos"), dict):
+        raise ValueError("Invalid cursor")
+    return state
+
+def _filters_digest(*matches: Optional[Dict[str, Any]]) -> str:
+    """
+    Short hash of the normalized branch filters, stored in the cursor so a cursor is only
+    accepted for the search it was issued for (its positions mean nothing for other filters).
+    """
+    canon = json_util.dumps(list(matches), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canon.encode("utf-8")).hexdigest()[:16]
+
+def _cursor_state(cursor: Optional[str], mode: str, digest: str, mismatch: str) -> Dict[str, Any]:
+    """The decoded cursor (or the first page's state); rejects cursors of another search."""
+    if not cursor:
+        return {"mode": mode, "q": digest, "page": 1, "pos": {}}
+    state = _decode_cursor(cursor)
+    if state.get("mode") != mode:
+        raise ValueError(mismatch)
+    if state.get("q") != digest:
+        raise ValueError("Cursor does not match the search filters")
+    return state
+
+def _seek_after_date_id(date_key: str, pos: Optional[List[Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Docs strictly after `pos` in `{date_key: -1, _id: -1}` order (null dates sort last).
+    """
+    if not pos:
+        return None
+    last_date, last_id = pos
+    if last_date is None:
+        return {date_key: None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {date_key: {"$lt": last_date}},
+        {date_key: None},
+        {date_key: last_date, "_id": {"$lt": last_id}},
+    ]}
+
+def _seek_after_id(pos: Optional[List[Any]]) -> Optional[Dict[str, Any]]:
+    """Docs strictly after `pos` in `{_id: -1}` order."""
+    if not pos:
+        return None
+    return {"_id": {"$lt": pos[0]}}
+
+def _id_order(v: Any) -> Tuple[int, Any]:
+    """
+    An _id as a sort key in BSON comparison order (numbers < strings < ObjectIds < ...), so ids
+    of different types from different collections compare like Mongo sorts them.
+    """
+    if v is None:
+        return 0, 0
+    if isinstance(v, bool):
+        return 8, v
+    if isinstance(v, (int, float)):
+        return 1, v
+    if isinstance(v, str):
+        return 2, v
+    if isinstance(v, ObjectId):
+        return 7, v
+    if isinstance(v, dt.datetime):
+        return 9, v
+    return 10, str(v)
+
+def _id_key(d: Dict[str, Any]) -> Tuple[Any, ...]:
+    # descending key matching Mongo's {_id: -1}
+    return (_id_order(d["_id"]),)
+
+def _date_id_key(date_key: str, with_score: bool = False) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+    # descending key matching Mongo's {[_score: -1,] date: -1, _id: -1} (nulls last)
+    def key(d: Dict[str, Any]) -> Tuple[Any, ...]:
+        v = d.get(date_key)
+        k = (v is not None, v or dt.datetime.min, _id_order(d["_id"]))
+        return ((d.get("_score") or 0,) + k) if with_score else k
+    return key
+
+def _merge_top(
+    branches: Dict[str, List[Dict[str, Any]]],
+    key: Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    start: int,
+    stop: int,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Slice [start:stop] of the k-way merge of per-branch results (each already sorted
+    descending by `key`), as (branch, doc) pairs. Only `stop` docs are ever pulled.
+    Docs of different branches with equal keys (the same _id in two collections) are
+    ordered by branch name.
+    """
+    streams = [[(name, d) for d in docs] for name, docs in branches.items()]
+    merged = heapq.merge(*streams, key=lambda nd: (key(nd[1]), nd[0]), reverse=True)
+    return list(itertools.islice(merged, start, stop))
+
+def _keyset_merge(
+    pages: Dict[str, List[Dict[str, Any]]],
+    positions: Dict[str, Any],
+    page_size: int,
+    key: Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    position_of: Callable[[Dict[str, Any]], List[Any]],
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any], bool]:
+    """
+    k-way merge of per-branch pages (each already sorted descending by `key` and fetched with
+    limit page_size + 1). Returns the merged page as (branch, doc) pairs, the advanced
+    per-branch positions and whether more results remain.
+    """
+    merged = _merge_top(pages, key, 0, page_size + 1)
+    page_docs = merged[:page_size]
+    new_positions = dict(positions)
+    for name, d in page_docs:
+        new_positions[name] = position_of(d)
+    return page_docs, new_positions, len(merged) > page_size
+
+# ========= Query plans =========
+# A search is first turned into a plan (pure; no I/O against Mongo):
+#   counts:  [(collection, match)]          totals to compute (cached, see _count_async)
+#   queries: {name: (collection, pipeline)} page queries
+#   finish:  (totals, docs) -> response     assembles the response from both
+# Plans that cut the page from light (_id + sort key) branch results also set
+#   page_refs: docs -> [(collection, _id)]  the page, in order; those docs are then fetched
+#                                           by _id and `finish` gets docs = {"page": [(collection, doc)]}
+# The plan is run by _run_plan_async, which issues every count and page query concurrently.
+
+def _judgements_plan(
     query: str,
     courts: List[str],
     judge_name: Optional[str],
@@ -793,6 +1079,10 @@ def judgements_search(
     end_date: Optional[dt.date],
     page: int,
     page_size: int,
+    sort_by: str = "date",
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    estimate_total: bool = False,
 ) -> Dict[str, Any]:
     selected_hc: List[str] = []
     include_sc = False
@@ -811,18 +1101,128 @@ def judgements_search(
     sc_match = _build_sc_match(query, judge_name, case_title, start_date, end_date) if include_sc else None
     hc_match = _build_hc_match(query, selected_hc, judge_name, case_title, start_date, end_date) if selected_hc else None
 
-    # Accurate totals (no artificial cap)
-    sc_total_raw = DB[SC].count_documents(sc_match) if sc_match else 0
-    hc_total_raw = DB[HC].count_documents(hc_match) if hc_match else 0
+    # Relevance ranking is only available when the text engine can score (mongo/local) and there is a query
+    by_relevance = sort_by == "relevance" and bool((query or "").strip())
+    sc_score = _text_score_expr(query, SC) if (by_relevance and include_sc) else None
+    hc_score = _text_score_expr(query, HC) if (by_relevance and selected_hc) else None
+    engine = get_text_engine()
+    # engines that rank outside Mongo (local BM25) hand over their scores by _id instead
+    py_scores = {
+        coll: engine.scores(coll, query)
+        for coll, match in ((SC, sc_match), (HC, hc_match)) if match is not None
+    } if by_relevance else {}
+    # a capped hit list (local engine) leaves matches out of the counts
+    truncated = bool((query or "").strip()) and any(
+        engine.is_truncated(coll, query)
+        for coll, match in ((SC, sc_match), (HC, hc_match)) if match is not None
+    )
+    # With materialized fields the sort is on the indexed `sort_date`; otherwise dates are parsed per query
+    date_key = "sort_date" if LEGACY_SEARCH_MATERIALIZED_FIELDS else "_sort_date"
+    sort_spec = {"_score": -1, date_key: -1, "_id": -1} if (sc_score or hc_score) else {date_key: -1, "_id": -1}
+
+    def _sort_stages(date_expr, score_expr):
+        fields = {}
+        if not LEGACY_SEARCH_MATERIALIZED_FIELDS:
+            fields["_sort_date"] = date_expr
+        if "_score" in sort_spec:
+            fields["_score"] = score_expr if score_expr else {"$literal": 0}
+        return [{"$addFields": fields}] if fields else []
+
+    # Totals (cached per filter; capped when estimate_total is set)
+    counts = [(SC, sc_match), (HC, hc_match)]
+
+    def _totals(totals):
+        (sc_total_raw, sc_estimated), (hc_total_raw, hc_estimated) = totals[SC], totals[HC]
+        return sc_total_raw, hc_total_raw, sc_estimated or hc_estimated or truncated
+
+    if cursor or use_cursor:
+        if "_score" in sort_spec:
+            raise ValueError("Cursor paging is only supported with sort_by='date'")
+        digest = _filters_digest(sc_match, hc_match)
+        state = _cursor_state(cursor, mode, digest, "Cursor does not match the selected courts")
+
+        def _branch_page(coll, match, date_expr, fields):
+            seek = _seek_after_date_id(date_key, state["pos"].get(coll))
+            pipeline = [{"$match": match or {}}, *_sort_stages(date_expr, None)]
+            if seek:
+                pipeline.append({"$match": seek})
+            pipeline += [{"$sort": sort_spec}, {"$limit": page_size + 1}, {"$project": fields}]
+            return coll, pipeline
+
+        queries: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+        if sc_match is not None:
+            queries[SC] = _branch_page(SC, sc_match, _sc_sort_date_expr(), _SC_PAGE_FIELDS)
+        if hc_match is not None:
+            queries[HC] = _branch_page(HC, hc_match, _hc_sort_date_expr(), _HC_PAGE_FIELDS)
+
+        def finish_cursor(totals, pages):
+            sc_total_raw, hc_total_raw, total_is_estimate = _totals(totals)
+            page_docs, positions, has_more = _keyset_merge(
+                pages, state["pos"], page_size, _date_id_key(date_key),
+                lambda d: [d.get(date_key), d["_id"]],
+            )
+            if mode == "both":
+                results = [_norm_sc_merged(d) if coll == SC else _norm_hc_merged(d) for coll, d in page_docs]
+            else:
+                results = [_norm_sc_raw(d) if coll == SC else _norm_hc_raw(d) for coll, d in page_docs]
+            for r in results:
+                r.pop("_sort_date", None)
+
+            return {
+                "results": results,
+                "total": sc_total_raw + hc_total_raw,
+                "page": state.get("page", 1),
+                "page_size": page_size,
+                "has_more": has_more,
+                "sc_total": sc_total_raw,
+                "hc_total": hc_total_raw,
+                "total_is_estimate": total_is_estimate,
+                "next_cursor": _encode_cursor(
+                    {"mode": mode, "q": digest, "page": state.get("page", 1) + 1, "pos": positions}
+                ) if has_more else None,
+            }
+
+        return {"counts": counts, "estimate_total": estimate_total, "queries": queries, "finish": finish_cursor}
+
+    def _norm(coll, d):
+        if mode == "both":
+            return _norm_sc_merged(d) if coll == SC else _norm_hc_merged(d)
+        return _norm_sc_raw(d) if coll == SC else _norm_hc_raw(d)
+
+    page_refs = None
+    if py_scores and all(scores is not None for scores in py_scores.values()):
+        # Each branch returns only (_id, date) of its matches (bounded by the engine's hit cap);
+        # the page is ranked and cut in Python, then fetched by _id (see _run_plan_async)
+        date_exprs = {SC: _sc_sort_date_expr(), HC: _hc_sort_date_expr()}
+        matches = {SC: sc_match, HC: hc_match}
+        queries = {
+            coll: (coll, [
+                {"$match": matches[coll] or {}},
+                *_sort_stages(date_exprs[coll], None),
+                {"$project": {"_id": 1, date_key: 1}},
+            ])
+            for coll in py_scores
+        }
+        rank_key = _date_id_key(date_key, with_score=True)
 
-    # Aggregated, server-side sorted + paged results
-    results: List[Dict[str, Any]] = []
+        def page_refs(docs):
+            ranked = {
+                coll: sorted(
+                    ({**d, "_score": py_scores[coll].get(d["_id"], 0.0)} for d in coll_docs),
+                    key=rank_key, reverse=True,
+                )
+                for coll, coll_docs in docs.items()
+            }
+            return [(coll, d["_id"]) for coll, d in _merge_top(ranked, rank_key, start, start + page_size)]
+
+        select = lambda docs: [_norm(coll, d) for coll, d in docs["page"]]  # noqa: E731
 
-    if mode == "sc":
+    # Aggregated, server-side sorted + paged results
+    elif mode == "sc":
         pipeline = [
             {"$match": sc_match or {}},
-            {"$addFields": {"_sort_date": _sc_sort_date_expr()}},
-            {"$sort": {"_sort_date": -1, "_id": -1}},
+            *_sort_stages(_sc_sort_date_expr(), sc_score),
+            {"$sort": sort_spec},
             {"$skip": start},
             {"$limit": page_size},
             {"$project": {
@@ -832,14 +1232,14 @@ def judgements_search(
                 "judgment_dates": 1, "date_of_judgment": 1, "doc_date": 1,
             }},
         ]
-        docs = list(DB[SC].aggregate(pipeline))
-        results = [_norm_sc_raw(d) for d in docs]
+        queries = {"page": (SC, pipeline)}
+        select = lambda docs: [_norm_sc_raw(d) for d in docs["page"]]  # noqa: E731
 
     elif mode == "hc":
         pipeline = [
             {"$match": hc_match or {}},
-            {"$addFields": {"_sort_date": _hc_sort_date_expr()}},
-            {"$sort": {"_sort_date": -1, "_id": -1}},
+            *_sort_stages(_hc_sort_date_expr(), hc_score),
+            {"$sort": sort_spec},
             {"$skip": start},
             {"$limit": page_size},
             {"$project": {
@@ -853,13 +1253,42 @@ def judgements_search(
                 "text": 1, "Text": 1, "all_text": 1,
             }},
         ]
-        docs = list(DB[HC].aggregate(pipeline))
-        results = [_norm_hc_raw(d) for d in docs]
+        queries = {"page": (HC, pipeline)}
+        select = lambda docs: [_norm_hc_raw(d) for d in docs["page"]]  # noqa: E731
+
+    elif LEGACY_SEARCH_BOTH_MODE_STRATEGY == "fanout":
+        # mode == "both": SC and HC each return the sort keys of their own index-sorted top
+        # (start + page_size), queried concurrently; the page is cut from their merge in Python
+        # and only its docs are fetched (see _run_plan_async)
+        top_k = start + page_size
+        light_fields = {"_id": 1, date_key: 1, "_score": 1}
+        queries = {
+            SC: (SC, [
+                {"$match": sc_match or {}},
+                *_sort_stages(_sc_sort_date_expr(), sc_score),
+                {"$sort": sort_spec},
+                {"$limit": top_k},
+                {"$project": light_fields},
+            ]),
+            HC: (HC, [
+                {"$match": hc_match or {}},
+                *_sort_stages(_hc_sort_date_expr(), hc_score),
+                {"$sort": sort_spec},
+                {"$limit": top_k},
+                {"$project": light_fields},
+            ]),
+        }
+        merge_key = _date_id_key(date_key, with_score="_score" in sort_spec)
+
+        def page_refs(docs):
+            return [(coll, d["_id"]) for coll, d in _merge_top(docs, merge_key, start, top_k)]
+
+        select = lambda docs: [_norm(coll, d) for coll, d in docs["page"]]  # noqa: E731
 
     else:  # mode == "both" (SC + HC) → merged stream, sorted once, then paged
         sc_branch = [
             {"$match": sc_match or {}},
-            {"$addFields": {"_sort_date": _sc_sort_date_expr()}},
+            *_sort_stages(_sc_sort_date_expr(), sc_score),
             {"$project": {
                 # pass through fields needed by _norm_sc_merged
                 "file_name": 1, "title": 1, "case_no": 1, "citation": 1,
@@ -867,12 +1296,12 @@ def judgements_search(
                 "content": 1, "all_text": 1,
                 "judgment_dates": 1, "date_of_judgment": 1, "doc_date": 1,
                 "source": {"$literal": "SC"}, "collection": {"$literal": SC},
-                "_sort_date": 1,
+                "_sort_date": 1, "sort_date": 1, "_score": 1,
             }},
         ]
         hc_branch = [
             {"$match": hc_match or {}},
-            {"$addFields": {"_sort_date": _hc_sort_date_expr()}},
+            *_sort_stages(_hc_sort_date_expr(), hc_score),
             {"$project": {
                 # pass through fields needed by _norm_hc_merged
                 "Court Name": 1, "Court name": 1,
@@ -884,50 +1313,58 @@ def judgements_search(
                 "judge": 1, "Judge": 1,
                 "text": 1, "Text": 1, "all_text": 1,
                 "source": {"$literal": "HC"}, "collection": {"$literal": HC},
-                "_sort_date": 1,
+                "_sort_date": 1, "sort_date": 1, "_score": 1,
             }},
         ]
 
         pipeline = sc_branch + [
             {"$unionWith": {"coll": HC, "pipeline": hc_branch}},
-            {"$sort": {"_sort_date": -1, "_id": -1}},
+            {"$sort": sort_spec},
             {"$skip": start},
             {"$limit": page_size},
         ]
-        docs = list(DB[SC].aggregate(pipeline))
-
-        merged: List[Dict[str, Any]] = []
-        for d in docs:
-            if d.get("source") == "SC":
-                merged.append(_norm_sc_merged(d))
-            else:
-                merged.append(_norm_hc_merged(d))
-        results = merged
-
-    total = sc_total_raw + hc_total_raw
-    has_more = (page * page_size) < total
+        queries = {"page": (SC, pipeline)}
+        select = lambda docs: [  # noqa: E731
+            _norm_sc_merged(d) if d.get("source") == "SC" else _norm_hc_merged(d) for d in docs["page"]
+        ]
 
-    # remove helper if present
-    for r in results:
-        r.pop("_sort_date", None)
+    def finish(totals, docs):
+        sc_total_raw, hc_total_raw, total_is_estimate = _totals(totals)
+        results = select(docs)
+
+        total = sc_total_raw + hc_total_raw
+        # an estimated total is a lower bound, so a full page may still be followed by more
+        has_more = (page * page_size) < total or (total_is_estimate and len(results) == page_size)
+
+        # remove helper if present
+        for r in results:
+            r.pop("_sort_date", None)
+
+        return {
+            "results": results,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more,
+            "sc_total": sc_total_raw,
+            "hc_total": hc_total_raw,
+            "total_is_estimate": total_is_estimate,
+        }
 
     return {
-        "results": results,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "has_more": has_more,
-        "sc_total": sc_total_raw,
-        "hc_total": hc_total_raw,
+        "counts": counts, "estimate_total": estimate_total, "queries": queries,
+        "page_refs": page_refs, "finish": finish,
     }
-    
-# ========= Unified Statutes search (NEW) =========
-def statutes_search(
+
+def _statutes_plan(
     query: str,
     statutes: List[str],
     section_title: Optional[str],
     page: int,
     page_size: int,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    estimate_total: bool = False,
 ) -> Dict[str, Any]:
     # Selection parsing
     include_central = False
@@ -950,12 +1387,58 @@ def statutes_search(
     ca_match = _build_central_match(query, section_title) if include_central else None
     sa_match = _build_state_match(query, selected_states, section_title) if selected_states else None
 
-    # Accurate totals
-    central_total_raw = DB[CA].count_documents(ca_match) if ca_match else 0
-    state_total_raw   = DB[SA].count_documents(sa_match) if sa_match else 0
-
-    results: List[Dict[str, Any]] = []
-
+    # Totals (cached per filter; capped when estimate_total is set)
+    counts = [(CA, ca_match), (SA, sa_match)]
+
+    def _totals(totals):
+        (central_total_raw, central_estimated), (state_total_raw, state_estimated) = totals[CA], totals[SA]
+        return central_total_raw, state_total_raw, central_estimated or state_estimated
+
+    if cursor or use_cursor:
+        digest = _filters_digest(ca_match, sa_match)
+        state = _cursor_state(cursor, mode, digest, "Cursor does not match the selected statutes")
+
+        def _branch_page(coll, match):
+            seek = _seek_after_id(state["pos"].get(coll))
+            pipeline = [{"$match": match or {}}]
+            if seek:
+                pipeline.append({"$match": seek})
+            pipeline += [{"$sort": {"_id": -1}}, {"$limit": page_size + 1}, {"$project": _STATUTE_PAGE_FIELDS}]
+            return coll, pipeline
+
+        queries: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+        if ca_match is not None:
+            queries[CA] = _branch_page(CA, ca_match)
+        if sa_match is not None:
+            queries[SA] = _branch_page(SA, sa_match)
+
+        def finish_cursor(totals, pages):
+            central_total_raw, state_total_raw, total_is_estimate = _totals(totals)
+            page_docs, positions, has_more = _keyset_merge(
+                pages, state["pos"], page_size, _id_key, lambda d: [d["_id"]],
+            )
+            if mode == "both":
+                results = [_norm_central_merged(d) if coll == CA else _norm_state_merged(d) for coll, d in page_docs]
+            else:
+                results = [_norm_central_raw(d) if coll == CA else _norm_state_raw(d) for coll, d in page_docs]
+
+            return {
+                "results": results,
+                "total": central_total_raw + state_total_raw,
+                "page": state.get("page", 1),
+                "page_size": page_size,
+                "has_more": has_more,
+                "central_total": central_total_raw,
+                "state_total": state_total_raw,
+                "total_is_estimate": total_is_estimate,
+                "next_cursor": _encode_cursor(
+                    {"mode": mode, "q": digest, "page": state.get("page", 1) + 1, "pos": positions}
+                ) if has_more else None,
+            }
+
+        return {"counts": counts, "estimate_total": estimate_total, "queries": queries, "finish": finish_cursor}
+
+    page_refs = None
     if mode == "central":
         pipeline = [
             {"$match": ca_match or {}},
@@ -967,8 +1450,8 @@ def statutes_search(
                 "Section Number": 1, "Section Title": 1, "Section Text": 1,
             }},
         ]
-        docs = list(DB[CA].aggregate(pipeline))
-        results = [_norm_central_raw(d) for d in docs]
+        queries = {"page": (CA, pipeline)}
+        select = lambda docs: [_norm_central_raw(d) for d in docs["page"]]  # noqa: E731
 
     elif mode == "state":
         pipeline = [
@@ -982,8 +1465,31 @@ def statutes_search(
                 "Section Number": 1, "Section Title": 1, "Section Text": 1,
             }},
         ]
-        docs = list(DB[SA].aggregate(pipeline))
-        results = [_norm_state_raw(d) for d in docs]
+        queries = {"page": (SA, pipeline)}
+        select = lambda docs: [_norm_state_raw(d) for d in docs["page"]]  # noqa: E731
+
+    elif LEGACY_SEARCH_BOTH_MODE_STRATEGY == "fanout":
+        # both central + state(s): each branch returns the _ids of its top (start + page_size),
+        # queried concurrently; the page is cut from their merge and then fetched by _id
+        top_k = start + page_size
+        queries = {
+            coll: (coll, [
+                {"$match": match or {}},
+                {"$sort": {"_id": -1}},
+                {"$limit": top_k},
+                {"$project": {"_id": 1}},
+            ])
+            for coll, match in ((CA, ca_match), (SA, sa_match))
+        }
+
+        def page_refs(docs):
+            return [(coll, d["_id"]) for coll, d in _merge_top(docs, _id_key, start, top_k)]
+
+        def select(docs):
+            return [
+                _norm_central_merged(d) if coll == CA else _norm_state_merged(d)
+                for coll, d in docs["page"]
+            ]
 
     else:  # both central + state(s)
         ca_branch = [
@@ -1009,29 +1515,128 @@ def statutes_search(
             {"$skip": start},
             {"$limit": page_size},
         ]
-        docs = list(DB[CA].aggregate(pipeline))
-
-        merged = []
-        for d in docs:
-            if d.get("source") == "CENTRAL":
-                merged.append(_norm_central_merged(d))
-            else:
-                merged.append(_norm_state_merged(d))
-        results = merged
+        queries = {"page": (CA, pipeline)}
+        select = lambda docs: [  # noqa: E731
+            _norm_central_merged(d) if d.get("source") == "CENTRAL" else _norm_state_merged(d)
+            for d in docs["page"]
+        ]
 
-    total = central_total_raw + state_total_raw
-    has_more = (page * page_size) < total
+    def finish(totals, docs):
+        central_total_raw, state_total_raw, total_is_estimate = _totals(totals)
+        results = select(docs)
+
+        total = central_total_raw + state_total_raw
+        # an estimated total is a lower bound, so a full page may still be followed by more
+        has_more = (page * page_size) < total or (total_is_estimate and len(results) == page_size)
+
+        return {
+            "results": results,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more,
+            "central_total": central_total_raw,
+            "state_total": state_total_raw,
+            "total_is_estimate": total_is_estimate,
+        }
 
     return {
-        "results": results,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "has_more": has_more,
-        "central_total": central_total_raw,
-        "state_total": state_total_raw,
+        "counts": counts, "estimate_total": estimate_total, "queries": queries,
+        "page_refs": page_refs, "finish": finish,
     }
-    
+
+# ========= Plan executor =========
+async def _aggregate_async(coll: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    cur = await _async_db()[coll].aggregate(pipeline, maxTimeMS=LEGACY_SEARCH_MONGO_MAX_TIME_MS)
+    return await cur.to_list(None)
+
+async def _find_by_ids_async(coll: str, ids: List[Any]) -> List[Dict[str, Any]]:
+    cur = _async_db()[coll].find(
+        {"_id": {"$in": ids}}, _PAGE_FIELDS[coll], max_time_ms=LEGACY_SEARCH_MONGO_MAX_TIME_MS,
+    )
+    return await cur.to_list(None)
+
+async def _fetch_page_async(refs: List[Tuple[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Docs of a page given as ordered (collection, _id) refs; one query per collection."""
+    by_coll: Dict[str, List[Any]] = {}
+    for coll, doc_id in refs:
+        by_coll.setdefault(coll, []).append(doc_id)
+    colls = list(by_coll)
+    fetched = await asyncio.gather(*(_find_by_ids_async(coll, by_coll[coll]) for coll in colls))
+    found = {(coll, d["_id"]): d for coll, coll_docs in zip(colls, fetched) for d in coll_docs}
+    # a doc deleted since the first query is simply left out
+    return [(coll, found[(coll, doc_id)]) for coll, doc_id in refs if (coll, doc_id) in found]
+
+async def _run_plan_async(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Every count and page query of the plan runs concurrently on the async client."""
+    count_colls = [coll for coll, _ in plan["counts"]]
+    names = list(plan["queries"].keys())
+    out = await asyncio.gather(
+        *(_count_async(coll, match, plan["estimate_total"]) for coll, match in plan["counts"]),
+        *(_aggregate_async(coll, pipeline) for coll, pipeline in plan["queries"].values()),
+    )
+    totals = dict(zip(count_colls, out[:len(count_colls)]))
+    docs = dict(zip(names, out[len(count_colls):]))
+    if plan.get("page_refs") is not None:
+        docs = {"page": await _fetch_page_async(plan["page_refs"](docs))}
+    return plan["finish"](totals, docs)
+
+# ========= Unified Judgements search =========
+async def judgements_search_async(
+    query: str,
+    courts: List[str],
+    judge_name: Optional[str],
+    case_title: Optional[str],
+    start_date: Optional[dt.date],
+    end_date: Optional[dt.date],
+    page: int,
+    page_size: int,
+    sort_by: str = "date",
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    estimate_total: bool = False,
+) -> Dict[str, Any]:
+    """
+    SC/HC counts and page queries run concurrently on the async client.
+
+    Totals are cached per normalized filter; `estimate_total` caps counting and reports
+    `total_is_estimate`.
+
+    Offset paging (`page`) by default. With `use_cursor=True` (first page) or a `cursor`
+    from a previous response, pages are fetched by seeking on (sort date, _id) instead of
+    $skip, and the response carries `next_cursor`.
+    """
+    # plan building may read the local text index from disk, keep it off the event loop
+    plan = await asyncio.to_thread(
+        _judgements_plan,
+        query, courts, judge_name, case_title, start_date, end_date, page, page_size,
+        sort_by=sort_by, cursor=cursor, use_cursor=use_cursor, estimate_total=estimate_total,
+    )
+    return await _run_plan_async(plan)
+
+# ========= Unified Statutes search (NEW) =========
+async def statutes_search_async(
+    query: str,
+    statutes: List[str],
+    section_title: Optional[str],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    estimate_total: bool = False,
+) -> Dict[str, Any]:
+    """
+    Central/state counts and page queries run concurrently. Totals are cached / estimated
+    as in judgements_search_async.
+
+    Offset paging by default; `use_cursor` / `cursor` switch to keyset paging on `_id`
+    (see judgements_search_async).
+    """
+    return await _run_plan_async(_statutes_plan(
+        query, statutes, section_title, page, page_size,
+        cursor=cursor, use_cursor=use_cursor, estimate_total=estimate_total,
+    ))
+
 # ========= Highlight snippets builder =========
 _HIGHLIGHT_FIELDS = [
     # Judgements
@@ -1043,72 +1648,93 @@ _HIGHLIGHT_FIELDS = [
     "state name",
 ]
 
-def _compile_keyword_regexes(keywords: List[str]):
-    regs = []
-    for kw in keywords or []:
-        kw = (kw or "").strip()
-        if not kw:
-            continue
-        regs.append(re.compile(re.escape(kw), re.IGNORECASE))
-    return regs
-
-def _highlight_text(raw: str, regs: List[re.Pattern]) -> str:
-    if not raw:
-        return ""
-    safe = html.escape(str(raw))  # avoid HTML injection
-    for rx in regs:
-        safe = rx.sub(lambda m: f"<mark>{m.group(0)}</mark>", safe)
-    return safe
-
-def _extract_snippets(raw: str, regs: List[re.Pattern], max_snippets: int, window: int) -> List[str]:
-    if not raw or not regs:
-        return []
-    text = str(raw)
-    hits = []
-    for rx in regs:
-        for m in rx.finditer(text):
-            s = max(0, m.start() - window)
-            e = min(len(text), m.end() + window)
-            hits.append((s, e))
-    if not hits:
-        return []
-    hits.sort()
-    merged = []
-    cur_s, cur_e = hits[0]
-    for s, e in hits[1:]:
-        if s <= cur_e + 10:
-            cur_e = max(cur_e, e)
-        else:
-            merged.append((cur_s, cur_e))
-            cur_s, cur_e = s, e
-    merged.append((cur_s, cur_e))
-    merged = merged[:max_snippets]
-    return [_highlight_text(text[s:e], regs) for s, e in merged]
-
 def build_highlight_snippets(
     doc: Dict[str, Any],
     keywords: List[str],
     max_snippets: int = 3,
     window: int = 120,
 ) -> Dict[str, Any]:
-    regs = _compile_keyword_regexes(keywords)
-
     raw_text = ""
     for f in _HIGHLIGHT_FIELDS:
         if doc.get(f):
             raw_text = str(doc.get(f))
             break
 
-    snippets = _extract_snippets(raw_text, regs, max_snippets, window)
-    match_count = 0
-    for rx in regs:
-        match_count += len(list(rx.finditer(raw_text)))
+    match_count, snippets = highlight_snippets(raw_text, keywords, max_snippets, window)
 
     return {
         "source": doc.get("source"),
         "collection": doc.get("collection"),
+        "id": doc.get("id"),
         "file_name": doc.get("file_name"),
         "title": doc.get("title"),
         "match_count": match_count,
         "snippets": snippets,
     }
+
+# ========= Refine by result ids =========
+# Only the field the snippets come from is fetched (first non-empty, in this order)
+_REFINE_TEXT_FIELDS = {
+    SC: ["content", "all_text", "title", "file_name"],
+    HC: ["text", "Text", "all_text", "title", "Title", "case title"],
+    CA: ["Section Text", "Section Title", "Name of statute", "Name of Statute"],
+    SA: ["Section Text", "Section Title", "Name of statute", "Name of Statute"],
+}
+_REFINE_SOURCES = {SC: "SC", HC: "HC", CA: "CENTRAL", SA: "STATE"}
+
+def _as_object_id(value: str) -> Any:
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+def _fetch_refine_docs(collection: str, ids: List[Any]) -> List[Dict[str, Any]]:
+    fields = _REFINE_TEXT_FIELDS[collection]
+    projection = {f: 1 for f in fields + ["file_name", "title", "Title", "case title"]}
+    return list(DB[collection].find(
+        {"_id": {"$in": ids}}, projection, max_time_ms=LEGACY_SEARCH_MONGO_MAX_TIME_MS,
+    ))
+
+def refine_by_ids(
+    refs: List[Tuple[str, str]],
+    keywords: List[str],
+    collections: List[str],
+    max_snippets: int = 3,
+    window: int = 120,
+) -> List[Dict[str, Any]]:
+    """
+    Highlight a page of results given only their (collection, id) refs.
+
+    The snippet text is fetched with one query per collection (run concurrently) and every
+    doc is scanned once for all keywords. Docs come back in request order; refs that no
+    longer resolve are skipped.
+    """
+    if len(refs) > LEGACY_SEARCH_REFINE_MAX_IDS:
+        raise ValueError(f"At most {LEGACY_SEARCH_REFINE_MAX_IDS} results can be refined at once")
+
+    by_coll: Dict[str, List[Any]] = {}
+    for coll, doc_id in refs:
+        if coll not in collections:
+            raise ValueError(f"Unknown collection for refine: {coll}")
+        by_coll.setdefault(coll, []).append(_as_object_id(doc_id))
+
+    colls = list(by_coll)
+    fetched = run_functions_tuples_in_parallel(
+        [(_fetch_refine_docs, (coll, by_coll[coll])) for coll in colls]
+    )
+    docs = {(coll, str(d["_id"])): d for coll, coll_docs in zip(colls, fetched) for d in coll_docs}
+
+    refined = []
+    for coll, doc_id in refs:
+        doc = docs.get((coll, str(doc_id)))
+        if doc is None:
+            continue
+        raw_text = next((str(doc[f]) for f in _REFINE_TEXT_FIELDS[coll] if doc.get(f)), "")
+        match_count, snippets = highlight_snippets(raw_text, keywords, max_snippets, window)
+        refined.append({
+            "source": _REFINE_SOURCES[coll],
+            "collection": coll,
+            "id": str(doc_id),
+            "file_name": doc.get("file_name"),
+            "title": doc.get("title") or doc.get("Title") or doc.get("case title"),
+            "match_count": match_count,
+            "snippets": snippets,
+        })
+    return refined
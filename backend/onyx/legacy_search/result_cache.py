@@ -0,0 +1,145 @@
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from onyx.legacy_search.config import (
+    LEGACY_SEARCH_RESULT_CACHE_ENABLED,
+    LEGACY_SEARCH_RESULT_CACHE_MAX_ENTRIES,
+    LEGACY_SEARCH_RESULT_CACHE_TTL,
+)
+from onyx.legacy_search.count_cache import generation_key
+from onyx.redis.redis_pool import get_async_redis_connection
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Keys are namespaced explicitly: the cached data is shared across tenants/workers
+_PREFIX = "legacy_search"
+_LRU_KEY = f"{_PREFIX}:result:lru"          # zset: entry key -> last access time
+_HITS_KEY = f"{_PREFIX}:result:hits"
+_MISSES_KEY = f"{_PREFIX}:result:misses"
+
+
+# Free-text params, matched case-insensitively; everything else (sort_by, statute
+# selections, ...) is compared exactly downstream and must keep its case
+_TEXT_PARAMS = {"query", "judge_name", "case_title", "section_title", "courts"}
+
+
+def _norm_text(v: Any) -> Any:
+    # case/spacing variants of the same text share an entry
+    if isinstance(v, str):
+        return " ".join(v.split()).lower()
+    if isinstance(v, list):
+        return sorted(_norm_text(x) for x in v)
+    return v
+
+
+def _norm_param(k: str, v: Any) -> Any:
+    if k in _TEXT_PARAMS:
+        return _norm_text(v)
+    # selections are order-insensitive
+    return sorted(v) if isinstance(v, list) else v
+
+
+def canonical_request(params: Dict[str, Any]) -> str:
+    """
+    Canonical JSON of a search request: text normalized, selections sorted, dates as ISO.
+    """
+    canon = {k: _norm_param(k, v) for k, v in params.items() if k != "cursor"}
+    # cursors are opaque but exact; keep them verbatim
+    canon["cursor"] = params.get("cursor")
+    return json.dumps(canon, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _entry_key(gens: List[Any], kind: str, params: Dict[str, Any]) -> str:
+    gen_part = ".".join((g.decode() if isinstance(g, bytes) else str(g or 0)) for g in gens)
+    digest = hashlib.sha1(canonical_request(params).encode("utf-8")).hexdigest()
+    return f"{_PREFIX}:result:{kind}:{gen_part}:{digest}"
+
+
+async def cached_search_async(
+    kind: str,
+    collections: List[str],
+    params: Dict[str, Any],
+    compute: Callable[..., Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Serve `await compute(**params)` from Redis when possible. Fails open: any Redis error
+    falls back to computing the result.
+    """
+    if not LEGACY_SEARCH_RESULT_CACHE_ENABLED:
+        return await compute(**params)
+
+    try:
+        r = await get_async_redis_connection()
+        key = _entry_key(await r.mget([generation_key(c) for c in collections]), kind, params)
+        raw = await r.get(key)
+    except Exception as e:
+        logger.warning(f"legacy search cache unavailable: {e}")
+        return await compute(**params)
+
+    if raw is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.incr(_HITS_KEY)
+            pipe.zadd(_LRU_KEY, {key: time.time()})
+            await pipe.execute()
+        except Exception:
+            pass
+        return json.loads(raw)
+
+    result = await compute(**params)
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.incr(_MISSES_KEY)
+        pipe.set(key, json.dumps(result, default=str), ex=LEGACY_SEARCH_RESULT_CACHE_TTL)
+        pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.zremrangebyscore(_LRU_KEY, "-inf", time.time() - LEGACY_SEARCH_RESULT_CACHE_TTL)
+        pipe.zcard(_LRU_KEY)
+        *_, size = await pipe.execute()
+        excess = size - LEGACY_SEARCH_RESULT_CACHE_MAX_ENTRIES
+        if excess > 0:
+            victims = [k for k, _ in await r.zpopmin(_LRU_KEY, excess)]
+            if victims:
+                await r.delete(*victims)
+    except Exception as e:
+        logger.warning(f"legacy search cache write failed: {e}")
+    return result
+
+
+def invalidate_search_caches(collection: Optional[str] = None) -> None:
+    """
+    Called on ingest: drops cached results and totals for `collection` (all when None).
+    Bumping the collection generation in Redis orphans every result and count entry that
+    included it, in every worker.
+    """
+    try:
+        r = get_raw_redis_client()
+        if collection is None:
+            for key in r.scan_iter(f"{_PREFIX}:gen:*"):
+                r.incr(key)
+        else:
+            r.incr(generation_key(collection))
+    except Exception as e:
+        logger.warning(f"legacy search cache invalidation failed: {e}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    try:
+        r = get_raw_redis_client()
+        hits, misses = (int(v or 0) for v in r.mget([_HITS_KEY, _MISSES_KEY]))
+        entries = r.zcard(_LRU_KEY)
+    except Exception as e:
+        return {"enabled": LEGACY_SEARCH_RESULT_CACHE_ENABLED, "error": str(e)}
+    total = hits + misses
+    return {
+        "enabled": LEGACY_SEARCH_RESULT_CACHE_ENABLED,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "entries": entries,
+        "max_entries": LEGACY_SEARCH_RESULT_CACHE_MAX_ENTRIES,
+        "ttl_seconds": LEGACY_SEARCH_RESULT_CACHE_TTL,
+    }
@@ -0,0 +1,372 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId  # type: ignore
+
+from onyx.legacy_search.config import (
+    LEGACY_SEARCH_BM25_B,
+    LEGACY_SEARCH_BM25_K1,
+    LEGACY_SEARCH_INDEX_DIR,
+    LEGACY_SEARCH_LOCAL_MAX_HITS,
+    LEGACY_SEARCH_TEXT_ENGINE,
+)
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Text/title/file-name variants across SC and HC docs (hc often has "Text"/"Title"/"case title")
+JUDGEMENT_TEXT_FIELDS = [
+    "all_text", "content",
+    "text", "Text",
+    "title", "Title", "case title",
+    "file_name", "file name",
+]
+
+# Title-ish fields get a higher weight in the Mongo $text index
+_TITLE_FIELDS = {"title", "Title", "case title", "file_name", "file name"}
+
+_TOKEN_RX = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Lower-cased word tokens; the same normalization is used at index and query time.
+    """
+    if not text:
+        return []
+    return _TOKEN_RX.findall(str(text).lower())
+
+
+def judgement_index_text(doc: Dict[str, Any]) -> str:
+    """
+    Concatenate every searchable field of a judgement (SC or HC) into one string.
+    """
+    parts = []
+    for f in JUDGEMENT_TEXT_FIELDS:
+        v = doc.get(f)
+        if isinstance(v, str) and v:
+            parts.append(v)
+    return "\n".join(parts)
+
+
+def _to_mongo_id(ext_id: str) -> Any:
+    return ObjectId(ext_id) if ObjectId.is_valid(ext_id) else ext_id
+
+
+# ========= Engines =========
+
+class TextIndexUnavailable(RuntimeError):
+    """The configured engine's index is missing, so searches cannot be answered."""
+
+
+class TextSearchEngine:
+    """
+    A full-text engine turns a user query into:
+      - a Mongo filter restricting the collection to matching docs (`condition`)
+      - optionally, a relevance score: an aggregation expression (`score_expr`) or, for
+        engines that rank outside Mongo, the scores of the matching docs by `_id` (`scores`)
+    """
+
+    name = "base"
+
+    def condition(self, collection: str, query: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def score_expr(self, collection: str, query: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def scores(self, collection: str, query: str) -> Optional[Dict[Any, float]]:
+        return None
+
+    def is_truncated(self, collection: str, query: str) -> bool:
+        """Whether `condition` left out matching docs (totals are then a lower bound)."""
+        return False
+
+
+class RegexTextEngine(TextSearchEngine):
+    """
+    Case-insensitive unanchored $regex over every text variant. Needs no index, scans the collection.
+    """
+
+    name = "regex"
+
+    def condition(self, collection: str, query: str) -> Dict[str, Any]:
+        q = (query or "").strip()
+        if not q:
+            return {}
+        rx = {"$regex": re.escape(q), "$options": "i"}
+        return {"$or": [{f: rx} for f in JUDGEMENT_TEXT_FIELDS]}
+
+
+class MongoTextEngine(TextSearchEngine):
+    """
+    MongoDB $text index over the same fields; ranking by textScore.
+    The index itself is created by `python -m onyx.legacy_search.build_text_index`.
+    """
+
+    name = "mongo"
+
+    def condition(self, collection: str, query: str) -> Dict[str, Any]:
+        q = (query or "").replace('"', " ").strip()
+        if not q:
+            return {}
+        # quote the query so multi-word input behaves as a phrase (parity with the regex engine)
+        return {"$text": {"$search": f"\"{q}\"" if " " in q else q}}
+
+    def score_expr(self, collection: str, query: str) -> Optional[Dict[str, Any]]:
+        if not (query or "").strip():
+            return None
+        return {"$meta": "textScore"}
+
+
+class LocalInvertedIndexEngine(TextSearchEngine):
+    """
+    On-disk inverted index (one sqlite file per collection) with BM25 ranking.
+    Every query term must be present (AND semantics); the top `max_hits` hits are handed to
+    Mongo as an `_id: {$in: [...]}` filter, so the collection is only touched by primary key.
+    Queries matching more docs than that are flagged by `is_truncated`. Hits are ranked in
+    Python (`scores`) rather than by a per-document lookup into the id list inside Mongo.
+    Queries without any word token (eg. "§") fall back to the regex engine; a missing index
+    raises TextIndexUnavailable rather than silently matching nothing.
+    """
+
+    name = "local"
+
+    def __init__(self, index_dir: str = LEGACY_SEARCH_INDEX_DIR, max_hits: int = LEGACY_SEARCH_LOCAL_MAX_HITS):
+        self.index_dir = index_dir
+        self.max_hits = max_hits
+        self._local = threading.local()
+
+    def index_path(self, collection: str) -> str:
+        return os.path.join(self.index_dir, f"{collection}.sqlite")
+
+    def _conn(self, collection: str) -> Optional[sqlite3.Connection]:
+        path = self.index_path(collection)
+        if not os.path.exists(path):
+            return None
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        mtime = os.path.getmtime(path)
+        cached = conns.get(collection)
+        if cached and cached[1] == mtime:
+            return cached[0]
+        if cached:
+            cached[0].close()
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        conns[collection] = (conn, mtime)
+        return conn
+
+    def search(self, collection: str, query: str) -> List[Tuple[str, float]]:
+        """
+        Returns [(external_id, bm25_score), ...] best first, capped at max_hits.
+        """
+        return list(self._search(collection, query)[0])
+
+    def is_truncated(self, collection: str, query: str) -> bool:
+        hits, n_matches = self._search(collection, query)
+        return n_matches > len(hits)
+
+    def _search(self, collection: str, query: str) -> Tuple[Tuple[Tuple[str, float], ...], int]:
+        terms = list(dict.fromkeys(normalize_tokens(query)))
+        if not terms:
+            return (), 0
+        if self._conn(collection) is None:
+            logger.error(
+                f"Legacy search index {self.index_path(collection)} is missing; "
+                f"build it with python -m onyx.legacy_search.build_text_index"
+            )
+            raise TextIndexUnavailable(f"Text search index for {collection} is not built")
+        mtime = os.path.getmtime(self.index_path(collection))
+        return _cached_bm25(self, collection, tuple(terms), mtime)
+
+    def _search_uncached(self, collection: str, terms: Tuple[str, ...]) -> Tuple[List[Tuple[str, float]], int]:
+        """Top max_hits (external_id, bm25_score) best first, and the number of matching docs."""
+        conn = self._conn(collection)
+        if conn is None:
+            return [], 0
+
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        n_docs = int(meta.get("n_docs") or 0)
+        avg_len = float(meta.get("avg_len") or 1.0)
+        if not n_docs:
+            return [], 0
+
+        dfs: Dict[str, int] = {}
+        for t in terms:
+            row = conn.execute("SELECT df FROM terms WHERE term = ?", (t,)).fetchone()
+            if not row:
+                return [], 0  # AND semantics: an unknown term matches nothing
+            dfs[t] = int(row[0])
+
+        # intersect postings starting from the rarest term so later lookups are keyed by doc id
+        ordered = sorted(terms, key=lambda t: dfs[t])
+        tfs: Dict[int, Dict[str, int]] = {
+            doc_id: {ordered[0]: tf}
+            for doc_id, tf in conn.execute(
+                "SELECT doc_id, tf FROM postings WHERE term = ?", (ordered[0],)
+            )
+        }
+        for t in ordered[1:]:
+            if not tfs:
+                return [], 0
+            found: Dict[int, int] = {}
+            for chunk in _chunks(list(tfs.keys()), 900):
+                marks = ",".join("?" * len(chunk))
+                for doc_id, tf in conn.execute(
+                    f"SELECT doc_id, tf FROM postings WHERE term = ? AND doc_id IN ({marks})",
+                    (t, *chunk),
+                ):
+                    found[doc_id] = tf
+            tfs = {d: {**v, t: found[d]} for d, v in tfs.items() if d in found}
+        if not tfs:
+            return [], 0
+
+        k1, b = LEGACY_SEARCH_BM25_K1, LEGACY_SEARCH_BM25_B
+        idf = {t: math.log(1.0 + (n_docs - dfs[t] + 0.5) / (dfs[t] + 0.5)) for t in terms}
+
+        scored: List[Tuple[str, float]] = []
+        for chunk in _chunks(list(tfs.keys()), 900):
+            marks = ",".join("?" * len(chunk))
+            for doc_id, ext_id, length in conn.execute(
+                f"SELECT doc_id, ext_id, length FROM docs WHERE doc_id IN ({marks})", chunk
+            ):
+                norm = k1 * (1.0 - b + b * (length / avg_len))
+                score = sum(idf[t] * tf * (k1 + 1.0) / (tf + norm) for t, tf in tfs[doc_id].items())
+                scored.append((ext_id, score))
+
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[: self.max_hits], len(scored)
+
+    def condition(self, collection: str, query: str) -> Dict[str, Any]:
+        if not normalize_tokens(query):
+            # nothing the index can look up, scan like the regex engine does
+            return RegexTextEngine().condition(collection, query)
+        hits = self.search(collection, query)
+        return {"_id": {"$in": [_to_mongo_id(ext_id) for ext_id, _ in hits]}}
+
+    def scores(self, collection: str, query: str) -> Optional[Dict[Any, float]]:
+        if not normalize_tokens(query):
+            return None
+        return {_to_mongo_id(ext_id): score for ext_id, score in self.search(collection, query)}
+
+
+@lru_cache(maxsize=256)
+def _cached_bm25(
+    engine: LocalInvertedIndexEngine, collection: str, terms: Tuple[str, ...], mtime: float
+) -> Tuple[Tuple[Tuple[str, float], ...], int]:
+    # mtime is part of the key so a rebuilt index is never served from a stale entry
+    hits, n_matches = engine._search_uncached(collection, terms)
+    return tuple(hits), n_matches
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+_ENGINES = {
+    "regex": RegexTextEngine,
+    "mongo": MongoTextEngine,
+    "local": LocalInvertedIndexEngine,
+}
+
+_engine: Optional[TextSearchEngine] = None
+
+
+def get_text_engine() -> TextSearchEngine:
+    global _engine
+    if _engine is None:
+        engine_cls = _ENGINES.get(LEGACY_SEARCH_TEXT_ENGINE)
+        if engine_cls is None:
+            raise RuntimeError(
+                f"Unknown LEGACY_SEARCH_TEXT_ENGINE '{LEGACY_SEARCH_TEXT_ENGINE}' "
+                f"(expected one of {sorted(_ENGINES)})"
+            )
+        _engine = engine_cls()
+    return _engine
+
+
+# ========= Index management =========
+
+def ensure_text_indexes(db, collections: List[str]) -> None:
+    """
+    Create the Mongo $text index used by the "mongo" engine (no-op if it already exists).
+    Blocks until the index is built, so it runs from the build_text_index CLI, not at startup.
+    """
+    weights = {f: (10 if f in _TITLE_FIELDS else 1) for f in JUDGEMENT_TEXT_FIELDS}
+    for coll in collections:
+        db[coll].create_index(
+            [(f, "text") for f in JUDGEMENT_TEXT_FIELDS],
+            name="legacy_search_text",
+            weights=weights,
+            default_language="english",
+            background=True,
+        )
+
+
+def build_local_index(db, collection: str, index_dir: str = LEGACY_SEARCH_INDEX_DIR, batch_size: int = 500) -> int:
+    """
+    Stream every document of `collection` and write a fresh sqlite inverted index.
+    The index is built next to the live one and swapped in atomically.
+    Returns the number of indexed documents.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    final_path = os.path.join(index_dir, f"{collection}.sqlite")
+    tmp_path = final_path + ".building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(
+        """
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE docs (doc_id INTEGER PRIMARY KEY, ext_id TEXT NOT NULL, length INTEGER NOT NULL);
+        CREATE TABLE postings (term TEXT NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL,
+                               PRIMARY KEY (term, doc_id)) WITHOUT ROWID;
+        CREATE TABLE terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """
+    )
+
+    proj = {f: 1 for f in JUDGEMENT_TEXT_FIELDS}
+    n_docs = 0
+    total_len = 0
+    df: Counter = Counter()
+    doc_rows: List[Tuple[int, str, int]] = []
+    posting_rows: List[Tuple[str, int, int]] = []
+
+    def flush():
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?)", doc_rows)
+        conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", posting_rows)
+        doc_rows.clear()
+        posting_rows.clear()
+
+    for doc in db[collection].find({}, proj, no_cursor_timeout=True).batch_size(batch_size):
+        tokens = normalize_tokens(judgement_index_text(doc))
+        n_docs += 1
+        total_len += len(tokens)
+        tf = Counter(tokens)
+        df.update(tf.keys())
+        doc_rows.append((n_docs, str(doc["_id"]), len(tokens)))
+        posting_rows.extend((term, n_docs, count) for term, count in tf.items())
+        if len(doc_rows) >= batch_size:
+            flush()
+    flush()
+
+    conn.executemany("INSERT INTO terms VALUES (?, ?)", df.items())
+    conn.executemany(
+        "INSERT INTO meta VALUES (?, ?)",
+        [("n_docs", str(n_docs)), ("avg_len", str(total_len / n_docs if n_docs else 1.0))],
+    )
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, final_path)
+    return n_docs
@@ -42,6 +42,7 @@ from onyx.configs.app_configs import POSTGRES_API_SERVER_POOL_OVERFLOW
 from onyx.configs.app_configs import POSTGRES_API_SERVER_POOL_SIZE
 from onyx.configs.app_configs import SYSTEM_RECURSION_LIMIT
 from onyx.configs.app_configs import USER_AUTH_SECRET
+from onyx.configs.app_configs import WARM_FEATURES_ON_STARTUP
 from onyx.configs.app_configs import WEB_DOMAIN
 from onyx.configs.constants import AuthType
 from onyx.configs.constants import POSTGRES_WEB_APP_NAME
@@ -104,6 +105,7 @@ from onyx.server.user_documents.api import router as user_documents_router
 from onyx.server.utils import BasicAuthenticationError
 from onyx.setup import setup_multitenant_onyx
 from onyx.setup import setup_onyx
+from onyx.utils.lazy_resource import warm_features
 from onyx.utils.logger import setup_logger
 from onyx.utils.logger import setup_uvicorn_logger
 from onyx.utils.middleware import add_onyx_request_id_middleware
@@ -122,6 +124,7 @@ from onyx.caseprediction.main import router as caseprediction_router # casepredi
 from onyx.docgen_hitl_backend.main import router as docgen_hitl_router # docgen_hitl_backend
 from onyx.deepsearch_backend.main import router as deepsearch_router  # deepsearch_backend
 from onyx.legacy_search.main import router as legacysearch_router  # legacysearch
+from onyx.legacy_search.facets import start_facet_refresher, stop_facet_refresher  # legacysearch
 
 logger = setup_logger()
 
@@ -248,8 +251,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     if AUTH_RATE_LIMITING_ENABLED:
         await setup_auth_limiter()
 
+    # legacy search: court/state facets are computed in the background, off the request path
+    start_facet_refresher()
+    # caseprediction / docgen otherwise load on first use, see /health/features
+    warm_features(WARM_FEATURES_ON_STARTUP)
+
     yield
 
+    stop_facet_refresher()
+
     SqlEngine.reset_engine()
 
     if AUTH_RATE_LIMITING_ENABLED:
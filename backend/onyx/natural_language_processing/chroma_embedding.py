@@ -0,0 +1,84 @@
+"""
+Chroma embedding function backed by the model server, so features that keep their own Chroma
+collections (docgen_hitl) embed through the same batched `/encoder/bi-encoder-embed` endpoint
+as search and indexing instead of loading a SentenceTransformer into every API worker.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from chromadb.api.types import Documents  # type: ignore
+from chromadb.api.types import EmbeddingFunction  # type: ignore
+from chromadb.api.types import Embeddings  # type: ignore
+
+from onyx.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from shared_configs.configs import MODEL_SERVER_HOST
+from shared_configs.configs import MODEL_SERVER_PORT
+from shared_configs.enums import EmbedTextType
+
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+
+class ModelServerEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Documents (`__call__`) are embedded as passages, in batches of `batch_size` per model
+    server request. Queries (`embed_query`, which Chroma uses for `query_texts`) are embedded
+    as queries and kept in a small LRU, since the same short texts tend to come back.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        normalize: bool = True,
+        batch_size: int = BATCH_SIZE_ENCODE_CHUNKS,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+        server_host: str = MODEL_SERVER_HOST,
+        server_port: int = MODEL_SERVER_PORT,
+    ) -> None:
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.query_cache_size = query_cache_size
+        self._model = EmbeddingModel(
+            server_host=server_host,
+            server_port=server_port,
+            model_name=model_name,
+            normalize=normalize,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+        )
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: list[str], text_type: EmbedTextType) -> list[np.ndarray]:
+        embeddings = self._model.encode(
+            texts, text_type=text_type, local_embedding_batch_size=self.batch_size
+        )
+        return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if not input:
+            return []
+        return self._encode(list(input), EmbedTextType.PASSAGE)
+
+    def embed_query(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        with self._lock:
+            cached = {text: self._query_cache[text] for text in texts if text in self._query_cache}
+            for text in cached:
+                self._query_cache.move_to_end(text)
+
+        # one request for everything not cached, duplicates included once
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            embedded = dict(zip(missing, self._encode(missing, EmbedTextType.QUERY)))
+            cached.update(embedded)
+            with self._lock:
+                self._query_cache.update(embedded)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+
+        return [cached[text] for text in texts]
@@ -35,6 +35,11 @@ class BaseTokenizer(ABC):
     def decode(self, tokens: list[int]) -> str:
         pass
 
+    @abstractmethod
+    def token_spans(self, string: str) -> list[tuple[int, int]]:
+        """(start, end) character offsets in `string` of each token that `encode` returns"""
+        pass
+
 
 class TiktokenTokenizer(BaseTokenizer):
     _instances: dict[str, "TiktokenTokenizer"] = {}
@@ -68,10 +73,19 @@ class TiktokenTokenizer(BaseTokenizer):
     def decode(self, tokens: list[int]) -> str:
         return self.encoder.decode(tokens)
 
+    def token_spans(self, string: str) -> list[tuple[int, int]]:
+        encoded = self.encode(string)
+        _, starts = self.encoder.decode_with_offsets(encoded)
+        ends = starts[1:] + [len(string)]
+        return list(zip(starts, ends))
+
 
 class HuggingFaceTokenizer(BaseTokenizer):
     def __init__(self, model_name: str):
         self.encoder: Tokenizer = Tokenizer.from_pretrained(model_name)
+        # tokenizer.json files often enable truncation at the model's max length, which
+        # would undercount long texts and cut the token spans of a long section short
+        self.encoder.no_truncation()
 
     def _safer_encode(self, string: str) -> Encoding:
         """
@@ -96,6 +110,29 @@ class HuggingFaceTokenizer(BaseTokenizer):
     def decode(self, tokens: list[int]) -> str:
         return self.encoder.decode(tokens)
 
+    def token_spans(self, string: str) -> list[tuple[int, int]]:
+        try:
+            return self.encoder.encode(string, add_special_tokens=False).offsets
+        except Exception:
+            # the ascii fallback of _safer_encode drops characters, so its offsets
+            # would not line up with `string`; locate the tokens instead
+            return _locate_tokens(string, self.tokenize(string))
+
+
+def _locate_tokens(string: str, tokens: list[str]) -> list[tuple[int, int]]:
+    spans = []
+    cursor = 0
+    for token in tokens:
+        # WordPiece continuation / SentencePiece and byte-level BPE word-start markers
+        piece = token.removeprefix("##").lstrip("\u2581\u0120")
+        start = string.find(piece, cursor) if piece else -1
+        if start == -1:
+            spans.append((cursor, cursor))
+            continue
+        cursor = start + len(piece)
+        spans.append((start, cursor))
+    return spans
+
 
 _TOKENIZER_CACHE: dict[tuple[EmbeddingProvider | None, str | None], BaseTokenizer] = {}
 
@@ -25,6 +25,8 @@ PUBLIC_ENDPOINT_SPECS = [
     ("/me", {"GET"}),
     # just returns 200 to validate that the server is up
     ("/health", {"GET"}),
+    # warm state of the lazily loaded features, for readiness probes
+    ("/health/features", {"GET"}),
     # just returns auth type, needs to be accessible before the user is logged
     # in to determine what flow to give the user
     ("/auth/type", {"GET"}),
@@ -1,3 +1,5 @@
+from typing import Any
+
 from fastapi import APIRouter
 
 from onyx import __version__
@@ -7,6 +9,7 @@ from onyx.configs.app_configs import AUTH_TYPE
 from onyx.server.manage.models import AuthTypeResponse
 from onyx.server.manage.models import VersionResponse
 from onyx.server.models import StatusResponse
+from onyx.utils.lazy_resource import feature_readiness
 
 router = APIRouter()
 
@@ -16,6 +19,12 @@ def healthcheck() -> StatusResponse:
     return StatusResponse(success=True, message="ok")
 
 
+@router.get("/health/features")
+def feature_readiness_check() -> dict[str, dict[str, Any]]:
+    """Per lazily loaded feature: cold | loading | ready | failed (and the last load error)."""
+    return feature_readiness()
+
+
 @router.get("/auth/type")
 def get_auth_type() -> AuthTypeResponse:
     return AuthTypeResponse(
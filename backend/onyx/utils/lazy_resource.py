@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+# name -> resource, for the readiness endpoint
+_REGISTRY: dict[str, "LazyResource[Any]"] = {}
+
+
+class LazyResource(Generic[T]):
+    """
+    A heavy resource (model, vector store client, agent runner, ...) built on first use
+    instead of at import time. Thread-safe; a failed build is retried on the next use.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]) -> None:
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._state = "cold"
+        self._error: str | None = None
+        self._load_seconds: float | None = None
+        _REGISTRY[name] = self
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def get(self) -> T:
+        if self._state == "ready":
+            return self._value  # type: ignore[return-value]
+        with self._lock:
+            if self._state == "ready":
+                return self._value  # type: ignore[return-value]
+            self._state = "loading"
+            start = time.monotonic()
+            try:
+                value = self._factory()
+            except Exception as e:
+                self._state = "failed"
+                self._error = str(e)
+                raise
+            self._value = value
+            self._error = None
+            self._load_seconds = round(time.monotonic() - start, 2)
+            self._state = "ready"
+            logger.info(f"{self.name} loaded in {self._load_seconds}s")
+            return value
+
+    async def aget(self) -> T:
+        """`get` for async callers; a cold build runs in a worker thread, off the event loop."""
+        if self._state == "ready":
+            return self._value  # type: ignore[return-value]
+        return await asyncio.to_thread(self.get)
+
+    def warm_in_background(self) -> None:
+        threading.Thread(target=self._warm, name=f"warm-{self.name}", daemon=True).start()
+
+    def _warm(self) -> None:
+        try:
+            self.get()
+        except Exception as e:
+            logger.warning(f"Warming {self.name} failed: {e}")
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "state": self._state,  # cold | loading | ready | failed
+            "load_seconds": self._load_seconds,
+            "error": self._error,
+        }
+
+
+def feature_readiness() -> dict[str, dict[str, Any]]:
+    return {name: resource.status() for name, resource in sorted(_REGISTRY.items())}
+
+
+def warm_features(names: list[str]) -> None:
+    for name in names:
+        resource = _REGISTRY.get(name)
+        if resource is None:
+            logger.warning(f"Unknown feature to warm: {name}")
+            continue
+        resource.warm_in_background()
@@ -1,6 +1,7 @@
 import collections.abc
 import contextvars
 import copy
+import queue
 import threading
 import uuid
 from collections.abc import Callable
@@ -384,3 +385,68 @@ def parallel_yield(gens: list[Iterator[R]], max_workers: int = 10) -> Iterator[R
                     )
                     next_ind += 1
                 del future_to_index[future]
+
+
+_PREFETCH_DONE = object()
+
+
+def prefetch_iterator(gen: Iterator[R], max_prefetch: int) -> Iterator[R]:
+    """
+    Consumes `gen` in a background thread (with the caller's contextvars), staying up to
+    `max_prefetch` items ahead of the caller, so producing the next item overlaps with
+    processing the current one. Items come out in order, and an exception raised by `gen`
+    is re-raised to the caller once the items before it have been consumed.
+
+    If the caller stops early, the background thread stops producing and closes `gen`
+    once its current item is done. With `max_prefetch` <= 0, `gen` is consumed inline.
+    """
+    if max_prefetch <= 0:
+        yield from gen
+        return
+
+    item_queue: queue.Queue[tuple[Any, BaseException | None]] = queue.Queue(
+        maxsize=max_prefetch
+    )
+    stop = threading.Event()
+
+    def _put(entry: tuple[Any, BaseException | None]) -> bool:
+        # poll so a blocked producer notices the caller going away
+        while not stop.is_set():
+            try:
+                item_queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        error: BaseException | None = None
+        try:
+            for item in gen:
+                if not _put((item, None)):
+                    return
+        except BaseException as e:
+            error = e
+        finally:
+            try:
+                close = getattr(gen, "close", None)
+                if close is not None:
+                    close()
+            except BaseException as e:
+                error = error or e
+            # always sent, or a caller waiting for the next item would block forever
+            _put((_PREFETCH_DONE, error))
+
+    context = contextvars.copy_context()
+    producer = threading.Thread(target=context.run, args=(_produce,), daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = item_queue.get()
+            if item is _PREFETCH_DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
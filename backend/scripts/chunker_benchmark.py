@@ -0,0 +1,120 @@
+"""
+Compares the chunker's default mode (sentence splitters) with single pass tokenization
+(CHUNKER_SINGLE_PASS_TOKENIZATION) on large synthetic documents: CPU time and how much text
+goes through the tokenizer.
+
+Run from backend/:
+    python -m scripts.chunker_benchmark --docs 20 --paragraphs 400
+"""
+
+import argparse
+import random
+import time
+
+from onyx.configs.constants import DocumentSource
+from onyx.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.indexing_pipeline import process_image_sections
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+
+WORDS = (
+    "the court held that contract party breach damages notice clause liability "
+    "agreement termination evidence appeal judgment statute section provision"
+).split()
+
+
+class CountingTokenizer(BaseTokenizer):
+    """Counts the characters the wrapped tokenizer is asked to process."""
+
+    def __init__(self, tokenizer: BaseTokenizer) -> None:
+        self.tokenizer = tokenizer
+        self.chars = 0
+
+    def encode(self, string: str) -> list[int]:
+        self.chars += len(string)
+        return self.tokenizer.encode(string)
+
+    def tokenize(self, string: str) -> list[str]:
+        self.chars += len(string)
+        return self.tokenizer.tokenize(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return self.tokenizer.decode(tokens)
+
+    def token_spans(self, string: str) -> list[tuple[int, int]]:
+        self.chars += len(string)
+        return self.tokenizer.token_spans(string)
+
+
+def _paragraph(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(2, 8)):
+        words = rng.choices(WORDS, k=rng.randint(6, 30))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def build_documents(num_docs: int, paragraphs: int, seed: int) -> list[Document]:
+    rng = random.Random(seed)
+    return [
+        Document(
+            id=f"benchmark_doc_{i}",
+            source=DocumentSource.FILE,
+            semantic_identifier=f"Benchmark document {i}",
+            metadata={"tags": ["benchmark"]},
+            doc_updated_at=None,
+            sections=[
+                # mix of small sections and sections several chunks long
+                TextSection(
+                    text="\n\n".join(
+                        _paragraph(rng) for _ in range(rng.choice([1, 1, 2, 12]))
+                    ),
+                    link=f"link{j}",
+                )
+                for j in range(paragraphs)
+            ],
+        )
+        for i in range(num_docs)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-multipass", action="store_true")
+    args = parser.parse_args()
+
+    documents = process_image_sections(
+        build_documents(args.docs, args.paragraphs, args.seed)
+    )
+    total_chars = sum(len(doc.get_text_content()) for doc in documents)
+    print(f"{len(documents)} documents, {total_chars:,} characters")
+
+    base_tokenizer = get_tokenizer(model_name=DOCUMENT_ENCODER_MODEL, provider_type=None)
+    for single_pass in (False, True):
+        tokenizer = CountingTokenizer(base_tokenizer)
+        chunker = Chunker(
+            tokenizer=tokenizer,
+            enable_multipass=not args.no_multipass,
+            single_pass_tokenization=single_pass,
+        )
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        chunks = chunker.chunk(documents)
+        cpu = time.process_time() - start_cpu
+        wall = time.perf_counter() - start_wall
+
+        mode = "single pass" if single_pass else "default"
+        print(
+            f"{mode:>12}: {len(chunks)} chunks, cpu={cpu:.2f}s wall={wall:.2f}s, "
+            f"tokenized {tokenizer.chars / total_chars:.1f}x the document text"
+        )
+
+
+if __name__ == "__main__":
+    main()
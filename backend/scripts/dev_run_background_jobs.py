@@ -59,6 +59,19 @@ def run_jobs() -> None:
         "connector_pruning,connector_doc_permissions_sync,connector_external_group_sync,csv_generation",
     ]
 
+    cmd_worker_deepsearch = [
+        "celery",
+        "-A",
+        "onyx.background.celery.versioned_apps.heavy",
+        "worker",
+        "--pool=threads",
+        "--concurrency=2",
+        "--prefetch-multiplier=1",
+        "--loglevel=INFO",
+        "--hostname=deepsearch@%n",
+        "--queues=deepsearch",
+    ]
+
     cmd_worker_indexing = [
         "celery",
         "-A",
@@ -119,6 +132,13 @@ def run_jobs() -> None:
         cmd_worker_heavy, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
     )
 
+    worker_deepsearch_process = subprocess.Popen(
+        cmd_worker_deepsearch,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
     worker_indexing_process = subprocess.Popen(
         cmd_worker_indexing, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
     )
@@ -151,6 +171,9 @@ def run_jobs() -> None:
     worker_heavy_thread = threading.Thread(
         target=monitor_process, args=("HEAVY", worker_heavy_process)
     )
+    worker_deepsearch_thread = threading.Thread(
+        target=monitor_process, args=("DEEPSEARCH", worker_deepsearch_process)
+    )
     worker_indexing_thread = threading.Thread(
         target=monitor_process, args=("INDEX", worker_indexing_process)
     )
@@ -166,6 +189,7 @@ def run_jobs() -> None:
     worker_primary_thread.start()
     worker_light_thread.start()
     worker_heavy_thread.start()
+    worker_deepsearch_thread.start()
     worker_indexing_thread.start()
     worker_user_files_indexing_thread.start()
     worker_monitoring_thread.start()
@@ -174,6 +198,7 @@ def run_jobs() -> None:
     worker_primary_thread.join()
     worker_light_thread.join()
     worker_heavy_thread.join()
+    worker_deepsearch_thread.join()
     worker_indexing_thread.join()
     worker_user_files_indexing_thread.join()
     worker_monitoring_thread.join()
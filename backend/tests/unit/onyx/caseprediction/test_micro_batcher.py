@@ -0,0 +1,49 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from onyx.caseprediction.predictor import ClassifierOutput
+from onyx.caseprediction.predictor import MicroBatcher
+from onyx.caseprediction.predictor import softmax
+from onyx.caseprediction.predictor import to_output
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched_in_order() -> None:
+    batches: list[list[str]] = []
+
+    def predict(texts: list[str]) -> list[str]:
+        batches.append(texts)
+        return [t.upper() for t in texts]
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=20)
+    results = await batcher.submit_many([f"q{i}" for i in range(6)])
+
+    assert results == [f"Q{i}" for i in range(6)]
+    assert [len(b) for b in batches] == [4, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_is_raised_to_every_caller_and_worker_survives() -> None:
+    calls = 0
+
+    def predict(texts: list[str]) -> list[str]:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("boom")
+        return texts
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=5)
+    outcomes = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+    assert await batcher.submit("c") == "c"
+
+
+def test_to_output_reports_predicted_class_confidence_in_percent() -> None:
+    probabilities = softmax(np.array([[0.0, 2.0], [3.0, 1.0]]))
+
+    assert to_output(probabilities[0]) == ClassifierOutput(1, 88.08)
+    assert to_output(probabilities[1]) == ClassifierOutput(0, 88.08)
@@ -0,0 +1,113 @@
+import sys
+import types
+from typing import Any
+
+import numpy as np
+import pytest
+
+from onyx.caseprediction import prediction_cache
+from onyx.caseprediction.prediction_cache import _SimilarityIndex
+from onyx.caseprediction.prediction_cache import cache_get
+from onyx.caseprediction.prediction_cache import prediction_digest
+from onyx.caseprediction.prediction_cache import reasoning_digest
+from onyx.caseprediction.prediction_cache import record_lookup
+
+
+def test_prediction_digest_ignores_case_and_whitespace() -> None:
+    mode = {"long_input": False, "aggregation": None}
+    a = prediction_digest("The  surgeon LEFT a sponge\n in my abdomen.", "rev1", mode)
+    b = prediction_digest("the surgeon left a sponge in my abdomen.", "rev1", mode)
+
+    assert a == b
+    # a new model revision or a different mode is a different entry
+    assert a != prediction_digest("the surgeon left a sponge in my abdomen.", "rev2", mode)
+    assert a != prediction_digest(
+        "the surgeon left a sponge in my abdomen.", "rev1", {"long_input": True, "aggregation": "mean"}
+    )
+
+
+def test_reasoning_digest_depends_on_prompt_version_and_label() -> None:
+    key = prediction_digest("facts", "rev1", None)
+
+    assert reasoning_digest(key, "1", "accepted") != reasoning_digest(key, "2", "accepted")
+    assert reasoning_digest(key, "1", "accepted") != reasoning_digest(key, "1", "rejected")
+
+
+def test_similarity_index_matches_near_duplicates_of_the_same_mode() -> None:
+    index = _SimilarityIndex(max_entries=2)
+    index.add(np.array([1.0, 0.0]), "short", "a")
+    index.add(np.array([0.0, 1.0]), "short", "b")
+
+    close = np.array([0.99, 0.14]) / np.linalg.norm([0.99, 0.14])
+    assert index.nearest(close, "short", threshold=0.95) == "a"
+    assert index.nearest(close, "long", threshold=0.95) is None
+    assert index.nearest(np.array([0.7071, 0.7071]), "short", threshold=0.95) is None
+
+    # bounded: the oldest entry is dropped first
+    index.add(np.array([0.0, -1.0]), "short", "c")
+    assert index.nearest(close, "short", threshold=0.95) is None
+
+
+class _FakeEmbedder:
+    instances: list["_FakeEmbedder"] = []
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+        self.queries: list[str] = []
+        _FakeEmbedder.instances.append(self)
+
+    def embed_query(self, input: list[str]) -> list[np.ndarray]:
+        self.queries.extend(input)
+        return [np.array([3.0, 4.0]) for _ in input]
+
+
+def test_similarity_index_embeds_through_the_model_server(monkeypatch: pytest.MonkeyPatch) -> None:
+    _FakeEmbedder.instances = []
+    # the embedder is imported on first use, since its module loads chromadb and the tokenizer
+    chroma_embedding = types.ModuleType("onyx.natural_language_processing.chroma_embedding")
+    chroma_embedding.ModelServerEmbeddingFunction = _FakeEmbedder  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, chroma_embedding.__name__, chroma_embedding)
+    index = _SimilarityIndex(max_entries=2)
+
+    assert np.allclose(index.embed("The  Surgeon"), [0.6, 0.8])
+    index.embed("another")
+
+    (embedder,) = _FakeEmbedder.instances
+    assert embedder.queries == ["the surgeon", "another"]
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, Any] = {}
+        self.lru: dict[str, float] = {}
+
+    async def get(self, key: str) -> Any:
+        return self.store.get(key)
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.lru.update(mapping)
+
+    async def incr(self, key: str) -> None:
+        self.store[key] = self.store.get(key, 0) + 1
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_counted_once_per_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = _FakeRedis()
+
+    async def _connection() -> _FakeRedis:
+        return redis
+
+    monkeypatch.setattr(prediction_cache, "CASE_PREDICTION_CACHE_ENABLED", True)
+    monkeypatch.setattr(prediction_cache, "get_async_redis_connection", _connection)
+    redis.store["caseprediction:cache:reasoning:r1"] = '"because"'
+
+    # exact miss, near-duplicate miss, then one miss for the request
+    assert await cache_get("prediction", "p1") is None
+    assert await cache_get("prediction", "p2") is None
+    await record_lookup(hit=False)
+    assert await cache_get("reasoning", "r1") == "because"
+
+    assert redis.store["caseprediction:cache:misses"] == 1
+    assert "caseprediction:cache:hits" not in redis.store
+    assert list(redis.lru) == ["caseprediction:cache:reasoning:r1"]
@@ -0,0 +1,72 @@
+from typing import Any
+
+import numpy as np
+import pytest
+
+from onyx.caseprediction.predictor import aggregate_logits
+from onyx.caseprediction.predictor import CasePredictor
+from onyx.caseprediction.predictor import window_spans
+
+
+def test_window_spans_overlap_and_cover_the_text() -> None:
+    assert window_spans(10, size=4, stride=1, max_windows=16) == [(0, 4), (3, 7), (6, 10)]
+    assert window_spans(3, size=4, stride=1, max_windows=16) == [(0, 3)]
+
+
+def test_window_spans_are_capped_evenly() -> None:
+    spans = window_spans(1000, size=10, stride=0, max_windows=4)
+
+    assert len(spans) == 4
+    assert spans[0] == (0, 10)
+    assert spans[-1] == (990, 1000)
+
+
+def test_aggregations() -> None:
+    logits = np.array([[0.0, 4.0], [1.0, 0.0], [2.0, 1.0]])
+
+    assert aggregate_logits(logits, "mean").tolist() == pytest.approx([1.0, 5 / 3])
+    assert aggregate_logits(logits, "max").tolist() == [2.0, 4.0]
+    # the decisive first window dominates the attention-weighted logits
+    attention = aggregate_logits(logits, "attention")
+    assert attention[1] > attention[0]
+    with pytest.raises(ValueError):
+        aggregate_logits(logits, "median")
+
+
+class _FakeTokenizer:
+    def __call__(self, text: str, add_special_tokens: bool = True) -> dict[str, list[int]]:
+        return {"input_ids": [int(t) for t in text.split()]}
+
+    def num_special_tokens_to_add(self) -> int:
+        return 1
+
+    def prepare_for_model(self, ids: list[int], add_special_tokens: bool = True) -> dict[str, list[int]]:
+        return {"input_ids": ids + [0]}
+
+    def pad(self, features: list[dict[str, list[int]]], return_tensors: str) -> dict[str, np.ndarray]:
+        width = max(len(f["input_ids"]) for f in features)
+        return {"input_ids": np.array([f["input_ids"] + [0] * (width - len(f["input_ids"])) for f in features])}
+
+
+class _SumBackend:
+    # class 1 logit = sum of the window's token ids
+    def logits(self, encoded: dict[str, Any]) -> np.ndarray:
+        sums = encoded["input_ids"].sum(axis=1).astype(float)
+        return np.stack([np.zeros_like(sums), sums - 2.0], axis=1)
+
+
+def test_predict_long_scores_every_window_in_one_batch() -> None:
+    predictor = CasePredictor.__new__(CasePredictor)
+    predictor.tokenizer = _FakeTokenizer()
+    predictor.backend = _SumBackend()
+    predictor.max_length = 4
+
+    output, windows = predictor.predict_long("1 1 0 0 0 0 0", aggregation="max", stride=1)
+
+    assert [(w["start_token"], w["end_token"]) for w in windows] == [(0, 3), (2, 5), (4, 7)]
+    assert [w["prediction"] for w in windows] == [0, 0, 0]
+    assert output.prediction == 0
+
+    output, windows = predictor.predict_long("0 0 0 0 0 5 5", aggregation="max", stride=1)
+    assert windows[-1]["prediction"] == 1
+    assert output.prediction == 1
@@ -0,0 +1,148 @@
+import contextlib
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from onyx.deepsearch_backend import job_state
+from onyx.deepsearch_backend.job_state import create_job
+from onyx.deepsearch_backend.job_state import finish_job
+from onyx.deepsearch_backend.job_state import get_events
+from onyx.deepsearch_backend.job_state import get_job
+from onyx.deepsearch_backend.job_state import get_result
+from onyx.deepsearch_backend.job_state import get_result_part
+from onyx.deepsearch_backend.job_state import JobLimitExceeded
+from onyx.deepsearch_backend.job_state import mark_running
+
+
+class _FakeRedis:
+    """The subset of redis-py used by job_state, in memory; pipelines run immediately."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    def pipeline(self, transaction: bool = True) -> "_FakeRedis":
+        return self
+
+    def execute(self) -> list[Any]:
+        return []
+
+    @contextlib.contextmanager
+    def lock(self, name: str, **kwargs: Any) -> Iterator[None]:
+        yield
+
+    def expire(self, key: str, seconds: int) -> None:
+        pass
+
+    def hset(self, key: str, field: str | None = None, value: Any = None, mapping: dict | None = None) -> None:
+        h = self.data.setdefault(key, {})
+        if field is not None:
+            h[field] = str(value)
+        for k, v in (mapping or {}).items():
+            h[k] = str(v)
+
+    def hget(self, key: str, field: str) -> Any:
+        return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key: str) -> dict:
+        return dict(self.data.get(key, {}))
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.data[key] = value
+
+    def get(self, key: str) -> Any:
+        return self.data.get(key)
+
+    def rpush(self, key: str, value: str) -> None:
+        self.data.setdefault(key, []).append(value)
+
+    def lrange(self, key: str, start: int, stop: int) -> list:
+        return self.data.get(key, [])[start:]
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key: str, member: str) -> None:
+        self.data.get(key, {}).pop(member, None)
+
+    def zcard(self, key: str) -> int:
+        return len(self.data.get(key, {}))
+
+    def zremrangebyscore(self, key: str, low: str, high: float) -> None:
+        z = self.data.get(key, {})
+        for member in [m for m, score in z.items() if score <= high]:
+            del z[member]
+
+
+def test_job_lifecycle() -> None:
+    r: Any = _FakeRedis()
+    create_job(r, "job-1", "sponge left after surgery", "user-a")
+    assert (get_job(r, "job-1") or {}).get("status") == "pending"
+
+    assert mark_running(r, "job-1")
+    finish_job(r, "job-1", result={"article": "text", "outline": "# A"})
+
+    job = get_job(r, "job-1")
+    assert job is not None and job["status"] == "completed"
+    assert get_result(r, "job-1") == {"article": "text", "outline": "# A"}
+    assert get_result_part(r, "job-1", "outline") == (True, "# A")
+    assert get_result_part(r, "job-1", "sections") == (False, None)
+    assert [e["stage"] for e in get_events(r, "job-1")] == ["queued", "started", "completed"]
+    # a redelivered task does not run a finished job again
+    assert not mark_running(r, "job-1")
+    assert not mark_running(r, "unknown")
+
+
+def test_admission_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(job_state, "DEEPSEARCH_MAX_JOBS_PER_USER", 2)
+    monkeypatch.setattr(job_state, "DEEPSEARCH_MAX_ACTIVE_JOBS", 3)
+    r: Any = _FakeRedis()
+
+    create_job(r, "a1", "q", "user-a")
+    create_job(r, "a2", "q", "user-a")
+    with pytest.raises(JobLimitExceeded):
+        create_job(r, "a3", "q", "user-a")
+
+    create_job(r, "b1", "q", "user-b")
+    with pytest.raises(JobLimitExceeded):
+        create_job(r, "c1", "q", "user-c")
+
+    # finished jobs free their slots
+    finish_job(r, "a1", error="boom")
+    create_job(r, "a3", "q", "user-a")
+    assert (get_job(r, "a1") or {}).get("error") == "boom"
+
+
+def test_job_task_fails_a_job_that_outlives_its_timeout(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from onyx.background.celery.tasks.deepsearch import tasks
+
+    r: Any = _FakeRedis()
+    release = threading.Event()
+    stopped = threading.Event()
+
+    def hung_deepsearch(query: str, on_event: Any) -> dict[str, Any]:
+        release.wait(5)
+        try:
+            on_event("section", title="late")
+        except TimeoutError:
+            stopped.set()
+            raise
+        return {}
+
+    monkeypatch.setattr(tasks, "DEEPSEARCH_JOB_TIMEOUT", 0.1)
+    monkeypatch.setattr(tasks, "get_raw_redis_client", lambda: r)
+    monkeypatch.setattr(tasks, "run_deepsearch", hung_deepsearch)
+    create_job(r, "job-1", "q", "user-a")
+
+    tasks.deepsearch_job_task.run(job_id="job-1", query="q", tenant_id="public")
+
+    job = get_job(r, "job-1")
+    assert job is not None and job["status"] == "error"
+    assert job["error"] == "Deep search timed out"
+    # the abandoned run stops at its next event instead of reporting progress
+    release.set()
+    assert stopped.wait(5)
+    assert "section" not in [e["stage"] for e in get_events(r, "job-1")]
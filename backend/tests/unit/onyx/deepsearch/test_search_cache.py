@@ -0,0 +1,100 @@
+import json
+import threading
+import urllib.parse
+import urllib.request
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+
+import pytest
+
+from onyx.deepsearch_backend.search_cache import CachedRetriever
+
+
+class _StubSearchHandler(BaseHTTPRequestHandler):
+    # SearXNG-like JSON API: /search?q=...&format=json
+    hits: list[str] = []
+
+    def do_GET(self) -> None:
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)["q"][0]
+        _StubSearchHandler.hits.append(query)
+        body = json.dumps(
+            {
+                "results": [
+                    {"url": f"https://{query}.example/{i}", "title": query, "content": "..."}
+                    for i in range(2)
+                ]
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class _StubRetriever:
+    """Minimal SearXNG retriever against the stub server."""
+
+    def __init__(self, url: str, k: int) -> None:
+        self.url = url
+        self.k = k
+
+    def forward(self, query: str, exclude_urls: list[str]) -> list[dict[str, Any]]:
+        with urllib.request.urlopen(
+            f"{self.url}?{urllib.parse.urlencode({'q': query, 'format': 'json'})}"
+        ) as response:
+            results = json.load(response)["results"][: self.k]
+        return [
+            {"url": r["url"], "title": r["title"], "description": r["content"], "snippets": [r["content"]]}
+            for r in results
+            if r["url"] not in exclude_urls
+        ]
+
+
+class _DictRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    def get(self, key: str) -> str | None:
+        return self.data.get(key)
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.data[key] = value
+
+
+@pytest.fixture
+def search_url() -> Iterator[str]:
+    _StubSearchHandler.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubSearchHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/search"
+    server.shutdown()
+
+
+def test_repeated_queries_hit_the_cache(search_url: str) -> None:
+    redis = _DictRedis()
+    rm = CachedRetriever(_StubRetriever(search_url, k=2), redis_client=redis)
+
+    first = rm(query_or_queries=["tort law", "negligence"], exclude_urls=[])
+    assert sorted(_StubSearchHandler.hits) == ["negligence", "tort law"]
+    assert len(first) == 4
+
+    # another job (a new wrapper sharing Redis) asking the same, differently spaced query
+    other = CachedRetriever(_StubRetriever(search_url, k=2), redis_client=redis)
+    again = other(query_or_queries="Tort  law", exclude_urls=["https://tort law.example/0"])
+    assert len(_StubSearchHandler.hits) == 2
+    assert [r["url"] for r in again] == ["https://tort law.example/1"]
+
+    # only the new query goes to the search server
+    other.forward(["negligence", "damages"])
+    assert sorted(_StubSearchHandler.hits) == ["damages", "negligence", "tort law"]
+
+
+def test_attributes_are_delegated(search_url: str) -> None:
+    rm = CachedRetriever(_StubRetriever(search_url, k=3), redis_client=_DictRedis())
+    assert rm.k == 3
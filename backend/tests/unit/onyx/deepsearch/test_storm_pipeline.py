@@ -0,0 +1,106 @@
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from onyx.deepsearch_backend import storm
+
+
+class _Info:
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"url": self.url}
+
+
+class _Article:
+    def __init__(self, text: str, urls: list[str]) -> None:
+        self.text = text
+        self.reference = {
+            "url_to_unified_index": {url: i + 1 for i, url in enumerate(urls)},
+            "url_to_info": {url: _Info(url) for url in urls},
+        }
+
+    def to_string(self) -> str:
+        return self.text
+
+    def get_outline_as_list(self, add_hashtags: bool, include_root: bool) -> list[str]:
+        return ["# Background", "# Analysis"]
+
+
+class _ArticleGeneration:
+    def generate_section(self, topic: str, section_name: str) -> dict[str, Any]:
+        return {"section_name": section_name, "section_content": f"{topic} {section_name}"}
+
+    def generate_article(self, topic: str, **_: Any) -> _Article:
+        for name in ("Background", "Analysis"):
+            self.generate_section(topic, name)
+        return _Article(f"{topic} draft https://{topic}.example", [f"https://{topic}.example"])
+
+
+class _FakeRunner:
+    """Stands in for STORMWikiRunner; results depend only on the topic it is asked about."""
+
+    def __init__(self) -> None:
+        self.args = SimpleNamespace(max_perspective=3)
+        self.storm_knowledge_curation_module = SimpleNamespace(research=self._research)
+        self.storm_outline_generation_module = SimpleNamespace(
+            generate_outline=lambda topic, **_: _Article("", [])
+        )
+        self.storm_article_generation = _ArticleGeneration()
+        self.storm_article_polishing_module = SimpleNamespace(
+            polish_article=lambda topic, draft_article, **_: _Article(
+                draft_article.text.replace("draft", "polished"), []
+            )
+        )
+
+    def _research(self, topic: str, callback_handler: Any, **_: Any) -> tuple[str, list[dict[str, Any]]]:
+        callback_handler.on_identify_perspective_start()
+        callback_handler.on_identify_perspective_end(perspectives=["judge", "counsel"])
+        time.sleep(0.02)  # let concurrent jobs interleave
+        callback_handler.on_dialogue_turn_end(
+            dlg_turn=SimpleNamespace(user_utterance="q?", agent_utterance="a.", search_queries=["q"])
+        )
+        callback_handler.on_information_gathering_end()
+        return "table", [{"perspective": topic, "dlg_turns": []}]
+
+
+def test_concurrent_jobs_on_their_own_runners(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(storm, "build_runner", _FakeRunner)
+    results: dict[str, dict] = {}
+    events: dict[str, list[tuple[str, dict]]] = {"tort": [], "contract": []}
+
+    def job(topic: str) -> None:
+        results[topic] = storm.run_deepsearch(
+            topic, on_event=lambda stage, **data: events[topic].append((stage, data))
+        )
+
+    threads = [threading.Thread(target=job, args=(t,)) for t in ("tort", "contract")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for topic, result in results.items():
+        assert result["article"].startswith(f"{topic} polished [1]")
+        assert f"1) https://{topic}.example" in result["article"]
+        assert result["outline"] == "# Background\n# Analysis"
+        assert result["citations"]["url_to_info"] == {
+            f"https://{topic}.example": {"url": f"https://{topic}.example"}
+        }
+        assert result["conversation_log"] == [{"perspective": topic, "dlg_turns": []}]
+
+    for topic, job_events in events.items():
+        assert [stage for stage, _ in job_events] == [
+            "perspectives",
+            "dialogue_turn",
+            "research_done",
+            "section",
+            "section",
+            "polished",
+        ]
+        assert job_events[0][1] == {"perspectives": ["judge", "counsel"]}
+        assert job_events[3][1] == {"title": "Background", "content": f"{topic} Background"}
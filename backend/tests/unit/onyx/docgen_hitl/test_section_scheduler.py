@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from onyx.docgen_hitl_backend.section_scheduler import schedule_sections
+
+
+@pytest.mark.asyncio
+async def test_independent_sections_overlap_and_stream_in_order() -> None:
+    running = 0
+    peak = 0
+    # section 2 builds on 0, section 3 on 2; section 1 is independent
+    dependencies: list[list[int]] = [[], [], [0], [2]]
+    delays = [0.03, 0.01, 0.01, 0.01]
+
+    async def generate(i: int, dependency_results: list[str]) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delays[i])
+        running -= 1
+        return f"s{i}<{','.join(dependency_results)}>"
+
+    results = [
+        r async for r in schedule_sections(dependencies, generate, max_concurrency=2)
+    ]
+
+    assert results == [
+        (0, "s0<>"),
+        (1, "s1<>"),
+        (2, "s2<s0<>>"),
+        (3, "s3<s2<s0<>>>"),
+    ]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_failure_cancels_remaining_sections() -> None:
+    started: list[int] = []
+
+    async def generate(i: int, dependency: Any) -> int:
+        started.append(i)
+        if i == 1:
+            raise RuntimeError("LLM unavailable")
+        await asyncio.sleep(1)
+        return i
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    with pytest.raises(RuntimeError, match="LLM unavailable"):
+        async for _ in schedule_sections([[], [], [1]], generate, max_concurrency=4):
+            pass
+
+    # surfaced without waiting for section 0, and section 2 (built on 1) never starts
+    assert loop.time() - start < 0.5
+    assert 2 not in started
+
+
+@pytest.mark.asyncio
+async def test_rejects_forward_dependencies() -> None:
+    async def generate(i: int, dependency: Any) -> int:
+        return i
+
+    with pytest.raises(ValueError):
+        async for _ in schedule_sections([[], [2], []], generate, max_concurrency=1):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_context_does_not_depend_on_completion_order() -> None:
+    # later sections finish first; section 3 builds on 0 and 2, the others on nothing
+    delays = [0.03, 0.02, 0.01, 0]
+
+    async def generate(i: int, dependency_results: list[str]) -> str:
+        await asyncio.sleep(delays[i])
+        return f"s{i}<{','.join(dependency_results)}>"
+
+    results = [
+        r
+        async for r in schedule_sections(
+            [[], [], [], [2, 0]], generate, max_concurrency=4
+        )
+    ]
+
+    assert results == [(0, "s0<>"), (1, "s1<>"), (2, "s2<>"), (3, "s3<s0<>,s2<>>")]
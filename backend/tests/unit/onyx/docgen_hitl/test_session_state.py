@@ -0,0 +1,73 @@
+import re
+from typing import Any
+
+import pytest
+
+from onyx.docgen_hitl_backend.session_state import DocgenSession
+
+
+class _FakeAsyncRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    def pipeline(self, transaction: bool = True) -> "_FakePipeline":
+        return _FakePipeline(self)
+
+    async def hget(self, key: str, field: str) -> Any:
+        return self.data.get(key, {}).get(field)
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    async def lrange(self, key: str, start: int, stop: int) -> list:
+        return list(self.data.get(key, []))
+
+
+class _FakePipeline:
+    def __init__(self, r: _FakeAsyncRedis) -> None:
+        self._r = r
+
+    def hset(self, key: str, mapping: dict[str, str]) -> None:
+        self._r.data.setdefault(key, {}).update(mapping)
+
+    def rpush(self, key: str, value: str) -> None:
+        self._r.data.setdefault(key, []).append(value)
+
+    def expire(self, key: str, seconds: int) -> None:
+        pass
+
+    async def execute(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_isolated_per_user_and_document() -> None:
+    r: Any = _FakeAsyncRedis()
+    alice_nda = DocgenSession(r, "alice", "nda")
+    alice_lease = DocgenSession(r, "alice", "lease")
+    bob_nda = DocgenSession(r, "bob", "nda")
+
+    await alice_nda.set(titles=["Parties", "Term"], progress="Generating section 1")
+    await bob_nda.set(titles=["Scope"])
+    await alice_nda.add_section({"title": "Parties", "content": "..."})
+
+    assert await alice_nda.get("titles") == ["Parties", "Term"]
+    assert await bob_nda.get("titles") == ["Scope"]
+    assert await alice_lease.get("titles", []) == []
+    assert await bob_nda.get("progress") is None
+    assert [s["title"] for s in await alice_nda.sections()] == ["Parties"]
+    assert await bob_nda.sections() == []
+
+    await alice_nda.reset_sections()
+    assert await alice_nda.sections() == []
+
+
+def test_collection_names_are_distinct_and_valid_for_chroma() -> None:
+    names = {
+        DocgenSession(None, user, doc).collection_name  # type: ignore[arg-type]
+        for user in ("alice", "bob")
+        for doc in ("nda", "a document id with spaces / slashes")
+    }
+
+    assert len(names) == 4
+    assert all(re.fullmatch(r"[a-zA-Z0-9._-]{3,63}", name) for name in names)
@@ -6,6 +6,7 @@ import pytest
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
 from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.constants import DocumentSource
+from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
@@ -105,3 +106,60 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+@pytest.mark.parametrize("enable_multipass", [True, False])
+def test_single_pass_chunk_document(
+    embedder: DefaultIndexingEmbedder, enable_multipass: bool
+) -> None:
+    tokenizer = embedder.embedding_model.tokenizer
+    long_section = (
+        "This is a long section that should be split into multiple chunks. " * 100
+    )
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={"tags": ["tag1", "tag2"]},
+        doc_updated_at=None,
+        sections=[
+            TextSection(text="This is a short section.", link="link1"),
+            TextSection(text="This is another short section.", link="link2"),
+            TextSection(text=long_section, link="link3"),
+            TextSection(text="Final short section.", link="link4"),
+        ],
+    )
+    indexing_documents = process_image_sections([document])
+
+    legacy_chunks = Chunker(
+        tokenizer=tokenizer, enable_multipass=enable_multipass
+    ).chunk(indexing_documents)
+    chunks = Chunker(
+        tokenizer=tokenizer,
+        enable_multipass=enable_multipass,
+        single_pass_tokenization=True,
+    ).chunk(indexing_documents)
+
+    assert [c.chunk_id for c in chunks] == list(range(len(chunks)))
+    assert abs(len(chunks) - len(legacy_chunks)) <= 1
+    assert chunks[0].content == legacy_chunks[0].content
+    assert chunks[0].source_links == legacy_chunks[0].source_links
+    assert chunks[-1].content == "Final short section."
+    assert chunks[-1].source_links == {0: "link4"}
+
+    for chunk in chunks:
+        content_limit = (
+            DOC_EMBEDDING_CONTEXT_SIZE
+            - len(tokenizer.encode(chunk.title_prefix))
+            - len(tokenizer.encode(chunk.metadata_suffix_semantic))
+        )
+        assert len(tokenizer.encode(chunk.content)) <= content_limit
+        assert chunk.content.startswith(chunk.blurb)
+        if enable_multipass:
+            assert chunk.mini_chunk_texts
+            # mini-chunks cover the chunk, in order
+            assert "".join("".join(chunk.mini_chunk_texts).split()) == "".join(
+                chunk.content.split()
+            )
+        else:
+            assert chunk.mini_chunk_texts is None
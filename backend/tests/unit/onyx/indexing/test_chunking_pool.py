@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.indexing import chunking_pool
+from onyx.indexing.chunking_pool import _allow_children
+from onyx.indexing.chunking_pool import _exit_with_parent
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunking_pool import ChunkingProcessPool
+from onyx.indexing.chunking_pool import partition_by_size
+from onyx.indexing.embedder import DefaultIndexingEmbedder
+from onyx.indexing.indexing_pipeline import process_image_sections
+from tests.unit.onyx.indexing.conftest import MockHeartbeat
+
+
+def test_partition_by_size() -> None:
+    sizes = [10, 1, 7, 3, 3, 8, 2]
+    shards = partition_by_size(sizes, 3)
+
+    assert sorted(i for shard in shards for i in shard) == list(range(len(sizes)))
+    assert all(shard == sorted(shard) for shard in shards)
+    totals = sorted(sum(sizes[i] for i in shard) for shard in shards)
+    assert totals == [11, 11, 12]
+
+
+def test_partition_by_size_more_shards_than_items() -> None:
+    assert partition_by_size([5, 2], 4) == [[0], [1]]
+    assert partition_by_size([], 4) == []
+
+
+def test_pool_chunks_match_serial(
+    embedder: DefaultIndexingEmbedder,
+    mock_heartbeat: MockHeartbeat,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(chunking_pool, "MIN_BATCH_CHARS", 0)
+
+    documents = process_image_sections(
+        [
+            Document(
+                id=f"test_doc_{i}",
+                source=DocumentSource.WEB,
+                semantic_identifier=f"Test Document {i}",
+                metadata={},
+                doc_updated_at=None,
+                sections=[
+                    TextSection(
+                        text=f"Document {i} has a section. " * (20 * (i % 3 + 1)),
+                        link=f"link{i}",
+                    )
+                ],
+            )
+            for i in range(6)
+        ]
+    )
+    tokenizer = embedder.embedding_model.tokenizer
+    serial_chunks = Chunker(tokenizer=tokenizer, enable_multipass=True).chunk(documents)
+
+    pool = ChunkingProcessPool(
+        model_name=embedder.embedding_model.model_name,
+        provider_type=embedder.embedding_model.provider_type,
+        num_processes=2,
+    )
+    try:
+        chunker = Chunker(
+            tokenizer=tokenizer,
+            enable_multipass=True,
+            callback=mock_heartbeat,
+            process_pool=pool,
+        )
+        assert pool.should_shard(documents)
+        chunks = chunker.chunk(documents)
+    finally:
+        pool.shutdown()
+
+    assert [(c.source_document.id, c.chunk_id) for c in chunks] == [
+        (c.source_document.id, c.chunk_id) for c in serial_chunks
+    ]
+    assert [c.content for c in chunks] == [c.content for c in serial_chunks]
+    assert all(
+        chunk.source_document is documents[int(chunk.source_document.id[-1])]
+        for chunk in chunks
+    )
+    assert mock_heartbeat.call_count == 2
+
+
+def _idle_worker() -> None:
+    threading.Thread(target=_exit_with_parent, daemon=True).start()
+    time.sleep(300)
+
+
+def _start_worker_and_hang(pids: Any) -> None:
+    with _allow_children():
+        child = multiprocessing.get_context("spawn").Process(target=_idle_worker)
+        child.start()
+    pids.put(child.pid)
+    time.sleep(60)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_workers_start_from_daemonic_job_and_exit_with_it() -> None:
+    ctx = multiprocessing.get_context("spawn")
+    pids = ctx.Queue()
+    job = ctx.Process(target=_start_worker_and_hang, args=(pids,), daemon=True)
+    job.start()
+    try:
+        # spawned processes import the backend first, which takes a while
+        worker_pid = pids.get(timeout=120)
+        assert _alive(worker_pid)
+    finally:
+        os.kill(job.pid, signal.SIGKILL)
+        job.join()
+
+    deadline = time.monotonic() + 120
+    while _alive(worker_pid) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert not _alive(worker_pid)
+
+
+def _start_pool_and_return() -> None:
+    pool = ChunkingProcessPool(model_name=None, provider_type=None, num_processes=2)
+    # returns once a worker is up, like a job that chunked its batches
+    pool._get_executor().submit(os.getpid).result()
+
+
+def test_daemonic_job_exits_with_its_pool_running() -> None:
+    job = multiprocessing.get_context("spawn").Process(
+        target=_start_pool_and_return, daemon=True
+    )
+    job.start()
+    job.join(timeout=240)
+    if job.exitcode is None:
+        job.kill()
+    assert job.exitcode == 0
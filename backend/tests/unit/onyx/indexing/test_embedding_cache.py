@@ -0,0 +1,151 @@
+from typing import Any
+
+from onyx.indexing.embedding_cache import EmbeddingCache
+from shared_configs.model_server_models import Embedding
+
+
+class _FakeRedis:
+    """The subset of redis-py used by EmbeddingCache, in memory; pipelines buffer results."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+        self.scores: dict[str, float] = {}
+        self.ttls: dict[str, int] = {}
+        self._results: list[Any] | None = None
+
+    def pipeline(self, transaction: bool = True) -> "_FakeRedis":
+        self._results = []
+        return self
+
+    def execute(self) -> list[Any]:
+        results, self._results = self._results or [], None
+        return results
+
+    def _ret(self, value: Any) -> Any:
+        if self._results is not None:
+            self._results.append(value)
+        return value
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> Any:
+        self.values[key] = value
+        if ex is not None:
+            self.ttls[key] = ex
+        return self._ret(True)
+
+    def expire(self, key: str, seconds: int) -> Any:
+        self.ttls[key] = seconds
+        return self._ret(key in self.values)
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> Any:
+        self.scores.update(mapping)
+        return self._ret(len(mapping))
+
+    def zremrangebyscore(self, key: str, min: Any, max: float) -> Any:
+        expired = [k for k, score in self.scores.items() if score <= max]
+        for k in expired:
+            del self.scores[k]
+        return self._ret(len(expired))
+
+    def zcard(self, key: str) -> Any:
+        return self._ret(len(self.scores))
+
+    def zpopmin(self, key: str, count: int) -> list[tuple[str, float]]:
+        oldest = sorted(self.scores.items(), key=lambda item: item[1])[:count]
+        for k, _ in oldest:
+            del self.scores[k]
+        return oldest
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.values.pop(key, None)
+
+
+class _CountingEmbedder:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[Embedding]:
+        self.calls.append(texts)
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+def _cache(r: Any, max_entries: int = 100, model_key: str = "model|True||None") -> EmbeddingCache:
+    return EmbeddingCache(r, model_key=model_key, max_entries=max_entries, ttl=3600)
+
+
+def test_only_new_text_is_embedded() -> None:
+    r = _FakeRedis()
+    cache = _cache(r)
+    embed = _CountingEmbedder()
+
+    first = cache.get_or_embed(["a", "bb", "a"], embed)
+    second = cache.get_or_embed(["bb", "ccc", "a"], embed)
+
+    assert first == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert second == [[2.0, 0.5], [3.0, 0.5], [1.0, 0.5]]
+    assert embed.calls == [["a", "bb"], ["ccc"]]
+
+
+def test_keys_depend_on_model_settings_and_trim_length() -> None:
+    r = _FakeRedis()
+    embed = _CountingEmbedder()
+
+    _cache(r).get_or_embed(["a"], embed)
+    _cache(r).get_or_embed(["a"], embed, large_chunks_present=True)
+    _cache(r, model_key="model|False||None").get_or_embed(["a"], embed)
+    _cache(r).get_or_embed(["a"], embed)
+
+    assert embed.calls == [["a"], ["a"], ["a"]]
+
+
+def test_hits_refresh_ttl_under_the_tenant_prefix() -> None:
+    r = _FakeRedis()
+    cache = EmbeddingCache(
+        r, model_key="m", max_entries=100, ttl=3600, key_prefix="tenant_a:embedding_cache"
+    )
+    embed = _CountingEmbedder()
+
+    cache.get_or_embed(["a"], embed)
+    (key,) = r.values
+    assert key.startswith("tenant_a:embedding_cache:")
+    r.ttls[key] = 5  # about to expire
+
+    cache.get_or_embed(["a"], embed)
+
+    assert r.ttls[key] == 3600
+    assert embed.calls == [["a"]]
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    r = _FakeRedis()
+    cache = _cache(r, max_entries=2)
+    embed = _CountingEmbedder()
+
+    cache.get_or_embed(["a"], embed)
+    cache.get_or_embed(["bb"], embed)
+    cache.get_or_embed(["a"], embed)  # "a" is now more recent than "bb"
+    cache.get_or_embed(["ccc"], embed)
+
+    assert len(r.values) == 2
+    cache.get_or_embed(["a", "bb"], embed)
+    assert embed.calls[-1] == ["bb"]
+
+
+def test_redis_errors_fall_back_to_embedding() -> None:
+    from redis.exceptions import RedisError
+
+    class _BrokenRedis:
+        def __getattr__(self, name: str) -> Any:
+            def fail(*args: Any, **kwargs: Any) -> Any:
+                raise RedisError("down")
+
+            return fail
+
+    embed = _CountingEmbedder()
+    result = _cache(_BrokenRedis()).get_or_embed(["a", "bb"], embed)
+
+    assert result == [[1.0, 0.5], [2.0, 0.5]]
+    assert embed.calls == [["a", "bb"]]
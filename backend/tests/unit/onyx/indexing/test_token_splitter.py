@@ -0,0 +1,60 @@
+import re
+
+from onyx.indexing.token_splitter import TokenizedText
+
+
+class _WordTokenizer:
+    """One token per word or punctuation mark, offsets like a HuggingFace tokenizer."""
+
+    def token_spans(self, string: str) -> list[tuple[int, int]]:
+        return [m.span() for m in re.finditer(r"\w+|[^\w\s]", string)]
+
+
+def _tokenize(text: str) -> TokenizedText:
+    return TokenizedText.from_text(text, _WordTokenizer())  # type: ignore[arg-type]
+
+
+def test_split_prefers_sentence_then_word_boundaries() -> None:
+    text = "One two three. Four five six seven. Eight nine"
+    tokenized = _tokenize(text)
+
+    # "One two three ." is 4 tokens, the window of 6 ends inside the second sentence
+    assert tokenized.split(6) == ["One two three.", "Four five six seven.", "Eight nine"]
+    # with small windows it cuts between words, never between a word and its period
+    assert tokenized.split(3) == [
+        "One two",
+        "three.",
+        "Four five six",
+        "seven.",
+        "Eight nine",
+    ]
+
+
+def test_pieces_cover_the_text_within_the_limit() -> None:
+    text = "\n".join(f"Line {i} has a few words, and a comma." for i in range(50))
+    tokenized = _tokenize(text)
+
+    ranges = tokenized.split_ranges(17)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(tokenized)
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(ranges, ranges[1:]))
+    assert all(0 < end - start <= 17 for start, end in ranges)
+    assert "".join(tokenized.split(17)).split() == "".join(text.split("\n")).split()
+
+
+def test_join_and_slice_keep_token_offsets() -> None:
+    separator = _tokenize("\n\n")
+    joined = TokenizedText.join(separator, [_tokenize("Alpha beta."), _tokenize("Gamma")])
+
+    assert joined.text == "Alpha beta.\n\nGamma"
+    assert [joined.text[s:e] for s, e in joined.spans] == ["Alpha", "beta", ".", "Gamma"]
+
+    tail = joined.slice(1, 4)
+    assert tail.text == "beta.\n\nGamma"
+    assert [tail.text[s:e] for s, e in tail.spans] == ["beta", ".", "Gamma"]
+
+
+def test_first_and_empty_text() -> None:
+    assert _tokenize("Short blurb. And more text after it").first(4) == "Short blurb."
+    assert _tokenize("   ").first(4) == ""
+    assert _tokenize("").split(4) == []
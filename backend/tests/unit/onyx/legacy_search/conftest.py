@@ -0,0 +1,4 @@
+import os
+
+# mongo_utils creates its (lazily connecting) client at import time
+os.environ.setdefault("CONNECTION_URL", "mongodb://localhost:27017")
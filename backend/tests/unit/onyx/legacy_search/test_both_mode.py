@@ -0,0 +1,104 @@
+import datetime as dt
+from typing import Any
+
+import pytest
+from bson import ObjectId
+
+from onyx.legacy_search import mongo_utils
+from onyx.legacy_search.mongo_utils import _date_id_key
+from onyx.legacy_search.mongo_utils import _id_key
+from onyx.legacy_search.mongo_utils import _judgements_plan
+from onyx.legacy_search.mongo_utils import _merge_top
+from onyx.legacy_search.mongo_utils import _statutes_plan
+from onyx.legacy_search.mongo_utils import CA
+from onyx.legacy_search.mongo_utils import HC
+from onyx.legacy_search.mongo_utils import SA
+from onyx.legacy_search.mongo_utils import SC
+
+
+def _day(n: int) -> dt.datetime:
+    return dt.datetime(2020, 1, n)
+
+
+@pytest.fixture(autouse=True)
+def fanout(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mongo_utils, "LEGACY_SEARCH_BOTH_MODE_STRATEGY", "fanout")
+    monkeypatch.setattr(mongo_utils, "LEGACY_SEARCH_MATERIALIZED_FIELDS", True)
+
+
+def test_merge_top_mixed_id_types() -> None:
+    oid = ObjectId()
+    branches = {
+        SC: [{"_id": oid, "d": _day(2)}, {"_id": oid, "d": None}],
+        HC: [{"_id": "hc-2", "d": _day(2)}, {"_id": "hc-1", "d": _day(1)}],
+    }
+
+    merged = _merge_top(branches, _date_id_key("d"), 0, 4)
+
+    # same date: ObjectIds sort after strings in BSON order, so they come first descending
+    assert [(coll, d["_id"]) for coll, d in merged] == [(SC, oid), (HC, "hc-2"), (HC, "hc-1"), (SC, oid)]
+
+
+def test_merge_top_equal_keys_break_on_collection() -> None:
+    branches = {CA: [{"_id": "s-1"}], SA: [{"_id": "s-1"}]}
+    assert [coll for coll, _ in _merge_top(branches, _id_key, 0, 2)] == [SA, CA]
+    assert [coll for coll, _ in _merge_top(branches, _id_key, 1, 2)] == [CA]
+
+
+def _judgement_docs() -> dict[str, list[dict[str, Any]]]:
+    return {
+        SC: [{"_id": f"sc-{n}", "sort_date": _day(n)} for n in (9, 6, 3)],
+        HC: [{"_id": f"hc-{n}", "sort_date": _day(n)} for n in (8, 7, 2)],
+    }
+
+
+def _plan(page: int) -> dict[str, Any]:
+    return _judgements_plan(
+        "", ["Supreme Court", "Delhi High Court"], None, None, None, None, page, 2
+    )
+
+
+def test_judgements_fanout_fetches_only_sort_keys() -> None:
+    plan = _plan(2)
+
+    for coll in (SC, HC):
+        _, pipeline = plan["queries"][coll]
+        assert {"$limit": 4} in pipeline
+        assert pipeline[-1] == {"$project": {"_id": 1, "sort_date": 1, "_score": 1}}
+
+
+@pytest.mark.parametrize(
+    "page,expected",
+    [
+        (1, [(SC, "sc-9"), (HC, "hc-8")]),
+        (2, [(HC, "hc-7"), (SC, "sc-6")]),
+        (3, [(SC, "sc-3"), (HC, "hc-2")]),
+    ],
+)
+def test_judgements_fanout_pages(page: int, expected: list[tuple[str, str]]) -> None:
+    plan = _plan(page)
+    docs = _judgement_docs()
+    top_k = page * 2
+
+    refs = plan["page_refs"]({coll: coll_docs[:top_k] for coll, coll_docs in docs.items()})
+    assert refs == expected
+
+    fetched = [(coll, {"_id": doc_id, "file_name": doc_id, "title": doc_id}) for coll, doc_id in refs]
+    out = plan["finish"]({SC: (3, False), HC: (3, False)}, {"page": fetched})
+    assert len(out["results"]) == 2
+    assert out["has_more"] == (page < 3)
+
+
+def test_statutes_fanout_pages_by_id() -> None:
+    plan = _statutes_plan("", ["Central", "Assam"], None, 2, 2)
+    for coll in (CA, SA):
+        _, pipeline = plan["queries"][coll]
+        assert pipeline[-1] == {"$project": {"_id": 1}}
+
+    oid = ObjectId()
+    refs = plan["page_refs"]({
+        CA: [{"_id": oid}, {"_id": "ca-5"}, {"_id": "ca-1"}],
+        SA: [{"_id": "sa-9"}, {"_id": "sa-0"}],
+    })
+    # descending: the ObjectId, 'sa-9' | 'sa-0', 'ca-5' | 'ca-1'
+    assert refs == [(SA, "sa-0"), (CA, "ca-5")]
@@ -0,0 +1,103 @@
+from typing import Any
+
+import pytest
+
+from onyx.legacy_search import count_cache
+from onyx.legacy_search import result_cache
+from onyx.legacy_search.count_cache import cached_count_async
+from onyx.legacy_search.count_cache import normalized_filter_key
+from onyx.legacy_search.result_cache import invalidate_search_caches
+
+
+class _Counter:
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.calls = 0
+
+    async def __call__(self, match: dict[str, Any], limit: int | None = None) -> int:
+        self.calls += 1
+        return min(self.n, limit) if limit else self.n
+
+
+class _FakeRedis:
+    """The slice of the sync and async clients used by the caches, over one shared dict."""
+
+    def __init__(self, store: dict[str, bytes]) -> None:
+        self.store = store
+
+    def incr(self, key: str) -> int:
+        value = int(self.store.get(key, 0)) + 1
+        self.store[key] = str(value).encode()
+        return value
+
+    def scan_iter(self, pattern: str) -> list[str]:
+        return [k for k in self.store if k.startswith(pattern.rstrip("*"))]
+
+
+class _FakeAsyncRedis(_FakeRedis):
+    async def get(self, key: str) -> bytes | None:
+        return self.store.get(key)
+
+    async def set(self, key: str, value: Any, ex: int | None = None) -> None:
+        self.store[key] = str(value).encode()
+
+
+@pytest.fixture
+def redis_store(monkeypatch: pytest.MonkeyPatch) -> dict[str, bytes]:
+    # the API worker reads through the async client, ingest invalidates through the sync one
+    store: dict[str, bytes] = {}
+
+    async def _get_async_redis_connection() -> _FakeAsyncRedis:
+        return _FakeAsyncRedis(store)
+
+    monkeypatch.setattr(count_cache, "get_async_redis_connection", _get_async_redis_connection)
+    monkeypatch.setattr(result_cache, "get_raw_redis_client", lambda: _FakeRedis(store))
+    return store
+
+
+def test_filter_key_is_order_insensitive() -> None:
+    a = {"$and": [{"x": 1}], "title": {"$regex": "foo", "$options": "i"}}
+    b = {"title": {"$options": "i", "$regex": "foo"}, "$and": [{"x": 1}]}
+    assert normalized_filter_key("sc_cases", a) == normalized_filter_key("sc_cases", b)
+    assert normalized_filter_key("sc_cases", a) != normalized_filter_key("hc_cases", a)
+    assert normalized_filter_key("sc_cases", a) != normalized_filter_key("sc_cases", a, generation=b"1")
+
+
+@pytest.mark.asyncio
+async def test_cached_count_hits_and_invalidation(redis_store: dict[str, bytes]) -> None:
+    count_fn = _Counter(42)
+    match = {"judge_tokens": {"$all": ["sonak"]}}
+
+    assert await cached_count_async("sc_cases", match, count_fn) == (42, False)
+    assert await cached_count_async("sc_cases", match, count_fn) == (42, False)
+    assert count_fn.calls == 1
+
+    invalidate_search_caches("hc_cases")
+    assert await cached_count_async("sc_cases", match, count_fn) == (42, False)
+    assert count_fn.calls == 1
+
+    invalidate_search_caches("sc_cases")
+    assert await cached_count_async("sc_cases", match, count_fn) == (42, False)
+    assert count_fn.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_count_estimate(redis_store: dict[str, bytes]) -> None:
+    count_fn = _Counter(1_000_000)
+    assert await cached_count_async("hc_cases", {"a": 1}, count_fn, limit=100) == (100, True)
+    assert await cached_count_async("hc_cases", {"a": 1}, count_fn, limit=100) == (100, True)
+    assert count_fn.calls == 1
+
+    small = _Counter(7)
+    assert await cached_count_async("hc_cases", {"b": 1}, small, limit=100) == (7, False)
+
+
+@pytest.mark.asyncio
+async def test_cached_count_fails_open(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def _unavailable() -> None:
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(count_cache, "get_async_redis_connection", _unavailable)
+    count_fn = _Counter(5)
+    assert await cached_count_async("sc_cases", {"a": 1}, count_fn, limit=3) == (3, True)
+    assert count_fn.calls == 1
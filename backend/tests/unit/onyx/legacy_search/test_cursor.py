@@ -0,0 +1,124 @@
+import datetime as dt
+from typing import Any
+
+import pytest
+from bson import ObjectId
+
+from onyx.legacy_search import mongo_utils
+from onyx.legacy_search.mongo_utils import _date_id_key
+from onyx.legacy_search.mongo_utils import _decode_cursor
+from onyx.legacy_search.mongo_utils import _encode_cursor
+from onyx.legacy_search.mongo_utils import _judgements_plan
+from onyx.legacy_search.mongo_utils import _keyset_merge
+from onyx.legacy_search.mongo_utils import _seek_after_date_id
+from onyx.legacy_search.mongo_utils import _statutes_plan
+from onyx.legacy_search.mongo_utils import CA
+from onyx.legacy_search.mongo_utils import HC
+from onyx.legacy_search.mongo_utils import SC
+from onyx.legacy_search.mongo_utils import SA
+
+
+def _day(n: int) -> dt.datetime:
+    return dt.datetime(2020, 1, n)
+
+
+def test_cursor_round_trip_keeps_types() -> None:
+    oid = ObjectId()
+    state = {"mode": "both", "q": "abc", "page": 3, "pos": {SC: [_day(5), oid], HC: [None, "hc-7"]}}
+
+    token = _encode_cursor(state)
+
+    assert "=" not in token
+    assert _decode_cursor(token) == state
+
+
+@pytest.mark.parametrize("token", ["not a cursor", _encode_cursor({"mode": "sc"}), ""])
+def test_decode_cursor_rejects_garbage(token: str) -> None:
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _decode_cursor(token)
+
+
+def test_seek_after_date_id() -> None:
+    assert _seek_after_date_id("sort_date", None) is None
+    assert _seek_after_date_id("sort_date", [None, 7]) == {"sort_date": None, "_id": {"$lt": 7}}
+    assert _seek_after_date_id("sort_date", [_day(5), 7]) == {"$or": [
+        {"sort_date": {"$lt": _day(5)}},
+        {"sort_date": None},
+        {"sort_date": _day(5), "_id": {"$lt": 7}},
+    ]}
+
+
+def test_keyset_merge() -> None:
+    pages = {
+        SC: [{"_id": 9, "d": _day(9)}, {"_id": 4, "d": _day(4)}, {"_id": 3, "d": None}],
+        HC: [{"_id": 8, "d": _day(8)}, {"_id": 7, "d": _day(4)}],
+    }
+
+    page, positions, has_more = _keyset_merge(
+        pages, {SC: [_day(10), 10]}, 3, _date_id_key("d"), lambda d: [d["d"], d["_id"]]
+    )
+
+    assert [(coll, d["_id"]) for coll, d in page] == [(SC, 9), (HC, 8), (HC, 7)]
+    assert positions == {SC: [_day(9), 9], HC: [_day(4), 7]}
+    assert has_more
+
+    page, positions, has_more = _keyset_merge(
+        {SC: [{"_id": 3, "d": None}]}, positions, 3, _date_id_key("d"), lambda d: [d["d"], d["_id"]]
+    )
+    assert [d["_id"] for _, d in page] == [3]
+    assert positions[SC] == [None, 3] and positions[HC] == [_day(4), 7]
+    assert not has_more
+
+
+def _judgements(**overrides: Any) -> dict[str, Any]:
+    params = dict(
+        query="", courts=["Supreme Court"], judge_name=None, case_title=None,
+        start_date=None, end_date=None, page=1, page_size=2, use_cursor=True,
+    )
+    params.update(overrides)
+    return _judgements_plan(**params)
+
+
+def test_judgements_cursor_pages_forward(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mongo_utils, "LEGACY_SEARCH_MATERIALIZED_FIELDS", True)
+    plan = _judgements(case_title="state")
+    first = plan["finish"](
+        {SC: (5, False), HC: (0, False)},
+        {SC: [
+            {"_id": 5, "sort_date": _day(5)},
+            {"_id": 4, "sort_date": _day(4)},
+            {"_id": 3, "sort_date": _day(3)},
+        ]},
+    )
+    assert first["has_more"] and first["next_cursor"]
+
+    plan = _judgements(case_title="state", cursor=first["next_cursor"])
+    _, pipeline = plan["queries"][SC]
+    assert _seek_after_date_id("sort_date", [_day(4), 4]) in [s.get("$match") for s in pipeline]
+    second = plan["finish"]({SC: (5, False), HC: (0, False)}, {SC: [{"_id": 3, "sort_date": _day(3)}]})
+    assert second["page"] == 2
+    assert not second["has_more"] and second["next_cursor"] is None
+
+
+def test_cursor_rejected_for_other_filters() -> None:
+    plan = _judgements(case_title="state")
+    cursor = plan["finish"](
+        {SC: (3, False), HC: (0, False)},
+        {SC: [{"_id": i, "sort_date": _day(i)} for i in (3, 2, 1)]},
+    )["next_cursor"]
+
+    with pytest.raises(ValueError, match="search filters"):
+        _judgements(case_title="union", cursor=cursor)
+    with pytest.raises(ValueError, match="selected courts"):
+        _judgements(case_title="state", courts=["Supreme Court", "Delhi High Court"], cursor=cursor)
+
+
+def test_statutes_cursor_rejected_for_other_filters() -> None:
+    plan = _statutes_plan("", ["Central", "Assam"], "theft", 1, 1, use_cursor=True)
+    cursor = plan["finish"](
+        {CA: (2, False), SA: (0, False)}, {CA: [{"_id": 2}, {"_id": 1}], SA: []}
+    )["next_cursor"]
+
+    assert _statutes_plan("", ["Central", "Assam"], "theft", 1, 1, cursor=cursor)["queries"]
+    with pytest.raises(ValueError, match="search filters"):
+        _statutes_plan("", ["Central", "Rajasthan"], "theft", 1, 1, cursor=cursor)
@@ -0,0 +1,116 @@
+import datetime as dt
+import re
+from typing import Any
+
+import pytest
+
+from onyx.legacy_search import derived_fields
+from onyx.legacy_search.mongo_utils import _canonical_court_label
+from onyx.legacy_search.mongo_utils import _judge_tokens
+from onyx.legacy_search.mongo_utils import _judge_tokens_filter
+from onyx.legacy_search.mongo_utils import HC
+from onyx.legacy_search.mongo_utils import SC
+
+
+def _matches(judge_filter: dict[str, Any], tokens: list[str]) -> bool:
+    """Evaluates a judge_tokens filter the way Mongo does ($or of $all, regex or exact)."""
+    clauses = judge_filter.get("$or", [judge_filter])
+    return any(
+        all(
+            any(term.match(t) if isinstance(term, re.Pattern) else term == t for t in tokens)
+            for term in clause["judge_tokens"]["$all"]
+        )
+        for clause in clauses
+    )
+
+
+@pytest.mark.parametrize(
+    "label,expected",
+    [
+        ("High Court of Delhi", "delhi high court"),
+        ("DELHI HIGH COURT", "delhi high court"),
+        ("  Delhi   High Court ", "delhi high court"),
+        ("High Court for the State of Telangana", "telangana high court"),
+        ("", ""),
+    ],
+)
+def test_canonical_court_label(label: str, expected: str) -> None:
+    assert _canonical_court_label(label) == expected
+
+
+def test_judge_tokens() -> None:
+    assert _judge_tokens("HON'BLE SHRI JUSTICE M. S. SONAK") == ["m", "s", "sonak"]
+    # comma separated benches and lists, deduped across both fields
+    assert _judge_tokens(
+        "Justice D.Y. Chandrachud, Justice J.B. Pardiwala", ["J.B. Pardiwala", None]
+    ) == ["d", "y", "chandrachud", "j", "b", "pardiwala"]
+    assert _judge_tokens(None, "") == []
+
+
+def test_sc_judge_filter_keeps_partial_names() -> None:
+    bench = _judge_tokens("Justice D.Y. Chandrachud")
+
+    assert _matches(_judge_tokens_filter("chandra", prefix=True), bench)
+    assert _matches(_judge_tokens_filter("D Y Chandrachud", prefix=True), bench)
+    assert not _matches(_judge_tokens_filter("pardiwala", prefix=True), bench)
+    # every token has to start a bench token
+    assert not _matches(_judge_tokens_filter("chandra pardiwala", prefix=True), bench)
+
+
+def test_hc_judge_filter_matches_whole_tokens() -> None:
+    bench = _judge_tokens("HON'BLE SHRI JUSTICE M. S. SONAK")
+
+    assert _matches(_judge_tokens_filter("M.S. Sonak"), bench)
+    assert not _matches(_judge_tokens_filter("sona"), bench)
+    # any of several judges
+    judge_filter = _judge_tokens_filter("Valmiki Menezes, M. S. Sonak")
+    assert judge_filter is not None and len(judge_filter["$or"]) == 2
+    assert _matches(judge_filter, bench)
+    assert _judge_tokens_filter("Justice") is None
+
+
+class _FakeCollection:
+    def __init__(self) -> None:
+        self.replaced: list[tuple[dict[str, Any], dict[str, Any]]] = []
+        self.inserted: list[dict[str, Any]] = []
+
+    def replace_one(self, flt: dict[str, Any], doc: dict[str, Any], upsert: bool = False) -> str:
+        assert upsert
+        self.replaced.append((flt, doc))
+        return "replaced"
+
+    def insert_one(self, doc: dict[str, Any]) -> str:
+        self.inserted.append(doc)
+        return "inserted"
+
+
+def test_upsert_judgement_writes_derived_fields_and_invalidates(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    db = {SC: _FakeCollection(), HC: _FakeCollection()}
+    invalidated: list[str] = []
+    monkeypatch.setattr(derived_fields, "DB", db)
+    monkeypatch.setattr(derived_fields, "invalidate_search_caches", invalidated.append)
+
+    hc_doc = {
+        "_id": "hc-1",
+        "Court Name": "High Court of Delhi",
+        "Decision Date": "05-03-2021",
+        "Judge": "HON'BLE MR. JUSTICE M. S. SONAK",
+    }
+    assert derived_fields.upsert_judgement(HC, hc_doc) == "replaced"
+    flt, stored = db[HC].replaced[0]
+    assert flt == {"_id": "hc-1"}
+    assert stored["Court Name"] == "High Court of Delhi"
+    assert stored["court_label"] == "delhi high court"
+    assert stored["sort_date"] == dt.datetime(2021, 3, 5)
+    assert stored["judge_tokens"] == ["m", "s", "sonak"]
+
+    sc_doc = {"judgment_dates": ["2019-11-09"], "bench": "Ranjan Gogoi, S.A. Bobde"}
+    assert derived_fields.upsert_judgement(SC, sc_doc) == "inserted"
+    stored = db[SC].inserted[0]
+    assert stored["sort_date"] == dt.datetime(2019, 11, 9)
+    assert stored["judge_tokens"] == ["ranjan", "gogoi", "s", "a", "bobde"]
+    assert "court_label" not in stored
+
+    assert invalidated == [HC, SC]
@@ -0,0 +1,98 @@
+from typing import Any
+
+import pytest
+
+from onyx.legacy_search import facets
+
+
+class _FakeCollection:
+    def __init__(self, rows: list[dict[str, Any]], count: int = 0) -> None:
+        self.rows = rows
+        self.count = count
+        self.calls = 0
+
+    def aggregate(self, pipeline: list[dict[str, Any]], **kwargs: Any) -> list[dict[str, Any]]:
+        self.calls += 1
+        return self.rows
+
+    def estimated_document_count(self) -> int:
+        return self.count
+
+
+@pytest.fixture
+def fake_db(monkeypatch: pytest.MonkeyPatch) -> dict[str, _FakeCollection]:
+    db = {
+        facets.SC: _FakeCollection([
+            {"_id": {"year": 2019}, "n": 5},
+            {"_id": {"year": None}, "n": 2},
+        ]),
+        facets.HC: _FakeCollection([
+            {"_id": {"court": "Madras High Court", "year": 2020}, "n": 3},
+            {"_id": {"court": "Bombay High Court ", "year": 2020}, "n": 1},
+            {"_id": {"court": "Bombay High Court", "year": 2021}, "n": 4},
+            {"_id": {"court": None, "year": 2021}, "n": 9},
+        ]),
+        facets.SA: _FakeCollection([
+            {"_id": "Rajasthan", "n": 2},
+            {"_id": "Rajasthan_3", "n": 1},
+            {"_id": "Assam", "n": 7},
+        ]),
+        facets.CA: _FakeCollection([], count=42),
+    }
+    monkeypatch.setattr(facets, "DB", db)
+    monkeypatch.setattr(facets, "_snapshot", None)
+    monkeypatch.setattr(facets, "_cold_snapshot", None)
+    monkeypatch.setattr(facets, "start_facet_refresher", lambda: None)
+    return db
+
+
+def test_compute_facets_counts_per_court_state_and_year(fake_db: dict[str, _FakeCollection]) -> None:
+    result = facets.compute_facets()
+
+    assert result["courts"] == [
+        {"value": "Supreme Court", "count": 7, "years": {"2019": 5}},
+        {"value": "Bombay High Court", "count": 5, "years": {"2020": 1, "2021": 4}},
+        {"value": "Madras High Court", "count": 3, "years": {"2020": 3}},
+    ]
+    assert result["states"] == [{"value": "Assam", "count": 7}, {"value": "Rajasthan", "count": 3}]
+    assert result["central_count"] == 42
+
+
+def test_get_facets_serves_snapshot_without_rescanning(fake_db: dict[str, _FakeCollection]) -> None:
+    facets.refresh_facets()
+    assert facets.hc_court_values() == ["Bombay High Court", "Madras High Court"]
+    assert facets.state_values() == ["Assam", "Rajasthan"]
+    assert fake_db[facets.HC].calls == 1
+
+
+def test_failed_refresh_keeps_previous_snapshot(
+    fake_db: dict[str, _FakeCollection], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first = facets.refresh_facets()
+
+    def _boom(*args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(fake_db[facets.HC], "aggregate", _boom)
+    assert facets.refresh_facets() is first
+
+
+def test_cold_get_facets_does_not_wait_for_the_refresh(
+    fake_db: dict[str, _FakeCollection], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    started: list[bool] = []
+    monkeypatch.setattr(facets, "start_facet_refresher", lambda: started.append(True))
+    monkeypatch.setattr(facets, "get_supported_hc_courts", lambda: ["Delhi High Court"])
+    monkeypatch.setattr(facets, "get_supported_states", lambda: ["Goa"])
+
+    with facets._refresh_lock:  # a refresh in progress
+        cold = facets.get_facets()
+
+    assert started
+    assert fake_db[facets.HC].calls == 0
+    assert [c["value"] for c in cold["courts"]] == ["Supreme Court", "Delhi High Court"]
+    assert cold["states"] == [{"value": "Goa", "count": None}]
+    assert facets.get_facets() is cold
+
+    facets.refresh_facets()
+    assert facets.get_facets()["central_count"] == 42
@@ -0,0 +1,45 @@
+import pytest
+
+from onyx.legacy_search import highlight
+from onyx.legacy_search.highlight import highlight_snippets
+from onyx.legacy_search.highlight import KeywordMatcher
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def matcher_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "automaton" and highlight.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    if request.param == "regex":
+        monkeypatch.setattr(highlight, "ahocorasick", None)
+    highlight.get_matcher.cache_clear()
+    return request.param
+
+
+def test_spans_are_case_insensitive_leftmost_longest(matcher_backend: str) -> None:
+    matcher = KeywordMatcher(["bail", "Anticipatory Bail", " "])
+    text = "Anticipatory bail was refused; BAIL granted later."
+
+    assert matcher.spans(text) == [(0, 17), (31, 35)]
+
+
+def test_highlight_counts_and_marks_in_one_pass(matcher_backend: str) -> None:
+    text = "x" * 300 + " the accused sought bail " + "y" * 300 + " bail <b>denied</b> " + "z" * 50
+
+    count, snippets = highlight_snippets(text, ["bail", "accused"], max_snippets=3, window=20)
+
+    assert count == 3
+    assert len(snippets) == 2
+    assert "<mark>accused</mark> sought <mark>bail</mark>" in snippets[0]
+    # surrounding text is escaped, marks are not
+    assert "<mark>bail</mark> &lt;b&gt;denied" in snippets[1]
+
+
+def test_highlight_respects_max_snippets_and_empty_input(matcher_backend: str) -> None:
+    text = " ".join(["bail"] + ["filler" * 40] * 5 + ["bail"])
+
+    count, snippets = highlight_snippets(text, ["bail"], max_snippets=1, window=10)
+    assert count == 2
+    assert len(snippets) == 1
+
+    assert highlight_snippets("", ["bail"]) == (0, [])
+    assert highlight_snippets(text, []) == (0, [])
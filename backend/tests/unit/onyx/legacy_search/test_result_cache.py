@@ -0,0 +1,38 @@
+import datetime as dt
+
+from onyx.legacy_search.result_cache import canonical_request
+
+
+def test_canonical_request_normalizes_equivalent_requests() -> None:
+    a = {
+        "query": "Section  302",
+        "courts": ["Supreme Court", "Bombay High Court"],
+        "start_date": dt.date(2020, 1, 1),
+        "page": 1,
+        "cursor": None,
+    }
+    b = {
+        "page": 1,
+        "courts": ["bombay high court", "supreme court"],
+        "query": " section 302 ",
+        "start_date": dt.date(2020, 1, 1),
+        "cursor": None,
+    }
+    assert canonical_request(a) == canonical_request(b)
+
+
+def test_canonical_request_distinguishes_pages_and_cursors() -> None:
+    base = {"query": "bail", "statutes": ["Central Acts"], "page": 1, "cursor": None}
+    assert canonical_request(base) != canonical_request({**base, "page": 2})
+    # cursors are opaque tokens and must not be case-folded
+    assert canonical_request({**base, "cursor": "AbC"}) != canonical_request({**base, "cursor": "abc"})
+
+
+def test_canonical_request_keeps_exact_params_exact() -> None:
+    base = {"query": "bail", "courts": ["Supreme Court"], "sort_by": "relevance", "cursor": None}
+    # sort_by is compared case-sensitively downstream, so only free text is case-folded
+    assert canonical_request(base) != canonical_request({**base, "sort_by": "Relevance"})
+    assert canonical_request({"statutes": ["Assam", "Central Acts"]}) == canonical_request(
+        {"statutes": ["Central Acts", "Assam"]}
+    )
+    assert canonical_request({"statutes": ["Assam"]}) != canonical_request({"statutes": ["assam"]})
@@ -0,0 +1,107 @@
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from onyx.legacy_search.text_engines import build_local_index
+from onyx.legacy_search.text_engines import JUDGEMENT_TEXT_FIELDS
+from onyx.legacy_search.text_engines import LocalInvertedIndexEngine
+from onyx.legacy_search.text_engines import MongoTextEngine
+from onyx.legacy_search.text_engines import normalize_tokens
+from onyx.legacy_search.text_engines import RegexTextEngine
+from onyx.legacy_search.text_engines import TextIndexUnavailable
+
+
+class _FakeCursor(list):
+    def batch_size(self, _: int) -> "_FakeCursor":
+        return self
+
+
+class _FakeCollection:
+    def __init__(self, docs: list[dict[str, Any]]) -> None:
+        self.docs = docs
+
+    def find(self, *args: Any, **kwargs: Any) -> _FakeCursor:
+        return _FakeCursor(self.docs)
+
+
+_DOCS = [
+    {"_id": "a", "content": "Conviction for murder under Section 302 IPC upheld."},
+    {"_id": "b", "Title": "State v Ram", "Text": "section 302 ... section 302 murder"},
+    {"_id": "c", "content": "A contract dispute between two firms."},
+]
+
+
+def _engine(tmp_path: Path) -> LocalInvertedIndexEngine:
+    assert build_local_index({"sc_cases": _FakeCollection(_DOCS)}, "sc_cases", str(tmp_path)) == 3
+    return LocalInvertedIndexEngine(index_dir=str(tmp_path), max_hits=10)
+
+
+def test_normalize_tokens() -> None:
+    assert normalize_tokens("Sec. 302, IPC") == ["sec", "302", "ipc"]
+    assert normalize_tokens("") == []
+
+
+def test_local_index_and_semantics_and_ranking(tmp_path: Path) -> None:
+    engine = _engine(tmp_path)
+
+    hits = engine.search("sc_cases", "SECTION 302")
+    # both docs contain every term; "b" repeats them and is shorter -> ranked first
+    assert [doc_id for doc_id, _ in hits] == ["b", "a"]
+    assert hits[0][1] > hits[1][1]
+
+    # every term must be present
+    assert engine.search("sc_cases", "section contract") == []
+    assert engine.search("sc_cases", "unknownterm") == []
+
+
+def test_local_index_condition(tmp_path: Path) -> None:
+    engine = _engine(tmp_path)
+
+    assert engine.condition("sc_cases", "  ") == {}
+    assert engine.condition("sc_cases", "contract") == {"_id": {"$in": ["c"]}}
+    # no word tokens -> nothing to look up, scan like the regex engine
+    assert engine.condition("sc_cases", "§ §") == RegexTextEngine().condition("sc_cases", "§ §")
+    assert engine.scores("sc_cases", "§") is None
+    # missing index file -> an error rather than an empty result
+    with pytest.raises(TextIndexUnavailable):
+        engine.condition("hc_cases", "contract")
+
+
+def test_local_index_truncation_and_scores(tmp_path: Path) -> None:
+    assert build_local_index({"sc_cases": _FakeCollection(_DOCS)}, "sc_cases", str(tmp_path)) == 3
+    engine = LocalInvertedIndexEngine(index_dir=str(tmp_path), max_hits=1)
+
+    # both "a" and "b" match, only the best one is handed to Mongo
+    assert engine.condition("sc_cases", "section 302") == {"_id": {"$in": ["b"]}}
+    assert engine.is_truncated("sc_cases", "section 302")
+    assert not engine.is_truncated("sc_cases", "contract")
+
+    scores = engine.scores("sc_cases", "section 302")
+    assert list(scores) == ["b"]
+    # ranking happens in Python, not through a per-document expression in Mongo
+    assert engine.score_expr("sc_cases", "section 302") is None
+    assert engine.scores("sc_cases", " ") is None
+
+
+def test_regex_engine() -> None:
+    engine = RegexTextEngine()
+
+    assert engine.condition("sc_cases", "   ") == {}
+    condition = engine.condition("hc_cases", " Sec. 302 ")
+    rx = {"$regex": re.escape("Sec. 302"), "$options": "i"}
+    assert condition == {"$or": [{field: rx} for field in JUDGEMENT_TEXT_FIELDS]}
+    assert engine.score_expr("sc_cases", "murder") is None
+    assert not engine.is_truncated("sc_cases", "murder")
+
+
+def test_mongo_engine() -> None:
+    engine = MongoTextEngine()
+
+    assert engine.condition("sc_cases", "") == {}
+    assert engine.condition("sc_cases", "murder") == {"$text": {"$search": "murder"}}
+    # multi-word input is searched as a phrase, embedded quotes cannot break out of it
+    assert engine.condition("sc_cases", 'section "302"') == {"$text": {"$search": '"section  302"'}}
+    assert engine.score_expr("sc_cases", "murder") == {"$meta": "textScore"}
+    assert engine.score_expr("sc_cases", " ") is None
@@ -0,0 +1,54 @@
+from collections.abc import Generator
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.natural_language_processing.chroma_embedding import (
+    ModelServerEmbeddingFunction,
+)
+from shared_configs.enums import EmbedTextType
+
+
+@pytest.fixture
+def mock_embedding_model() -> Generator[Mock, None, None]:
+    with patch(
+        "onyx.natural_language_processing.chroma_embedding.EmbeddingModel"
+    ) as mock:
+        mock.return_value.encode.side_effect = lambda texts, **_: [
+            [float(len(text)), 1.0] for text in texts
+        ]
+        yield mock
+
+
+def test_documents_are_embedded_as_passages_in_batches(
+    mock_embedding_model: Mock,
+) -> None:
+    embed = ModelServerEmbeddingFunction("test-model", batch_size=16)
+
+    embeddings = embed(["a", "bbb"])
+
+    assert [list(e) for e in embeddings] == [[1.0, 1.0], [3.0, 1.0]]
+    mock_embedding_model.return_value.encode.assert_called_once_with(
+        ["a", "bbb"],
+        text_type=EmbedTextType.PASSAGE,
+        local_embedding_batch_size=16,
+    )
+
+
+def test_queries_are_cached(mock_embedding_model: Mock) -> None:
+    encode = mock_embedding_model.return_value.encode
+    embed = ModelServerEmbeddingFunction("test-model", query_cache_size=2)
+
+    first = embed.embed_query(["term", "parties", "term"])
+    assert [list(e) for e in first] == [[4.0, 1.0], [7.0, 1.0], [4.0, 1.0]]
+    assert encode.call_args.args[0] == ["term", "parties"]
+    assert encode.call_args.kwargs["text_type"] == EmbedTextType.QUERY
+
+    # only the new text goes to the model server, which evicts the oldest ("term")
+    embed.embed_query(["parties", "scope"])
+    assert encode.call_args.args[0] == ["scope"]
+
+    embed.embed_query(["term"])
+    assert encode.call_args.args[0] == ["term"]
+    assert encode.call_count == 3
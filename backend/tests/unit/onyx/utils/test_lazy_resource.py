@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from onyx.utils.lazy_resource import feature_readiness
+from onyx.utils.lazy_resource import LazyResource
+from onyx.utils.lazy_resource import warm_features
+
+
+def test_lazy_resource_builds_once_on_first_use() -> None:
+    calls: list[int] = []
+
+    def factory() -> str:
+        time.sleep(0.05)
+        calls.append(1)
+        return "model"
+
+    resource = LazyResource("test-once", factory)
+    assert feature_readiness()["test-once"]["state"] == "cold"
+
+    results: list[str] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(resource.get()))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["model"] * 5
+    assert len(calls) == 1
+    assert feature_readiness()["test-once"]["state"] == "ready"
+
+
+def test_lazy_resource_failure_is_reported_and_retried() -> None:
+    attempts: list[int] = []
+
+    def factory() -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FileNotFoundError("config.json is missing")
+        return "model"
+
+    resource = LazyResource("test-retry", factory)
+    with pytest.raises(FileNotFoundError):
+        resource.get()
+    status = feature_readiness()["test-retry"]
+    assert status["state"] == "failed"
+    assert "config.json" in status["error"]
+
+    assert resource.get() == "model"
+    assert feature_readiness()["test-retry"]["error"] is None
+
+
+def test_warm_features_loads_in_the_background() -> None:
+    resource = LazyResource("test-warm", lambda: "model")
+
+    warm_features(["test-warm", "unknown"])
+
+    deadline = time.monotonic() + 2
+    while not resource.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert resource.ready
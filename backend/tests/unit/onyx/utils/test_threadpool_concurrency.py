@@ -8,6 +8,7 @@ from concurrent.futures import ThreadPoolExecutor
 import pytest
 
 from onyx.utils.threadpool_concurrency import parallel_yield
+from onyx.utils.threadpool_concurrency import prefetch_iterator
 from onyx.utils.threadpool_concurrency import run_in_background
 from onyx.utils.threadpool_concurrency import run_with_timeout
 from onyx.utils.threadpool_concurrency import ThreadSafeDict
@@ -389,3 +390,126 @@ def test_parallel_yield_non_blocking() -> None:
     # Verify no values are missing
     assert len(results) == 300  # Should have all values from 0 to 299
     assert sorted(results) == list(range(300))
+
+
+def test_prefetch_iterator_overlaps_production_with_consumption() -> None:
+    """Items arrive in order, and producing the next one overlaps with consuming this one."""
+
+    def slow_gen() -> Iterator[int]:
+        for i in range(5):
+            time.sleep(0.1)
+            yield i
+
+    start = time.monotonic()
+    results = []
+    for item in prefetch_iterator(slow_gen(), max_prefetch=2):
+        time.sleep(0.1)
+        results.append(item)
+    elapsed = time.monotonic() - start
+
+    assert results == [0, 1, 2, 3, 4]
+    # sequentially this would take ~1.0s
+    assert elapsed < 0.8
+
+
+def test_prefetch_iterator_is_bounded_and_propagates_context() -> None:
+    produced: list[int] = []
+    test_context_var.set("indexing")
+
+    def gen() -> Iterator[str]:
+        for i in range(10):
+            produced.append(i)
+            yield test_context_var.get()
+
+    it = prefetch_iterator(gen(), max_prefetch=2)
+    assert next(it) == "indexing"
+    time.sleep(0.2)
+    # the one handed out, two queued and one waiting to be queued
+    assert len(produced) <= 4
+
+
+def test_prefetch_iterator_raises_after_preceding_items() -> None:
+    def failing_gen() -> Iterator[int]:
+        yield 1
+        yield 2
+        raise ValueError("Generator failure")
+
+    results = []
+    with pytest.raises(ValueError, match="Generator failure"):
+        for item in prefetch_iterator(failing_gen(), max_prefetch=4):
+            results.append(item)
+    assert results == [1, 2]
+
+
+class _Aborted(BaseException):
+    pass
+
+
+@pytest.mark.parametrize("fail_in", ["gen", "close"])
+def test_prefetch_iterator_does_not_hang_on_base_exceptions(fail_in: str) -> None:
+    """A BaseException from the generator (or its close) still reaches the caller."""
+
+    class FailingGen:
+        def __init__(self) -> None:
+            self.items = iter([1])
+
+        def __iter__(self) -> "FailingGen":
+            return self
+
+        def __next__(self) -> int:
+            item = next(self.items, None)
+            if item is None:
+                if fail_in == "gen":
+                    raise _Aborted()
+                raise StopIteration
+            return item
+
+        def close(self) -> None:
+            if fail_in == "close":
+                raise _Aborted()
+
+    outcome: list[object] = []
+
+    def consume() -> None:
+        try:
+            outcome.extend(prefetch_iterator(FailingGen(), max_prefetch=2))
+        except _Aborted as e:
+            outcome.append(e)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    consumer.join(timeout=2)
+
+    assert not consumer.is_alive()
+    assert outcome[0] == 1 and isinstance(outcome[1], _Aborted)
+
+
+def test_prefetch_iterator_stops_producer_when_consumer_stops() -> None:
+    closed = threading.Event()
+
+    def endless_gen() -> Generator[int, None, None]:
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    it = prefetch_iterator(endless_gen(), max_prefetch=1)
+    assert next(it) == 0
+    it.close()  # type: ignore[attr-defined]
+
+    assert closed.wait(timeout=2)
+
+
+def test_prefetch_iterator_inline_when_disabled() -> None:
+    thread_ids: list[int] = []
+
+    def gen() -> Iterator[int]:
+        for i in range(3):
+            thread_ids.append(threading.get_ident())
+            yield i
+
+    assert list(prefetch_iterator(gen(), max_prefetch=0)) == [0, 1, 2]
+    assert set(thread_ids) == {threading.get_ident()}
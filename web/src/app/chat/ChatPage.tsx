@@ -3615,29 +3615,40 @@ export function ChatPage({
 
           const { job_id } = await submitResponse.json();
 
-          // Step 2: Poll for result
-          let attempts = 0;
-          let result = null;
-          const maxAttempts = 100;
-          const delay = (ms: number) => new Promise((res) => setTimeout(res, ms));
-
-          while (attempts < maxAttempts) {
-            const statusResponse = await fetch(`/api/deepsearch/status/${job_id}`);
-            if (!statusResponse.ok) throw new Error("Failed to get job status");
-
-            const statusData = await statusResponse.json();
-            if (statusData.status === "completed") {
-              result = statusData.result;
-              break;
-            } else if (statusData.status === "error") {
-              throw new Error(statusData.error || "Deep Search failed");
-            }
-
-            await delay(3000); // wait 3s before next poll
-            attempts++;
-          }
+          // Step 2: Follow the job's progress events until it finishes
+          await new Promise<void>((resolve, reject) => {
+            const events = new EventSource(`/api/deepsearch/events/${job_id}`);
+            events.onmessage = (e) => {
+              const event = JSON.parse(e.data);
+              if (event.stage === "completed") {
+                events.close();
+                resolve();
+              } else if (event.stage === "error") {
+                events.close();
+                reject(new Error(event.error || "Deep Search failed"));
+              }
+            };
+            events.onerror = () => {
+              // EventSource reconnects (resuming after the last event id) unless the
+              // server refused the stream
+              if (events.readyState === EventSource.CLOSED) {
+                reject(new Error("Lost the Deep Search event stream"));
+              }
+            };
+          });
 
-          if (!result) throw new Error("Deep Search timed out");
+          // Step 3: Fetch only the result parts shown in the chat
+          const fetchPart = async (part: string) => {
+            const partResponse = await fetch(`/api/deepsearch/result/${job_id}/${part}`);
+            if (!partResponse.ok) return null;
+            return (await partResponse.json()).content;
+          };
+          const [article, outline, citations] = await Promise.all([
+            fetchPart("article"),
+            fetchPart("outline"),
+            fetchPart("citations"),
+          ]);
+          const result = { article, outline, citations };
 
           const newMessageId = Date.now();
 
@@ -164,13 +164,22 @@ const Page: React.FC = () => {
     // const API_BASE_URL = "http://13.202.103.72:8002";
     const API_BASE_URL = "/api/docgen_hitl";
 
+    // Server-side session of this page's document (titles, progress, sections)
+    const documentId = useRef(
+        typeof crypto !== "undefined" && "randomUUID" in crypto
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+    );
+
     // Poll backend for progress updates
     useEffect(() => {
         let interval: NodeJS.Timeout | undefined;
         if (isLoading) {
             interval = setInterval(async () => {
                 try {
-                    const response = await axios.get(`${API_BASE_URL}/get_progress`);
+                    const response = await axios.get(`${API_BASE_URL}/get_progress`, {
+                        params: { document_id: documentId.current },
+                    });
                     setProgressMessage(response.data.status || "Fetching progress...");
                 } catch {
                     setProgressMessage("Fetching progress...");
@@ -221,6 +230,7 @@ const Page: React.FC = () => {
                     body: JSON.stringify({
                         document_title: documentType,
                         document_info: documentDescription,
+                        document_id: documentId.current,
                     }),
                     signal,
                 });
@@ -396,6 +406,7 @@ const Page: React.FC = () => {
         try {
             await axios.post(`${API_BASE_URL}/save_titles`, {
                 titles: modifiedTitles,
+                document_id: documentId.current,
             });
 
             const response = await fetch(`${API_BASE_URL}/docgen_hitl`, {
@@ -406,6 +417,7 @@ const Page: React.FC = () => {
                 body: JSON.stringify({
                     document_title: documentType,
                     document_info: documentDescription,
+                    document_id: documentId.current,
                 }),
                 signal,
             });
@@ -698,6 +710,7 @@ const Page: React.FC = () => {
                                             setIsCancelDisabled(true); // Disable the cancel button
                                             const response = await axios.post(`${API_BASE_URL}/save_titles`, {
                                                 titles: modifiedTitles,
+                                                document_id: documentId.current,
                                             });
                                             setAreTitlesSaved(true); // Mark titles as saved
                                             setToastMessage(response.data.message || "Titles saved successfully!");